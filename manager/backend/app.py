@@ -1,94 +1,158 @@
 from __future__ import annotations
 
 import asyncio
+import functools
 import json
 import os
+import re
+import subprocess
 from pathlib import Path
-from typing import List
+from typing import Any, Callable, List, Sequence, TypeVar
 from datetime import datetime
 
-from fastapi import FastAPI, HTTPException, WebSocket, WebSocketDisconnect
+from fastapi import APIRouter, Depends, FastAPI, HTTPException, Response, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse, RedirectResponse
+from fastapi.responses import JSONResponse, PlainTextResponse, RedirectResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 
+from .config import HubConfig
+from .dependencies import (
+	HubState,
+	get_broadcast_hub,
+	get_hub_state,
+	get_jobs,
+	get_json_cache,
+	get_orchestrator,
+	get_process_manager,
+	get_store,
+)
+from .jobs import Job, JobManager, JobQueueFull
+from .listing import ListQuery
+from .log_pages import read_after, read_before
+from .log_search import compile_pattern, search_log
 from .models import (
 	CreateOrUpdateProjectRequest,
+	JobInfo,
 	Project,
 	StartProjectRequest,
 	TailLogsResponse,
+	fork,
 )
 from .orchestrator import BroadcastHub, Orchestrator
 from .process_manager import ProcessManager
-from .project_store import ProjectStore, default_store_path
+from .profiler import ProfilerBusy
+from .prometheus import CONTENT_TYPE as PROMETHEUS_CONTENT_TYPE
+from .project_store import BaseProjectStore
+from .serialization import FastJSONResponse, ProjectJSONCache, dumps
+from .supervisor import SupervisorError
 
 
-APP_TITLE = "OrchestratorX"
-app = FastAPI(title=APP_TITLE, version="0.2.0")
+router = APIRouter()
+
+
+def create_app(config: HubConfig | None = None) -> FastAPI:
+	"""Build a hub app. Services are created on first use, so this does no I/O."""
+	config = config or HubConfig.from_env()
+	app = FastAPI(title=config.title, version="0.2.0", default_response_class=FastJSONResponse)
+	app.state.hub = state = HubState(config)
+	app.add_middleware(
+		CORSMiddleware,
+		allow_origins=config.cors_origins,
+		allow_methods=["*"],
+		allow_headers=["*"],
+	)
+	app.include_router(router)
+	app.add_exception_handler(SupervisorError, _supervisor_error)
+	# Static UI
+	if config.static_dir.is_dir():
+		app.mount("/ui", StaticFiles(directory=str(config.static_dir), html=True), name="ui")
+	app.add_event_handler("startup", state.startup)
+	app.add_event_handler("shutdown", state.shutdown)
+	return app
+
+
+async def _supervisor_error(request: Any, exc: SupervisorError) -> JSONResponse:
+	return JSONResponse({"detail": str(exc)}, status_code=exc.status_code)
+
+
+def _refreshed(proc: ProcessManager, projects: Sequence[Project]) -> List[Project]:
+	"""Live status for a response, worked out on copies; the published snapshot is left as is."""
+	return [proc.status(fork(p)) for p in projects]
 
-app.add_middleware(
-	CORSMiddleware,
-	allow_origins=["*"],
-	allow_methods=["*"],
-	allow_headers=["*"],
-)
 
+T = TypeVar("T")
 
-DATA_DIR = Path("manager/data").resolve()
-RUNTIME_DIR = DATA_DIR / "runtime"
-STORE = ProjectStore(default_store_path())
-PROC = ProcessManager(RUNTIME_DIR)
-HUB = BroadcastHub()
-ORCH = Orchestrator(STORE, PROC, HUB)
 
-# Static UI
-STATIC_DIR = Path(__file__).parent / "static"
-STATIC_DIR.mkdir(parents=True, exist_ok=True)
-app.mount("/ui", StaticFiles(directory=str(STATIC_DIR), html=True), name="ui")
+async def _off_loop(fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+	"""Run a blocking call in the default executor.
 
+	Starting and stopping processes waits on them, store writes hit the
+	disk, and in worker mode every store/process/jobs call is an RPC to the
+	supervisor over one locked connection. None of that may hold up the
+	event loop, which also serves /ws and every other request.
+	"""
+	return await asyncio.get_running_loop().run_in_executor(None, functools.partial(fn, *args, **kwargs))
 
-@app.on_event("startup")
-async def _startup():
-	await ORCH.start()
 
+async def _jobs_call(state: HubState, fn: Callable[..., T], *args: Any) -> T:
+	"""Call a JobManager/Job method: off the loop in worker mode (an RPC), on it otherwise.
 
-@app.on_event("shutdown")
-async def _shutdown():
-	await ORCH.stop()
+	Local jobs live on the event loop (``submit`` creates a task), and their
+	methods never block.
+	"""
+	if state.is_worker:
+		return await _off_loop(fn, *args)
+	return fn(*args)
 
 
-@app.get("/")
+def _commit(store: BaseProjectStore, base: Project, work: Project) -> Project:
+	"""Publish the outcome of a start/stop; it happened, so it wins over a concurrent tick."""
+	return store.publish([(base, work)], force=True).get(base.config.id, work)
+
+
+def __getattr__(name: str) -> Any:
+	# `manager.backend.app:app` keeps working for uvicorn, built only when asked for
+	if name == "app":
+		globals()["app"] = instance = create_app()
+		return instance
+	raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+@router.get("/")
 async def root_redirect():
 	return RedirectResponse(url="/ui/")
 
 
-@app.get("/dashboard")
+@router.get("/dashboard")
 async def dashboard_redirect():
 	return RedirectResponse(url="/ui/dashboard.html")
 
 
-@app.get("/api/system/stats")
-async def get_system_stats():
-	"""Get overall system statistics"""
-	projects = [PROC.status(p) for p in STORE.list_projects()]
+@router.get("/api/system/stats")
+async def get_system_stats(store: BaseProjectStore = Depends(get_store)):
+	"""Get overall system statistics.
+
+	Project figures come from one store snapshot and its indexes, i.e. the
+	orchestrator's last tick: counts are index lookups and only running
+	projects are visited for resource totals.
+	"""
+	snapshot = store.snapshot()
 	
-	total_projects = len(projects)
-	running_projects = len([p for p in projects if p.runtime.status == "running"])
-	stopped_projects = len([p for p in projects if p.runtime.status == "stopped"])
-	unhealthy_projects = len([p for p in projects if p.runtime.health.status == "unhealthy"])
-	total_restarts = sum(p.runtime.restarts_total for p in projects)
+	total_projects = len(snapshot)
+	running_projects = snapshot.count("status", "running")
+	stopped_projects = snapshot.count("status", "stopped")
+	unhealthy_projects = snapshot.count("health", "unhealthy")
+	total_restarts = snapshot.restarts_total
 	
 	# Calculate total system metrics
 	total_cpu = 0.0
 	total_memory = 0.0
 	total_memory_percent = 0.0
 	
-	for p in projects:
-		if p.runtime.status == "running" and p.runtime.metrics:
-			PROC.collect_metrics(p)  # Ensure fresh metrics
-			total_cpu += p.runtime.metrics.cpu_percent or 0
-			total_memory += p.runtime.metrics.memory_rss_mb or 0
-			total_memory_percent += p.runtime.metrics.memory_percent or 0
+	for p in snapshot.query(status="running"):
+		total_cpu += p.runtime.metrics.cpu_percent or 0
+		total_memory += p.runtime.metrics.memory_rss_mb or 0
+		total_memory_percent += p.runtime.metrics.memory_percent or 0
 	
 	# Get system information
 	import psutil
@@ -102,6 +166,8 @@ async def get_system_stats():
 		"stopped_projects": stopped_projects,
 		"unhealthy_projects": unhealthy_projects,
 		"total_restarts": total_restarts,
+		"projects_by_status": snapshot.counts("status"),
+		"port_conflicts": len(snapshot.port_conflicts()),
 		"total_cpu_percent": round(total_cpu, 2),
 		"total_memory_mb": round(total_memory, 2),
 		"total_memory_percent": round(total_memory_percent, 2),
@@ -116,7 +182,55 @@ async def get_system_stats():
 	}
 
 
-@app.post("/api/detect-project-files")
+@router.get("/api/system/orchestrator/timings")
+async def get_orchestrator_timings(orch: Orchestrator = Depends(get_orchestrator)):
+	"""Per-phase tick timings (rolling percentiles) and recent budget overruns."""
+	return await _off_loop(orch.timings)
+
+
+@router.get("/api/system/store")
+async def get_store_stats(store: BaseProjectStore = Depends(get_store)):
+	"""Write-behind persistence counters: pending changes, write latency and batch sizes."""
+	return await _off_loop(store.stats)
+
+
+@router.get("/api/admin/loop-lag")
+async def get_loop_lag(state: HubState = Depends(get_hub_state)):
+	"""Event-loop lag histogram and the stacks captured during recent stalls."""
+	return state.watchdog.snapshot()
+
+
+@router.post("/api/admin/loop-lag/start")
+async def start_loop_watchdog(threshold_ms: float | None = None, state: HubState = Depends(get_hub_state)):
+	if threshold_ms is not None:
+		state.watchdog.threshold_seconds = max(10.0, threshold_ms) / 1000
+	state.watchdog.start()
+	return state.watchdog.snapshot()
+
+
+@router.post("/api/admin/loop-lag/stop")
+async def stop_loop_watchdog(state: HubState = Depends(get_hub_state)):
+	state.watchdog.stop()
+	return state.watchdog.snapshot()
+
+
+@router.get("/api/admin/profile")
+async def profile_hub(seconds: float = 10, interval_ms: float = 10, state: HubState = Depends(get_hub_state)):
+	"""Sample all hub threads for N seconds; returns flamegraph-ready collapsed stacks."""
+	seconds = max(0.1, min(seconds, 60))
+	interval = max(1.0, min(interval_ms, 1000)) / 1000
+	if state.profiler.busy:
+		raise HTTPException(status_code=409, detail="A profile is already running")
+	loop = asyncio.get_running_loop()
+	try:
+		# Sample from a worker thread so the event loop keeps serving (and shows up in the profile)
+		body = await loop.run_in_executor(None, state.profiler.collapsed, seconds, interval)
+	except ProfilerBusy as e:
+		raise HTTPException(status_code=409, detail=str(e))
+	return PlainTextResponse(body)
+
+
+@router.post("/api/detect-project-files")
 async def detect_project_files(body: dict):
 	"""Detect executable files and logs in a project directory"""
 	folder_path = body.get("folder_path")
@@ -166,7 +280,7 @@ async def detect_project_files(body: dict):
 		raise HTTPException(status_code=500, detail=str(e))
 
 
-@app.post("/api/projects/verify-path")
+@router.post("/api/projects/verify-path")
 async def verify_project_path(body: dict):
 	"""Verify that a given working_dir exists on the server."""
 	p = body.get("working_dir")
@@ -179,88 +293,182 @@ async def verify_project_path(body: dict):
 		raise HTTPException(status_code=500, detail=str(e))
 
 
-@app.get("/api/projects", response_model=List[Project])
-async def list_projects() -> List[Project]:
-	projects = [PROC.status(p) for p in STORE.list_projects()]
-	return projects
-
-
-@app.post("/api/projects", response_model=Project)
-async def upsert_project(body: CreateOrUpdateProjectRequest) -> Project:
-	project = STORE.upsert_project(body.config)
-	return PROC.status(project)
-
-
-@app.delete("/api/projects/{project_id}")
-async def delete_project(project_id: str):
-	deleted = STORE.delete_project(project_id)
+@router.get("/api/projects", response_model=List[Project])
+async def list_projects(
+	fields: str | None = None,
+	status: str | None = None,
+	limit: int | None = None,
+	cursor: str | None = None,
+	tag: str | None = None,
+	port: int | None = None,
+	command: str | None = None,
+	store: BaseProjectStore = Depends(get_store),
+	proc: ProcessManager = Depends(get_process_manager),
+	json_cache: ProjectJSONCache = Depends(get_json_cache),
+):
+	"""List projects; supports ?fields=id,status,health, ?status=running, ?tag=, ?port=, ?command= and ?limit=&cursor= paging.
+
+	Filters pick candidates from the store's indexes (status as of the last
+	tick), then re-check them against live status.
+	"""
+	try:
+		query = ListQuery.parse(fields=fields, status=status, limit=limit, cursor=cursor, tag=tag, port=port, command=command)
+	except ValueError as e:
+		raise HTTPException(status_code=400, detail=str(e))
+	projects = _refreshed(proc, query.select(store.snapshot()))
+	page, next_cursor = query.apply(projects)
+	headers = {"X-Next-Cursor": next_cursor} if next_cursor else None
+	return FastJSONResponse(json_cache.encode_projects(page, include=query.include), headers=headers)
+
+
+@router.post("/api/projects", response_model=Project)
+async def upsert_project(
+	body: CreateOrUpdateProjectRequest,
+	response: Response,
+	store: BaseProjectStore = Depends(get_store),
+	proc: ProcessManager = Depends(get_process_manager),
+) -> Project:
+	project = await _off_loop(store.upsert_project, body.config)
+	# Not an error (instances may share a port on purpose), but worth telling the client
+	snapshot = store.snapshot()
+	clashes = sorted({pid for port in body.config.ports for pid in snapshot.ids("port", port)} - {body.config.id})
+	if clashes:
+		response.headers["X-Port-Conflicts"] = ",".join(clashes)
+	return proc.status(fork(project))
+
+
+@router.get("/api/system/port-conflicts")
+async def port_conflicts(store: BaseProjectStore = Depends(get_store)):
+	"""Ports declared by more than one project."""
+	return {str(port): ids for port, ids in store.snapshot().port_conflicts().items()}
+
+
+@router.delete("/api/projects/{project_id}")
+async def delete_project(project_id: str, store: BaseProjectStore = Depends(get_store), json_cache: ProjectJSONCache = Depends(get_json_cache)):
+	deleted = await _off_loop(store.delete_project, project_id)
 	if not deleted:
 		raise HTTPException(status_code=404, detail="Project not found")
-	return JSONResponse({"success": True})
+	json_cache.forget(p.config.id for p in store.list_projects())
+	return FastJSONResponse({"success": True})
 
 
-@app.post("/api/projects/{project_id}/start", response_model=Project)
-async def start_project(project_id: str, body: StartProjectRequest | None = None):
-	project = STORE.get_project(project_id)
+@router.post("/api/projects/{project_id}/start", response_model=Project)
+async def start_project(project_id: str, body: StartProjectRequest | None = None, store: BaseProjectStore = Depends(get_store), proc: ProcessManager = Depends(get_process_manager)):
+	project = store.get_project(project_id)
 	if not project:
 		raise HTTPException(status_code=404, detail="Project not found")
+	work = fork(project)
 	if body and body.instances:
-		project.config.instances = max(1, min(body.instances, 64))
-	result = PROC.start(project, override_args=(body.override_args if body else None), override_env=(body.override_env if body else None))
+		work.config = project.config.model_copy(update={"instances": max(1, min(body.instances, 64))})
+	result = await _off_loop(proc.start, work, override_args=(body.override_args if body else None), override_env=(body.override_env if body else None))
 	if not result.success:
 		raise HTTPException(status_code=400, detail=result.message)
-	return PROC.status(result.project)  # type: ignore[arg-type]
+	return _commit(store, project, proc.status(result.project))  # type: ignore[arg-type]
 
 
-@app.post("/api/projects/{project_id}/stop", response_model=Project)
-async def stop_project(project_id: str):
-	project = STORE.get_project(project_id)
+@router.post("/api/projects/{project_id}/stop", response_model=Project)
+async def stop_project(project_id: str, store: BaseProjectStore = Depends(get_store), proc: ProcessManager = Depends(get_process_manager)):
+	project = store.get_project(project_id)
 	if not project:
 		raise HTTPException(status_code=404, detail="Project not found")
-	result = PROC.stop(project)
+	work = fork(project)
+	result = await _off_loop(proc.stop, work)
 	if not result.success:
 		raise HTTPException(status_code=400, detail=result.message)
-	return PROC.status(result.project)  # type: ignore[arg-type]
+	return _commit(store, project, proc.status(result.project))  # type: ignore[arg-type]
 
 
-@app.post("/api/projects/{project_id}/restart", response_model=Project)
-async def restart_project(project_id: str):
-	project = STORE.get_project(project_id)
+@router.post("/api/projects/{project_id}/restart", response_model=Project)
+async def restart_project(project_id: str, store: BaseProjectStore = Depends(get_store), proc: ProcessManager = Depends(get_process_manager)):
+	project = store.get_project(project_id)
 	if not project:
 		raise HTTPException(status_code=404, detail="Project not found")
-	PROC.stop(project)
-	result = PROC.start(project)
+	work = fork(project)
+	await _off_loop(proc.stop, work)
+	result = await _off_loop(proc.start, work)
 	if not result.success:
+		_commit(store, project, work)
 		raise HTTPException(status_code=400, detail=result.message)
-	return PROC.status(result.project)  # type: ignore[arg-type]
-
-
-@app.post("/api/projects/{project_id}/actions/{action}")
-async def run_action(project_id: str, action: str):
-	project = STORE.get_project(project_id)
+	return _commit(store, project, proc.status(result.project))  # type: ignore[arg-type]
+
+
+@router.post("/api/projects/{project_id}/actions/{action}", response_model=JobInfo, status_code=202)
+async def run_action(
+	project_id: str,
+	action: str,
+	wait: bool = False,
+	store: BaseProjectStore = Depends(get_store),
+	jobs: JobManager = Depends(get_jobs),
+	state: HubState = Depends(get_hub_state),
+):
+	"""Queue a custom action as a background job; poll or stream it via /api/jobs."""
+	project = store.get_project(project_id)
 	if not project:
 		raise HTTPException(status_code=404, detail="Project not found")
 	args = project.config.actions.get(action)
 	if not args:
 		raise HTTPException(status_code=404, detail="Action not found")
-	# Run action once (not managed), return output
-	import subprocess
 	try:
-		proc = subprocess.run([project.config.command] + args, cwd=project.config.working_dir, capture_output=True, text=True, timeout=120)
-		return {"code": proc.returncode, "stdout": proc.stdout, "stderr": proc.stderr}
-	except Exception as e:
-		raise HTTPException(status_code=500, detail=str(e))
+		job = await _jobs_call(state, jobs.submit, project, action, args)
+	except JobQueueFull as e:
+		raise HTTPException(status_code=429, detail=str(e))
+	if wait:
+		# Legacy synchronous shape, without blocking the event loop
+		await job.wait()
+		lines = await _jobs_call(state, job.lines_since, 0)
+		out = [text for _, stream, text in lines if stream == "stdout"]
+		err = [text for _, stream, text in lines if stream == "stderr"]
+		return FastJSONResponse({"code": job.info.return_code, "stdout": "\n".join(out), "stderr": "\n".join(err), "job": job.info})
+	return job.info
+
+
+async def _get_job(job_id: str, jobs: JobManager = Depends(get_jobs), state: HubState = Depends(get_hub_state)) -> Job:
+	job = await _jobs_call(state, jobs.get, job_id)
+	if not job:
+		raise HTTPException(status_code=404, detail="Job not found")
+	return job
+
+
+@router.get("/api/jobs", response_model=List[JobInfo])
+async def list_jobs(project_id: str | None = None, jobs: JobManager = Depends(get_jobs), state: HubState = Depends(get_hub_state)) -> List[JobInfo]:
+	return [j.info for j in await _jobs_call(state, jobs.list, project_id)]
+
+
+@router.get("/api/jobs/{job_id}", response_model=JobInfo)
+async def get_job(job: Job = Depends(_get_job)) -> JobInfo:
+	return job.info
+
+
+@router.get("/api/jobs/{job_id}/output")
+async def stream_job_output(since: int = 0, follow: bool = True, job: Job = Depends(_get_job), state: HubState = Depends(get_hub_state)):
+	"""Job stdout/stderr as NDJSON lines; with follow=true streams until the job ends."""
+	async def stream():
+		if follow:
+			async for seq, name, text in job.follow(since):
+				yield dumps({"seq": seq, "stream": name, "line": text}) + b"\n"
+		else:
+			for seq, name, text in await _jobs_call(state, job.lines_since, since):
+				yield dumps({"seq": seq, "stream": name, "line": text}) + b"\n"
+		yield dumps({"done": job.finished, "job": job.info}) + b"\n"
+
+	return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+
+@router.post("/api/jobs/{job_id}/cancel", response_model=JobInfo)
+async def cancel_job(job: Job = Depends(_get_job), jobs: JobManager = Depends(get_jobs)) -> JobInfo:
+	await jobs.cancel(job)
+	return job.info
 
 
-@app.get("/api/projects/{project_id}", response_model=Project)
-async def get_project(project_id: str) -> Project:
-	project = STORE.get_project(project_id)
+@router.get("/api/projects/{project_id}", response_model=Project)
+async def get_project(project_id: str, store: BaseProjectStore = Depends(get_store), proc: ProcessManager = Depends(get_process_manager)) -> Project:
+	project = store.get_project(project_id)
 	if not project:
 		raise HTTPException(status_code=404, detail="Project not found")
-	return PROC.status(project)
+	return proc.status(fork(project))
 
 
-@app.get("/api/system/metrics")
+@router.get("/api/system/metrics")
 async def get_system_metrics():
 	"""Get detailed system metrics"""
 	import psutil
@@ -317,78 +525,194 @@ async def get_system_metrics():
 	}
 
 
-@app.get("/api/projects/{project_id}/metrics", response_model=Project)
-async def get_metrics(project_id: str) -> Project:
-	project = STORE.get_project(project_id)
+@router.get("/api/projects/{project_id}/metrics", response_model=Project)
+async def get_metrics(project_id: str, store: BaseProjectStore = Depends(get_store), proc: ProcessManager = Depends(get_process_manager)) -> Project:
+	project = store.get_project(project_id)
 	if not project:
 		raise HTTPException(status_code=404, detail="Project not found")
 	
 	# Update status and collect fresh metrics
-	PROC.status(project)
-	if project.runtime.status == "running":
-		PROC.collect_metrics(project)
-	
-	return project
-
-
-@app.get("/api/projects/{project_id}/logs", response_model=TailLogsResponse)
-async def tail_logs(project_id: str, lines: int = 200) -> TailLogsResponse:
-	project = STORE.get_project(project_id)
+	work = proc.status(fork(project))
+	if work.runtime.status == "running":
+		proc.collect_metrics(work)
+	store.publish([(project, work)])
+	return work
+
+
+@router.get("/api/projects/{project_id}/logs", response_model=TailLogsResponse)
+async def tail_logs(
+	project_id: str,
+	lines: int = 200,
+	before: int | None = None,
+	after: int | None = None,
+	store: BaseProjectStore = Depends(get_store),
+) -> TailLogsResponse:
+	"""The last ``lines`` lines of the log, or a page of them by byte offset.
+
+	``before=<start>`` pages back from an earlier response and
+	``after=<end>`` returns what was appended since; ``truncated`` says more
+	lines exist in that direction.
+	"""
+	project = store.get_project(project_id)
 	if not project:
 		raise HTTPException(status_code=404, detail="Project not found")
+	if before is not None and after is not None:
+		raise HTTPException(status_code=400, detail="Pass either before or after, not both")
+	lines = max(1, min(lines, 5000))
+	if before is not None:
+		before = max(before, 0)
+	if after is not None:
+		after = max(after, 0)
 	log_path = project.config.log_path
 	if not log_path:
 		return TailLogsResponse(lines=["No log_path configured for this project"], truncated=False)
 	p = Path(log_path)
 	if not p.exists():
 		return TailLogsResponse(lines=["Log file not found"], truncated=False)
-	# Simple and robust tail
-	max_read_bytes = 256 * 1024
 	try:
-		file_size = p.stat().st_size
-		start_pos = max(0, file_size - max_read_bytes)
-		with p.open("rb") as f:
-			f.seek(start_pos)
-			data = f.read()
-			text = data.decode("utf-8", errors="replace")
-			rows = text.splitlines()[-lines:]
-			return TailLogsResponse(lines=rows, truncated=len(text.splitlines()) > len(rows))
-	except Exception:
+		if after is not None:
+			page = await asyncio.get_running_loop().run_in_executor(None, read_after, p, after, lines)
+		else:
+			page = await asyncio.get_running_loop().run_in_executor(None, read_before, p, before, lines)
+	except OSError:
 		return TailLogsResponse(lines=["Failed to read log"], truncated=False)
-
-
-@app.websocket("/ws")
-async def ws_handler(ws: WebSocket):
+	return TailLogsResponse(lines=page.lines, truncated=page.more, start=page.start, end=page.end)
+
+
+@router.get("/api/projects/{project_id}/logs/search")
+async def search_logs(
+	project_id: str,
+	pattern: str,
+	since: int = 0,
+	limit: int = 100,
+	ignore_case: bool = False,
+	budget_ms: int = 2000,
+	store: BaseProjectStore = Depends(get_store),
+):
+	"""Regex search over the project's log file, streamed back as NDJSON matches."""
+	project = store.get_project(project_id)
+	if not project:
+		raise HTTPException(status_code=404, detail="Project not found")
+	if not project.config.log_path:
+		raise HTTPException(status_code=404, detail="No log_path configured for this project")
+	p = Path(project.config.log_path)
+	if not p.exists():
+		raise HTTPException(status_code=404, detail="Log file not found")
+	try:
+		regex = compile_pattern(pattern, ignore_case=ignore_case)
+	except re.error as e:
+		raise HTTPException(status_code=400, detail=f"Invalid pattern: {e}")
+	limit = max(1, min(limit, 10000))
+	budget = max(10, min(budget_ms, 10000)) / 1000
+
+	def stream():
+		for record in search_log(p, regex, since=since, limit=limit, time_budget_seconds=budget):
+			yield dumps(record) + b"\n"
+
+	# Sync generator: Starlette iterates it in a worker thread, off the event loop
+	return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+
+@router.websocket("/ws")
+async def ws_handler(
+	ws: WebSocket,
+	fields: str | None = None,
+	status: str | None = None,
+	limit: int | None = None,
+	cursor: str | None = None,
+	tag: str | None = None,
+	port: int | None = None,
+	command: str | None = None,
+	store: BaseProjectStore = Depends(get_store),
+	proc: ProcessManager = Depends(get_process_manager),
+	hub: BroadcastHub = Depends(get_broadcast_hub),
+	json_cache: ProjectJSONCache = Depends(get_json_cache),
+):
+	"""Live project snapshots. The subscription accepts the same fields/status/tag/port/command/limit/cursor
+	options as GET /api/projects, as query parameters or later as a JSON text message."""
 	await ws.accept()
+	try:
+		query = ListQuery.parse(fields=fields, status=status, limit=limit, cursor=cursor, tag=tag, port=port, command=command)
+	except ValueError as e:
+		await ws.send_text(dumps({"error": str(e)}).decode("utf-8"))
+		await ws.close(code=1008)
+		return
 
 	async def push(projects: list[Project]):
 		try:
-			payload = json.dumps([p.model_dump() for p in projects], default=str)
-			await ws.send_text(payload)
+			page, _ = query.apply(projects)
+			if query.include is None and len(page) == len(projects):
+				page = projects  # unfiltered: share the broadcast's memoized payload
+			payload = json_cache.encode_projects(page, include=query.include)
+			await ws.send_text(payload.decode("utf-8"))
 		except RuntimeError:
 			pass
 
-	HUB.subscribe(push)
+	hub.subscribe(push)
 	try:
 		# send initial snapshot
-		projects = [PROC.status(p) for p in STORE.list_projects()]
-		await push(projects)
+		await push(_refreshed(proc, query.select(store.snapshot())))
 		while True:
-			await ws.receive_text()
+			message = await ws.receive_text()
+			try:
+				opts = json.loads(message)
+				if not isinstance(opts, dict):
+					raise ValueError("Subscription message must be a JSON object")
+				query = ListQuery.parse(
+					fields=opts.get("fields"),
+					status=opts.get("status"),
+					limit=opts.get("limit"),
+					cursor=opts.get("cursor"),
+					tag=opts.get("tag"),
+					port=opts.get("port"),
+					command=opts.get("command"),
+				)
+			except ValueError as e:
+				await ws.send_text(dumps({"error": str(e)}).decode("utf-8"))
+				continue
+			await push(_refreshed(proc, query.select(store.snapshot())))
 	except WebSocketDisconnect:
 		pass
 	finally:
-		HUB.unsubscribe(push)
+		hub.unsubscribe(push)
+
+
+@router.get("/metrics", include_in_schema=False)
+async def prometheus_metrics(state: HubState = Depends(get_hub_state)):
+	"""Prometheus text exposition built from the orchestrator's cached state (no psutil calls)."""
+	if state.is_worker:
+		# One exposition for the whole hub, however many workers Prometheus hits
+		body = await _off_loop(state.client.call, "metrics")
+		return PlainTextResponse(body, media_type=PROMETHEUS_CONTENT_TYPE)
+	body = state.exporter.render(state.store.list_projects(), state.orchestrator, state.watchdog, state.store)
+	return PlainTextResponse(body, media_type=PROMETHEUS_CONTENT_TYPE)
 
 
-@app.get("/healthz")
-async def healthz():
-	return {"ok": True, "app": APP_TITLE}
+@router.get("/healthz")
+async def healthz(state: HubState = Depends(get_hub_state)):
+	return {"ok": True, "app": state.config.title}
 
 
-def run():
+def run(workers: int | None = None):
+	"""Serve the API. With several workers a supervisor process owns orchestration and state."""
 	import uvicorn
-	uvicorn.run("manager.backend.app:app", host="0.0.0.0", port=8077, reload=False)
+	workers = workers or int(os.environ.get("NEXTGEN_WORKERS", "1"))
+	if workers <= 1:
+		uvicorn.run("manager.backend.app:create_app", factory=True, host="0.0.0.0", port=8077, reload=False)
+		return
+	from .supervisor import default_address, spawn
+	address = os.environ.get("NEXTGEN_SUPERVISOR_ADDR") or default_address(HubConfig.from_env())
+	supervisor = spawn(address)
+	# Inherited by the uvicorn workers, which then build worker-mode HubStates
+	os.environ["NEXTGEN_SUPERVISOR_ADDR"] = address
+	try:
+		uvicorn.run("manager.backend.app:create_app", factory=True, host="0.0.0.0", port=8077, workers=workers)
+	finally:
+		supervisor.terminate()
+		try:
+			supervisor.wait(timeout=15)
+		except subprocess.TimeoutExpired:
+			supervisor.kill()
 
 
 if __name__ == "__main__":
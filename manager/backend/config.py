@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+import os
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import List, Optional
+
+
+def _env_flag(name: str) -> bool:
+	return os.environ.get(name, "").lower() in ("1", "true", "yes")
+
+
+@dataclass
+class HubConfig:
+	"""Settings for one hub instance; every path is resolved lazily by HubState."""
+
+	data_dir: Path = field(default_factory=lambda: Path("manager/data").resolve())
+	store_path: Optional[Path] = None
+	# "yaml" or "sqlite"; inferred from store_path's suffix when unset
+	store_backend: Optional[str] = None
+	runtime_dir: Optional[Path] = None
+	static_dir: Path = field(default_factory=lambda: Path(__file__).parent / "static")
+	title: str = "OrchestratorX"
+	cors_origins: List[str] = field(default_factory=lambda: ["*"])
+	tick_budget_seconds: float = 1.0
+	loop_watchdog: bool = False
+	loop_watchdog_threshold_ms: float = 250.0
+	# Command healthcheck probes allowed to run at once across all projects
+	health_probe_limit: int = 4
+	# Pick up edits of projects.yaml made outside the hub without a restart
+	watch_store: bool = True
+	# Set in API workers: state lives in the supervisor listening here
+	supervisor_address: Optional[str] = None
+
+	def __post_init__(self) -> None:
+		if self.store_path is None:
+			self.store_path = self.data_dir / ("projects.db" if self.store_backend == "sqlite" else "projects.yaml")
+		if self.runtime_dir is None:
+			self.runtime_dir = self.data_dir / "runtime"
+
+	@classmethod
+	def from_env(cls) -> "HubConfig":
+		"""Defaults overridden by NEXTGEN_* environment variables."""
+		kwargs: dict = {}
+		if os.environ.get("NEXTGEN_DATA_DIR"):
+			kwargs["data_dir"] = Path(os.environ["NEXTGEN_DATA_DIR"]).resolve()
+		if os.environ.get("NEXTGEN_STORE_PATH"):
+			kwargs["store_path"] = Path(os.environ["NEXTGEN_STORE_PATH"]).resolve()
+		if os.environ.get("NEXTGEN_STORE_BACKEND"):
+			kwargs["store_backend"] = os.environ["NEXTGEN_STORE_BACKEND"].lower()
+		if os.environ.get("NEXTGEN_TICK_BUDGET_MS"):
+			kwargs["tick_budget_seconds"] = float(os.environ["NEXTGEN_TICK_BUDGET_MS"]) / 1000
+		kwargs["loop_watchdog"] = _env_flag("NEXTGEN_LOOP_WATCHDOG")
+		if os.environ.get("NEXTGEN_LOOP_WATCHDOG_MS"):
+			kwargs["loop_watchdog_threshold_ms"] = float(os.environ["NEXTGEN_LOOP_WATCHDOG_MS"])
+		if os.environ.get("NEXTGEN_HEALTH_PROBES"):
+			kwargs["health_probe_limit"] = int(os.environ["NEXTGEN_HEALTH_PROBES"])
+		if os.environ.get("NEXTGEN_WATCH_STORE"):
+			kwargs["watch_store"] = _env_flag("NEXTGEN_WATCH_STORE")
+		if os.environ.get("NEXTGEN_SUPERVISOR_ADDR"):
+			kwargs["supervisor_address"] = os.environ["NEXTGEN_SUPERVISOR_ADDR"]
+		return cls(**kwargs)
@@ -0,0 +1,169 @@
+from __future__ import annotations
+
+from functools import cached_property
+from typing import TYPE_CHECKING
+
+from fastapi import Depends
+from starlette.requests import HTTPConnection
+
+from .config import HubConfig
+
+if TYPE_CHECKING:
+	from .jobs import JobManager
+	from .orchestrator import BroadcastHub, Orchestrator
+	from .process_manager import ProcessManager
+	from .profiler import SamplingProfiler
+	from .project_store import BaseProjectStore
+	from .prometheus import MetricsExporter
+	from .remote import SupervisorClient
+	from .runtime_journal import RuntimeJournal
+	from .serialization import ProjectJSONCache
+	from .watchdog import LoopLagWatchdog
+
+
+class HubState:
+	"""Per-app container for the hub's services, each built on first use.
+
+	Nothing touches the filesystem or parses ``projects.yaml`` until a
+	request (or startup) asks for it, so creating an app is cheap and
+	several isolated hubs can live in one process.
+
+	With ``config.supervisor_address`` set this is an API worker: store,
+	process manager, orchestrator and jobs are proxies for the supervisor
+	that owns them (see ``supervisor.py``).
+	"""
+
+	def __init__(self, config: HubConfig) -> None:
+		self.config = config
+
+	@property
+	def is_worker(self) -> bool:
+		return self.config.supervisor_address is not None
+
+	@cached_property
+	def client(self) -> "SupervisorClient":
+		from .remote import SupervisorClient
+		assert self.config.supervisor_address is not None
+		return SupervisorClient(self.config.supervisor_address)
+
+	@cached_property
+	def store(self) -> "BaseProjectStore":
+		if self.is_worker:
+			from .remote import RemoteStore
+			return RemoteStore(self.client, self.orchestrator)  # type: ignore[return-value]
+		from .project_store import open_store
+		assert self.config.store_path is not None
+		return open_store(self.config.store_path, self.config.store_backend)
+
+	@cached_property
+	def proc(self) -> "ProcessManager":
+		if self.is_worker:
+			from .remote import RemoteProcessManager
+			return RemoteProcessManager(self.client, self.orchestrator)  # type: ignore[return-value]
+		from .process_manager import ProcessManager
+		assert self.config.runtime_dir is not None
+		return ProcessManager(self.config.runtime_dir)
+
+	@cached_property
+	def hub(self) -> "BroadcastHub":
+		from .orchestrator import BroadcastHub
+		return BroadcastHub()
+
+	@cached_property
+	def orchestrator(self) -> "Orchestrator":
+		if self.is_worker:
+			from .remote import RemoteOrchestrator
+			return RemoteOrchestrator(self.client, self.hub)  # type: ignore[return-value]
+		from .health import ProbePool
+		from .orchestrator import Orchestrator
+		return Orchestrator(
+			self.store,
+			self.proc,
+			self.hub,
+			tick_budget_seconds=self.config.tick_budget_seconds,
+			watch_store=self.config.watch_store,
+			journal=self.journal,
+			probes=ProbePool(self.config.health_probe_limit),
+		)
+
+	@cached_property
+	def journal(self) -> "RuntimeJournal":
+		from .runtime_journal import RuntimeJournal
+		assert self.config.runtime_dir is not None
+		return RuntimeJournal(self.config.runtime_dir / "runtime.journal")
+
+	@cached_property
+	def jobs(self) -> "JobManager":
+		if self.is_worker:
+			from .remote import RemoteJobManager
+			return RemoteJobManager(self.client)  # type: ignore[return-value]
+		from .jobs import JobManager
+		return JobManager()
+
+	@cached_property
+	def json_cache(self) -> "ProjectJSONCache":
+		from .serialization import ProjectJSONCache
+		return ProjectJSONCache()
+
+	@cached_property
+	def exporter(self) -> "MetricsExporter":
+		from .prometheus import MetricsExporter
+		return MetricsExporter()
+
+	@cached_property
+	def profiler(self) -> "SamplingProfiler":
+		from .profiler import SamplingProfiler
+		return SamplingProfiler()
+
+	@cached_property
+	def watchdog(self) -> "LoopLagWatchdog":
+		from .watchdog import LoopLagWatchdog
+		return LoopLagWatchdog(threshold_seconds=self.config.loop_watchdog_threshold_ms / 1000)
+
+	def _built(self, name: str) -> bool:
+		return name in self.__dict__
+
+	async def startup(self) -> None:
+		if self.config.loop_watchdog:
+			self.watchdog.start()
+		await self.orchestrator.start()
+
+	async def shutdown(self) -> None:
+		if self._built("jobs"):
+			await self.jobs.shutdown()
+		if self._built("orchestrator"):
+			await self.orchestrator.stop()
+		if self._built("watchdog"):
+			self.watchdog.stop()
+		if self._built("store") and not self.is_worker:
+			self.store.close()
+		if self._built("journal"):
+			self.journal.close()
+
+
+def get_hub_state(conn: HTTPConnection) -> HubState:
+	return conn.app.state.hub
+
+
+def get_store(state: HubState = Depends(get_hub_state)) -> "BaseProjectStore":
+	return state.store
+
+
+def get_process_manager(state: HubState = Depends(get_hub_state)) -> "ProcessManager":
+	return state.proc
+
+
+def get_orchestrator(state: HubState = Depends(get_hub_state)) -> "Orchestrator":
+	return state.orchestrator
+
+
+def get_broadcast_hub(state: HubState = Depends(get_hub_state)) -> "BroadcastHub":
+	return state.hub
+
+
+def get_jobs(state: HubState = Depends(get_hub_state)) -> "JobManager":
+	return state.jobs
+
+
+def get_json_cache(state: HubState = Depends(get_hub_state)) -> "ProjectJSONCache":
+	return state.json_cache
@@ -0,0 +1,184 @@
+from __future__ import annotations
+
+import ctypes
+import ctypes.util
+import errno
+import logging
+import os
+import select
+import struct
+import sys
+import threading
+from pathlib import Path
+from typing import Callable, Optional, Tuple
+
+
+logger = logging.getLogger(__name__)
+
+# <sys/inotify.h>
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+_EVENT = struct.Struct("iIII")
+
+FileKey = Tuple[int, int, int]
+
+
+def _load_libc() -> Optional[ctypes.CDLL]:
+	if not sys.platform.startswith("linux"):
+		return None
+	try:
+		libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+		libc.inotify_init1  # noqa: B018 - probe for the symbol
+		libc.inotify_add_watch
+	except (OSError, AttributeError):
+		return None
+	return libc
+
+
+def _file_key(path: Path) -> Optional[FileKey]:
+	try:
+		st = path.stat()
+	except OSError:
+		return None
+	return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+
+class FileWatcher:
+	"""Calls ``on_change`` from a daemon thread whenever ``path`` is rewritten.
+
+	On Linux the parent directory is watched with inotify, so both in-place
+	writes and the write-to-temp-and-rename that editors (and our own store)
+	use are seen; bursts of events are collapsed into one call after
+	``debounce_seconds`` of quiet. Elsewhere, or when inotify is unavailable
+	(no watches left, exotic filesystems), the file's mtime, size and inode
+	are polled every ``poll_interval_seconds``.
+	"""
+
+	def __init__(
+		self,
+		path: Path,
+		on_change: Callable[[], None],
+		poll_interval_seconds: float = 1.0,
+		debounce_seconds: float = 0.1,
+		use_inotify: bool = True,
+	) -> None:
+		self.path = path
+		self.on_change = on_change
+		self.poll_interval_seconds = poll_interval_seconds
+		self.debounce_seconds = debounce_seconds
+		self.backend = "poll"
+		self._use_inotify = use_inotify
+		self._stopped = threading.Event()
+		self._thread: Optional[threading.Thread] = None
+		self._inotify_fd: Optional[int] = None
+		self._wake_r: Optional[int] = None
+		self._wake_w: Optional[int] = None
+		self._last_key: Optional[FileKey] = None
+
+	@property
+	def running(self) -> bool:
+		return self._thread is not None and self._thread.is_alive()
+
+	def start(self) -> None:
+		if self.running:
+			return
+		self._stopped.clear()
+		self._last_key = _file_key(self.path)
+		target = self._poll
+		if self._use_inotify and self._open_inotify():
+			self.backend = "inotify"
+			target = self._follow_inotify
+		self._thread = threading.Thread(target=target, name=f"watch-{self.path.name}", daemon=True)
+		self._thread.start()
+
+	def stop(self) -> None:
+		self._stopped.set()
+		if self._wake_w is not None:
+			try:
+				os.write(self._wake_w, b"x")
+			except OSError:
+				pass
+		if self._thread is not None:
+			self._thread.join(timeout=2)
+			self._thread = None
+		for fd in (self._inotify_fd, self._wake_r, self._wake_w):
+			if fd is not None:
+				try:
+					os.close(fd)
+				except OSError:
+					pass
+		self._inotify_fd = self._wake_r = self._wake_w = None
+
+	def _notify(self) -> None:
+		try:
+			self.on_change()
+		except Exception:
+			logger.exception("File change handler for %s failed", self.path)
+
+	def _open_inotify(self) -> bool:
+		libc = _load_libc()
+		if libc is None:
+			return False
+		fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+		if fd < 0:
+			logger.info("inotify unavailable (%s); polling %s", os.strerror(ctypes.get_errno()), self.path)
+			return False
+		mask = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE | IN_DELETE
+		if libc.inotify_add_watch(fd, os.fsencode(str(self.path.parent)), mask) < 0:
+			logger.info("Cannot watch %s (%s); polling instead", self.path.parent, os.strerror(ctypes.get_errno()))
+			os.close(fd)
+			return False
+		self._inotify_fd = fd
+		self._wake_r, self._wake_w = os.pipe()
+		return True
+
+	def _read_events(self) -> bool:
+		"""Drain the inotify queue; True if any event concerned our file."""
+		assert self._inotify_fd is not None
+		name = os.fsencode(self.path.name)
+		hit = False
+		while True:
+			try:
+				buf = os.read(self._inotify_fd, 64 * 1024)
+			except OSError as e:
+				if e.errno in (errno.EAGAIN, errno.EWOULDBLOCK):
+					return hit
+				raise
+			offset = 0
+			while offset < len(buf):
+				_, mask, _, length = _EVENT.unpack_from(buf, offset)
+				offset += _EVENT.size
+				if mask & IN_Q_OVERFLOW or buf[offset:offset + length].rstrip(b"\0") == name:
+					hit = True
+				offset += length
+
+	def _follow_inotify(self) -> None:
+		fds = [self._inotify_fd, self._wake_r]
+		try:
+			while not self._stopped.is_set():
+				select.select(fds, [], [])
+				if self._stopped.is_set() or not self._read_events():
+					continue
+				# Let the writer finish: wait until the directory has been quiet for a moment
+				while not self._stopped.is_set() and select.select(fds, [], [], self.debounce_seconds)[0]:
+					self._read_events()
+				if not self._stopped.is_set():
+					self._notify()
+		except (OSError, ValueError):
+			if not self._stopped.is_set():
+				logger.exception("inotify watch on %s failed; falling back to polling", self.path)
+				self.backend = "poll"
+				self._poll()
+
+	def _poll(self) -> None:
+		while not self._stopped.wait(self.poll_interval_seconds):
+			key = _file_key(self.path)
+			if key != self._last_key:
+				self._last_key = key
+				self._notify()
@@ -1,40 +1,205 @@
 from __future__ import annotations
 
+import asyncio
+import os
 import socket
 import time
-from typing import Optional
+from typing import Dict, List, NamedTuple, Optional, Set
 
-import httpx
+from .models import HealthReport, Project, ProjectConfig, fill_instance_template, instance_port
+from .process_manager import kill_process_group, process_group_kwargs
 
-from .models import HealthReport, Project
 
+class ProbePoolBusy(Exception):
+	"""Raised when a command probe cannot be started; says nothing about the project's health."""
 
-async def check_health(project: Project) -> HealthReport:
+
+class ProbeResult(NamedTuple):
+	returncode: Optional[int]
+	output: str
+	timed_out: bool = False
+
+
+class ProbePool:
+	"""Runs command health probes as subprocesses, at most ``max_concurrent`` at once.
+
+	Every probe gets its own process group; one that outlives its timeout
+	(or whose check is cancelled) has the whole group killed and reaped
+	before its slot is given back, and a project never has two probes in
+	flight, so a hanging check cannot pile up processes. Waiting for a slot
+	counts against the probe's timeout. Output (stdout and stderr
+	interleaved) is kept up to its last ``max_output_bytes``.
+	"""
+
+	def __init__(self, max_concurrent: int = 4, max_output_bytes: int = 1024) -> None:
+		self.max_concurrent = max_concurrent
+		self.max_output_bytes = max_output_bytes
+		self._slots: Optional[asyncio.Semaphore] = None
+		self._inflight: Set[str] = set()
+		self.timeouts_total = 0
+
+	@property
+	def running(self) -> int:
+		return len(self._inflight)
+
+	async def run(self, key: str, argv: List[str], cwd: str, env: Dict[str, str], timeout: float) -> ProbeResult:
+		if key in self._inflight:
+			raise ProbePoolBusy("Previous probe still running")
+		if self._slots is None:
+			# Created lazily so it binds to the running event loop
+			self._slots = asyncio.Semaphore(self.max_concurrent)
+		self._inflight.add(key)
+		try:
+			deadline = time.monotonic() + timeout
+			try:
+				await asyncio.wait_for(self._slots.acquire(), timeout)
+			except asyncio.TimeoutError:
+				raise ProbePoolBusy(f"No probe slot free within {timeout:g}s") from None
+			try:
+				return await self._execute(argv, cwd, env, max(deadline - time.monotonic(), 0.001))
+			finally:
+				self._slots.release()
+		finally:
+			self._inflight.discard(key)
+
+	async def _execute(self, argv: List[str], cwd: str, env: Dict[str, str], timeout: float) -> ProbeResult:
+		proc = await asyncio.create_subprocess_exec(
+			*argv,
+			cwd=cwd,
+			env=env,
+			stdin=asyncio.subprocess.DEVNULL,
+			stdout=asyncio.subprocess.PIPE,
+			stderr=asyncio.subprocess.STDOUT,
+			**process_group_kwargs(),
+		)
+		tail = bytearray()
+
+		async def read() -> None:
+			assert proc.stdout is not None
+			while True:
+				chunk = await proc.stdout.read(64 * 1024)
+				if not chunk:
+					return
+				tail.extend(chunk)
+				del tail[:-self.max_output_bytes]
+
+		timed_out = False
+		try:
+			await asyncio.wait_for(asyncio.gather(read(), proc.wait()), timeout)
+		except asyncio.TimeoutError:
+			timed_out = True
+			self.timeouts_total += 1
+			await kill_process_group(proc)
+		except asyncio.CancelledError:
+			await kill_process_group(proc)
+			raise
+		return ProbeResult(proc.returncode, tail.decode("utf-8", errors="replace").strip(), timed_out)
+
+
+def _templated(text: Optional[str]) -> bool:
+	return text is not None and ("{port}" in text or "{instance}" in text)
+
+
+def per_instance(config: ProjectConfig) -> bool:
+	"""Whether the healthcheck can address instances one by one.
+
+	That is the case for a URL or command using ``{port}``/``{instance}``,
+	a tcp check without a fixed ``tcp_port`` and a port per instance in
+	``ports``, and the process check of a multi-instance project (each
+	instance must be alive). Other checks see the project as a whole.
+	"""
+	cfg = config.healthcheck
+	if cfg.type == "http":
+		return _templated(cfg.url)
+	if cfg.type == "command":
+		return any(_templated(arg) for arg in cfg.command)
+	if cfg.type == "tcp":
+		return cfg.tcp_port is None and len(config.ports) >= config.instances
+	if cfg.type == "process":
+		return config.instances > 1
+	return False
+
+
+def aggregate_health(reports: Dict[int, HealthReport]) -> HealthReport:
+	"""Project-level summary of per-instance reports: unhealthy if any instance is."""
+	unhealthy = [idx for idx, r in sorted(reports.items()) if r.status == "unhealthy"]
+	if unhealthy:
+		status = "unhealthy"
+	elif reports and all(r.status == "healthy" for r in reports.values()):
+		status = "healthy"
+	else:
+		status = "unknown"
+	message = None
+	if unhealthy:
+		details = "; ".join(f"#{idx}: {reports[idx].message}" if reports[idx].message else f"#{idx}" for idx in unhealthy)
+		message = f"{len(unhealthy)}/{len(reports)} instances unhealthy: {details}"
+	latencies = [r.latency_ms for r in reports.values() if r.latency_ms is not None]
+	checked = [r.last_checked_at for r in reports.values() if r.last_checked_at is not None]
+	return HealthReport(
+		status=status,
+		message=message,
+		latency_ms=max(latencies) if latencies else None,
+		last_checked_at=max(checked) if checked else None,
+	)
+
+
+async def check_health(project: Project, probes: Optional[ProbePool] = None, instance: Optional[int] = None) -> HealthReport:
+	"""Check the project, or only its instance ``instance`` (templates filled in for it)."""
 	cfg = project.config.healthcheck
 	report = HealthReport()
 	start = time.perf_counter()
+
+	def fill(text: str) -> str:
+		if instance is None:
+			return text
+		return fill_instance_template(text, instance, instance_port(project.config, instance))
+
 	try:
 		if cfg.type == "none":
 			report.status = "unknown"
 		elif cfg.type == "process":
-			report.status = "healthy" if project.runtime.status == "running" else "unhealthy"
+			if instance is None:
+				alive = project.runtime.status == "running"
+			else:
+				alive = any(inst.index == instance and inst.pid is not None for inst in project.runtime.instances)
+			report.status = "healthy" if alive else "unhealthy"
 		elif cfg.type == "http":
 			if not cfg.url:
 				raise ValueError("health.url is required for http healthcheck")
+			import httpx  # deferred: only http checks pay for it
 			async with httpx.AsyncClient(timeout=cfg.timeout_seconds) as client:
-				resp = await client.get(cfg.url)
+				resp = await client.get(fill(cfg.url))
 				report.http_status = resp.status_code
 				report.status = "healthy" if 200 <= resp.status_code < 400 else "unhealthy"
 		elif cfg.type == "tcp":
-			if not cfg.tcp_host or not cfg.tcp_port:
+			port = cfg.tcp_port if cfg.tcp_port or instance is None else instance_port(project.config, instance)
+			if not cfg.tcp_host or not port:
 				raise ValueError("tcp_host and tcp_port are required for tcp healthcheck")
 			s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
 			s.settimeout(cfg.timeout_seconds)
 			try:
-				s.connect((cfg.tcp_host, int(cfg.tcp_port)))
+				s.connect((cfg.tcp_host, int(port)))
 				report.status = "healthy"
 			finally:
 				s.close()
+		elif cfg.type == "command":
+			if not cfg.command:
+				raise ValueError("healthcheck.command is required for command healthcheck")
+			if probes is None:
+				raise ValueError("command healthchecks need a probe pool")
+			env = {**os.environ, **project.config.env}
+			key = project.config.id if instance is None else f"{project.config.id}#{instance}"
+			argv = [fill(arg) for arg in cfg.command]
+			result = await probes.run(key, argv, project.config.working_dir, env, cfg.timeout_seconds)
+			if result.timed_out:
+				report.status = "unhealthy"
+				report.message = f"Timed out after {cfg.timeout_seconds}s" + (f": {result.output}" if result.output else "")
+			else:
+				report.status = "healthy" if result.returncode == 0 else "unhealthy"
+				report.message = result.output or (None if result.returncode == 0 else f"Exited with code {result.returncode}")
+	except ProbePoolBusy as e:
+		report.status = "unknown"
+		report.message = str(e)
 	except Exception as e:
 		report.status = "unhealthy"
 		report.message = str(e)
@@ -0,0 +1,145 @@
+from __future__ import annotations
+
+import logging
+import time
+from collections import deque
+from datetime import datetime
+from typing import Deque, Dict, Iterable, Optional, Tuple
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_QUANTILES = (0.5, 0.9, 0.99)
+
+
+class RollingHistogram:
+	"""Latency samples over a sliding window, with lifetime count/sum.
+
+	Percentiles are computed on demand from the last ``window`` samples, so
+	``observe`` stays O(1) on the hot path.
+	"""
+
+	def __init__(self, window: int = 1000) -> None:
+		self._samples: Deque[float] = deque(maxlen=window)
+		self.count = 0
+		self.sum = 0.0
+		self.max = 0.0
+
+	def observe(self, value: float) -> None:
+		self._samples.append(value)
+		self.count += 1
+		self.sum += value
+		if value > self.max:
+			self.max = value
+
+	def quantiles(self, qs: Iterable[float] = DEFAULT_QUANTILES) -> Dict[float, float]:
+		ordered = sorted(self._samples)
+		if not ordered:
+			return {q: 0.0 for q in qs}
+		last = len(ordered) - 1
+		return {q: ordered[min(last, int(round(q * last)))] for q in qs}
+
+	def snapshot(self) -> Dict[str, float]:
+		"""Summary in milliseconds, for the JSON API."""
+		qs = self.quantiles()
+		window = list(self._samples)
+		return {
+			"count": self.count,
+			"window": len(window),
+			"mean_ms": round(sum(window) / len(window) * 1000, 3) if window else 0.0,
+			"p50_ms": round(qs[0.5] * 1000, 3),
+			"p90_ms": round(qs[0.9] * 1000, 3),
+			"p99_ms": round(qs[0.99] * 1000, 3),
+			"max_ms": round(self.max * 1000, 3),
+		}
+
+
+class TickProfiler:
+	"""Times each phase of the orchestrator tick and attributes cost to projects.
+
+	Usage per tick: ``begin_tick()``, then ``begin_phase(name)`` /
+	``end_phase()`` around each phase with ``record_project(id, seconds)``
+	for per-project work inside it, then ``end_tick()``. A tick longer than
+	``budget_seconds`` is recorded as an overrun naming the slowest project.
+	"""
+
+	PHASES = ("status", "metrics", "health", "broadcast")
+
+	def __init__(self, budget_seconds: float = 1.0, window: int = 500, max_overruns: int = 50) -> None:
+		self.budget_seconds = budget_seconds
+		self._window = window
+		self.tick = RollingHistogram(window)
+		self.phases: Dict[str, RollingHistogram] = {name: RollingHistogram(window) for name in self.PHASES}
+		self.overruns: Deque[dict] = deque(maxlen=max_overruns)
+		self.overruns_total = 0
+		self._tick_started = 0.0
+		self._phase: Optional[str] = None
+		self._phase_started = 0.0
+		self._tick_phases: Dict[str, float] = {}
+		# phase -> (project id, seconds) of the slowest project in the current tick
+		self._slowest: Dict[str, Tuple[str, float]] = {}
+
+	def begin_tick(self) -> None:
+		self._tick_started = time.perf_counter()
+		self._tick_phases = {}
+		self._slowest = {}
+
+	def begin_phase(self, name: str) -> None:
+		self._phase = name
+		self._phase_started = time.perf_counter()
+
+	def end_phase(self) -> None:
+		if self._phase is None:
+			return
+		elapsed = time.perf_counter() - self._phase_started
+		hist = self.phases.get(self._phase)
+		if hist is None:
+			hist = self.phases[self._phase] = RollingHistogram(self._window)
+		hist.observe(elapsed)
+		self._tick_phases[self._phase] = elapsed
+		self._phase = None
+
+	def record_project(self, project_id: str, seconds: float) -> None:
+		phase = self._phase or "tick"
+		current = self._slowest.get(phase)
+		if current is None or seconds > current[1]:
+			self._slowest[phase] = (project_id, seconds)
+
+	def end_tick(self) -> float:
+		self.end_phase()
+		elapsed = time.perf_counter() - self._tick_started
+		self.tick.observe(elapsed)
+		if elapsed > self.budget_seconds:
+			self._record_overrun(elapsed)
+		return elapsed
+
+	def _record_overrun(self, elapsed: float) -> None:
+		self.overruns_total += 1
+		culprit: Optional[Tuple[str, str, float]] = None
+		for phase, (project_id, seconds) in self._slowest.items():
+			if culprit is None or seconds > culprit[2]:
+				culprit = (phase, project_id, seconds)
+		event = {
+			"at": datetime.utcnow().isoformat(),
+			"duration_ms": round(elapsed * 1000, 2),
+			"budget_ms": round(self.budget_seconds * 1000, 2),
+			"phases_ms": {k: round(v * 1000, 2) for k, v in self._tick_phases.items()},
+			"project_id": culprit[1] if culprit else None,
+			"phase": culprit[0] if culprit else None,
+			"project_ms": round(culprit[2] * 1000, 2) if culprit else None,
+		}
+		self.overruns.append(event)
+		logger.warning(
+			"Orchestrator tick took %.0f ms (budget %.0f ms); slowest: %s in %s (%.0f ms)",
+			elapsed * 1000, self.budget_seconds * 1000,
+			event["project_id"], event["phase"], event["project_ms"] or 0.0,
+		)
+
+	def snapshot(self) -> dict:
+		return {
+			"budget_ms": round(self.budget_seconds * 1000, 2),
+			"tick": self.tick.snapshot(),
+			"phases": {name: hist.snapshot() for name, hist in self.phases.items()},
+			"overruns_total": self.overruns_total,
+			"recent_overruns": list(self.overruns),
+		}
@@ -0,0 +1,238 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import uuid
+from collections import OrderedDict, deque
+from datetime import datetime
+from typing import AsyncIterator, Deque, Dict, List, Optional, Tuple
+
+from .models import JobInfo, Project
+from .process_manager import kill_process_group, process_group_kwargs
+
+TRUNCATED_MARKER = " [line truncated]"
+
+
+class JobQueueFull(Exception):
+	"""Raised when too many jobs are already waiting for a worker slot."""
+
+
+class Job:
+	"""A single run of a project's custom action, with its buffered output."""
+
+	def __init__(self, project: Project, action: str, command: List[str], max_output_lines: int) -> None:
+		self.info = JobInfo(
+			id=uuid.uuid4().hex,
+			project_id=project.config.id,
+			action=action,
+			command=command,
+			created_at=datetime.utcnow(),
+		)
+		self.cwd = project.config.working_dir
+		self.env = {**os.environ, **(project.config.env or {})}
+		# (seq, stream, text); seq keeps counting when old lines fall off the buffer
+		self.output: Deque[Tuple[int, str, str]] = deque(maxlen=max_output_lines)
+		self.next_seq = 0
+		self.proc: Optional[asyncio.subprocess.Process] = None
+		self.task: Optional[asyncio.Task] = None
+		self._changed = asyncio.Event()
+
+	@property
+	def id(self) -> str:
+		return self.info.id
+
+	@property
+	def finished(self) -> bool:
+		return self.info.finished_at is not None
+
+	def _append(self, stream: str, text: str) -> None:
+		self.output.append((self.next_seq, stream, text))
+		self.next_seq += 1
+		self.info.output_lines = self.next_seq
+		self._notify()
+
+	def _notify(self) -> None:
+		self._changed.set()
+		self._changed = asyncio.Event()
+
+	def lines_since(self, since: int) -> List[Tuple[int, str, str]]:
+		if not self.output:
+			return []
+		first = self.output[0][0]
+		start = max(0, since - first)
+		return [self.output[i] for i in range(start, len(self.output))]
+
+	async def wait(self) -> None:
+		"""Wait for the job to finish without cancelling it if the caller goes away."""
+		if self.task is not None:
+			await asyncio.shield(self.task)
+
+	async def follow(self, since: int = 0) -> AsyncIterator[Tuple[int, str, str]]:
+		"""Yield buffered output from ``since`` and then live lines until the job ends."""
+		while True:
+			changed = self._changed
+			for item in self.lines_since(since):
+				since = item[0] + 1
+				yield item
+			if self.finished:
+				return
+			await changed.wait()
+
+
+class JobManager:
+	"""Runs custom actions as asyncio subprocess jobs on a bounded worker pool.
+
+	At most ``max_workers`` jobs run at once across the hub and at most
+	``per_project_limit`` per project; further jobs wait in the queue (up to
+	``max_queued``). Finished jobs are kept for polling until ``max_history``
+	is exceeded.
+	"""
+
+	def __init__(
+		self,
+		max_workers: int = 4,
+		per_project_limit: int = 1,
+		max_queued: int = 100,
+		timeout_seconds: float = 120,
+		max_output_lines: int = 5000,
+		max_history: int = 200,
+	) -> None:
+		self._max_workers = max_workers
+		self._per_project_limit = per_project_limit
+		self._max_queued = max_queued
+		self._timeout_seconds = timeout_seconds
+		self._max_output_lines = max_output_lines
+		self._max_history = max_history
+		self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+		self._pool: Optional[asyncio.Semaphore] = None
+		self._project_slots: Dict[str, asyncio.Semaphore] = {}
+
+	def _slots(self, project_id: str) -> Tuple[asyncio.Semaphore, asyncio.Semaphore]:
+		# Created lazily so they bind to the running event loop
+		if self._pool is None:
+			self._pool = asyncio.Semaphore(self._max_workers)
+		slot = self._project_slots.get(project_id)
+		if slot is None:
+			slot = self._project_slots[project_id] = asyncio.Semaphore(self._per_project_limit)
+		return self._pool, slot
+
+	def submit(self, project: Project, action: str, args: List[str]) -> Job:
+		queued = sum(1 for j in self._jobs.values() if j.info.status == "queued")
+		if queued >= self._max_queued:
+			raise JobQueueFull(f"{queued} jobs already queued")
+		job = Job(project, action, [project.config.command] + list(args), self._max_output_lines)
+		self._jobs[job.id] = job
+		self._prune()
+		job.task = asyncio.create_task(self._run(job))
+		return job
+
+	def get(self, job_id: str) -> Optional[Job]:
+		return self._jobs.get(job_id)
+
+	def list(self, project_id: Optional[str] = None) -> List[Job]:
+		return [j for j in self._jobs.values() if project_id is None or j.info.project_id == project_id]
+
+	async def cancel(self, job: Job) -> Job:
+		if job.finished:
+			return job
+		job.info.status = "cancelled"
+		if job.proc is not None and job.proc.returncode is None:
+			await kill_process_group(job.proc)
+		elif job.task is not None:
+			job.task.cancel()
+		if job.task is not None:
+			await asyncio.wait([job.task])
+		return job
+
+	async def shutdown(self) -> None:
+		for job in list(self._jobs.values()):
+			await self.cancel(job)
+
+	def _prune(self) -> None:
+		excess = len(self._jobs) - self._max_history
+		if excess <= 0:
+			return
+		for job_id in [jid for jid, j in self._jobs.items() if j.finished][:excess]:
+			del self._jobs[job_id]
+
+	async def _run(self, job: Job) -> None:
+		pool, slot = self._slots(job.info.project_id)
+		try:
+			async with slot, pool:
+				if job.info.status == "cancelled":
+					return
+				await self._execute(job)
+		except asyncio.CancelledError:
+			if job.proc is not None and job.proc.returncode is None:
+				await kill_process_group(job.proc)
+			job.info.status = "cancelled"
+		except Exception as e:
+			job.info.status = "failed"
+			job.info.message = str(e)
+		finally:
+			job.info.finished_at = datetime.utcnow()
+			job._notify()
+
+	async def _execute(self, job: Job) -> None:
+		job.info.status = "running"
+		job.info.started_at = datetime.utcnow()
+		job._notify()
+		job.proc = await asyncio.create_subprocess_exec(
+			*job.info.command,
+			cwd=job.cwd,
+			env=job.env,
+			stdin=asyncio.subprocess.DEVNULL,
+			stdout=asyncio.subprocess.PIPE,
+			stderr=asyncio.subprocess.PIPE,
+			limit=1024 * 1024,
+			**process_group_kwargs(),
+		)
+		readers = asyncio.gather(
+			_pump(job, job.proc.stdout, "stdout"),
+			_pump(job, job.proc.stderr, "stderr"),
+		)
+		try:
+			await asyncio.wait_for(asyncio.shield(readers), timeout=self._timeout_seconds)
+			code = await job.proc.wait()
+		except asyncio.TimeoutError:
+			await kill_process_group(job.proc)
+			await readers
+			job.info.status = "failed"
+			job.info.return_code = job.proc.returncode
+			job.info.message = f"Timed out after {self._timeout_seconds:g}s"
+			return
+		job.info.return_code = code
+		if job.info.status != "cancelled":
+			job.info.status = "succeeded" if code == 0 else "failed"
+
+
+async def _pump(job: Job, stream: Optional[asyncio.StreamReader], name: str) -> None:
+	if stream is None:
+		return
+	while True:
+		suffix = ""
+		try:
+			raw = await stream.readuntil(b"\n")
+		except asyncio.IncompleteReadError as e:
+			raw = e.partial  # output ended without a newline
+		except asyncio.LimitOverrunError as e:
+			# Line longer than the reader limit: keep its head, drop the rest
+			raw = await stream.readexactly(e.consumed)
+			await _skip_line(stream)
+			suffix = TRUNCATED_MARKER
+		if not raw:
+			return
+		job._append(name, raw.decode("utf-8", errors="replace").rstrip("\r\n") + suffix)
+
+
+async def _skip_line(stream: asyncio.StreamReader) -> None:
+	"""Discard input up to and including the next newline (or to EOF)."""
+	while True:
+		try:
+			await stream.readuntil(b"\n")
+			return
+		except asyncio.IncompleteReadError:
+			return
+		except asyncio.LimitOverrunError as e:
+			await stream.readexactly(e.consumed)
+
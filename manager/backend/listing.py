@@ -0,0 +1,165 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple, Type, get_args
+
+from pydantic import BaseModel
+
+from .models import Project, RuntimeStatus
+from .project_store import ProjectSnapshot
+
+
+# Short names for the fields a compact view usually wants
+FIELD_ALIASES: Dict[str, str] = {
+	"id": "config.id",
+	"name": "config.name",
+	"status": "runtime.status",
+	"health": "runtime.health",
+	"metrics": "runtime.metrics",
+	"pids": "runtime.pids",
+	"instances": "runtime.instances",
+}
+
+RUNTIME_STATUSES: Set[str] = set(get_args(RuntimeStatus))
+MAX_PAGE_SIZE = 1000
+
+
+def _model_type(annotation: Any) -> Optional[Type[BaseModel]]:
+	if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+		return annotation
+	return None
+
+
+def parse_fields(fields: Optional[str]) -> Optional[Dict[str, Any]]:
+	"""Turn ``id,status,runtime.metrics.cpu_percent`` into a Pydantic ``include`` spec.
+
+	Returns None when no selection was requested. Raises ValueError for
+	unknown fields.
+	"""
+	if not fields:
+		return None
+	include: Dict[str, Any] = {}
+	for raw in fields.split(","):
+		name = raw.strip()
+		if not name:
+			continue
+		path = FIELD_ALIASES.get(name, name).split(".")
+		model: Optional[Type[BaseModel]] = Project
+		node = include
+		for depth, part in enumerate(path):
+			if model is None or part not in model.model_fields:
+				raise ValueError(f"Unknown field: {name}")
+			last = depth == len(path) - 1
+			if last:
+				node[part] = True
+			else:
+				child = node.get(part)
+				if child is True:
+					break  # a parent was already selected whole
+				node = node.setdefault(part, {})
+				model = _model_type(model.model_fields[part].annotation)
+	return include or None
+
+
+def parse_statuses(status: Optional[str]) -> Optional[Set[str]]:
+	if not status:
+		return None
+	wanted = {s.strip() for s in status.split(",") if s.strip()}
+	unknown = wanted - RUNTIME_STATUSES
+	if unknown:
+		raise ValueError(f"Unknown status: {', '.join(sorted(unknown))}")
+	return wanted or None
+
+
+def parse_tags(tag: Optional[str]) -> Optional[Set[str]]:
+	if not tag:
+		return None
+	return {t.strip() for t in tag.split(",") if t.strip()} or None
+
+
+@dataclass
+class ListQuery:
+	"""Field selection, filters and keyset pagination for project listings.
+
+	Filters combine with AND; a comma-separated status or tag list matches
+	any of its values.
+	"""
+
+	include: Optional[Dict[str, Any]] = None
+	statuses: Optional[Set[str]] = None
+	limit: Optional[int] = None
+	cursor: Optional[str] = None
+	tags: Optional[Set[str]] = None
+	port: Optional[int] = None
+	command: Optional[str] = None
+
+	@classmethod
+	def parse(
+		cls,
+		fields: Optional[str] = None,
+		status: Optional[str] = None,
+		limit: Optional[int] = None,
+		cursor: Optional[str] = None,
+		tag: Optional[str] = None,
+		port: Optional[int] = None,
+		command: Optional[str] = None,
+	) -> "ListQuery":
+		# Websocket subscriptions pass decoded JSON straight through
+		for name, value in (("fields", fields), ("status", status), ("cursor", cursor), ("tag", tag), ("command", command)):
+			if value is not None and not isinstance(value, str):
+				raise ValueError(f"{name} must be a string")
+		for name, value in (("limit", limit), ("port", port)):
+			if value is not None and (isinstance(value, bool) or not isinstance(value, int)):
+				raise ValueError(f"{name} must be an integer")
+		if limit is not None and not 1 <= limit <= MAX_PAGE_SIZE:
+			raise ValueError(f"limit must be between 1 and {MAX_PAGE_SIZE}")
+		return cls(
+			include=parse_fields(fields),
+			statuses=parse_statuses(status),
+			limit=limit,
+			cursor=cursor or None,
+			tags=parse_tags(tag),
+			port=port,
+			command=command or None,
+		)
+
+	@property
+	def paginated(self) -> bool:
+		return self.limit is not None or self.cursor is not None
+
+	@property
+	def filtered(self) -> bool:
+		return any(f is not None for f in (self.statuses, self.tags, self.port, self.command))
+
+	def matches(self, project: Project) -> bool:
+		config = project.config
+		return (
+			(self.statuses is None or project.runtime.status in self.statuses)
+			and (self.tags is None or not self.tags.isdisjoint(config.tags))
+			and (self.port is None or self.port in config.ports)
+			and (self.command is None or config.command == self.command)
+		)
+
+	def select(self, snapshot: ProjectSnapshot) -> List[Project]:
+		"""Candidates for this query from the store's indexes, in store order, without a scan."""
+		return snapshot.query(status=self.statuses, tag=self.tags, port=self.port, command=self.command)
+
+	def apply(self, projects: Sequence[Project]) -> Tuple[List[Project], Optional[str]]:
+		"""Filter and page ``projects``; returns the page and the next cursor.
+
+		Paginated listings are ordered by project id and the cursor is the
+		last id of the previous page, so pages stay stable while projects
+		are added or removed. Unpaginated listings keep store order.
+		"""
+		items = list(projects)
+		if self.filtered:
+			items = [p for p in items if self.matches(p)]
+		if not self.paginated:
+			return items, None
+		items.sort(key=lambda p: p.config.id)
+		if self.cursor is not None:
+			items = [p for p in items if p.config.id > self.cursor]
+		if self.limit is not None and len(items) > self.limit:
+			items = items[: self.limit]
+			return items, items[-1].config.id
+		return items, None
@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+import os
+from pathlib import Path
+from typing import BinaryIO, List, NamedTuple, Optional
+
+BLOCK_BYTES = 64 * 1024
+MAX_PAGE_BYTES = 1024 * 1024
+TRUNCATED_MARKER = " [line truncated]"
+
+
+class LogPage(NamedTuple):
+	"""Consecutive complete lines of a log file and where they sit in it.
+
+	``start`` is the byte offset of the first line and ``end`` the offset
+	just past the last one, so ``before=start`` and ``after=end`` fetch the
+	neighbouring pages. ``more`` says whether lines exist beyond the page in
+	the direction it was read. A trailing line without its newline yet is
+	never returned; it is picked up once complete. A line longer than a
+	page comes back as its head plus ``TRUNCATED_MARKER``, so every page
+	moves past at least one line while there is one.
+	"""
+
+	lines: List[str]
+	start: int
+	end: int
+	more: bool
+
+
+def _decode(raw: List[bytes]) -> List[str]:
+	return [line.rstrip(b"\r").decode("utf-8", errors="replace") for line in raw]
+
+
+def _line_start(f: BinaryIO, pos: int) -> int:
+	"""Offset of the start of the line holding the byte before ``pos`` (``pos`` itself after a newline)."""
+	while pos > 0:
+		step = min(BLOCK_BYTES, pos)
+		f.seek(pos - step)
+		i = f.read(step).rfind(b"\n")
+		if i >= 0:
+			return pos - step + i + 1
+		pos -= step
+	return 0
+
+
+def _line_end(f: BinaryIO, pos: int) -> Optional[int]:
+	"""Offset just past the first newline at or after ``pos``; None if the line is not complete yet."""
+	f.seek(pos)
+	while True:
+		chunk = f.read(BLOCK_BYTES)
+		if not chunk:
+			return None
+		i = chunk.find(b"\n")
+		if i >= 0:
+			return pos + i + 1
+		pos += len(chunk)
+
+
+def _oversized(f: BinaryIO, start: int, max_bytes: int) -> str:
+	f.seek(start)
+	return _decode([f.read(max_bytes)])[0] + TRUNCATED_MARKER
+
+
+def read_before(path: Path, before: Optional[int], max_lines: int, max_bytes: int = MAX_PAGE_BYTES) -> LogPage:
+	"""Up to ``max_lines`` lines ending at offset ``before`` (the end of the file if None)."""
+	with path.open("rb") as f:
+		size = os.fstat(f.fileno()).st_size
+		# Never end inside a line: drop one still being written
+		end = _line_start(f, size if before is None else max(0, min(before, size)))
+		pos = end
+		buf = b""
+		while pos > 0 and len(buf) < max_bytes and buf.count(b"\n") <= max_lines:
+			step = min(BLOCK_BYTES, pos)
+			pos -= step
+			f.seek(pos)
+			buf = f.read(step) + buf
+		raw = buf.split(b"\n")[:-1]
+		if pos > 0 and raw:
+			raw = raw[1:]  # starts mid-line
+		if not raw and end > 0:
+			# The line before ``end`` alone is over ``max_bytes``: return its head
+			start = _line_start(f, end - 1)
+			return LogPage([_oversized(f, start, max_bytes)], start, end, start > 0)
+	raw = raw[-max_lines:] if max_lines > 0 else []
+	start = end - sum(len(line) + 1 for line in raw)
+	return LogPage(_decode(raw), start, end, start > 0)
+
+
+def read_after(path: Path, after: int, max_lines: int, max_bytes: int = MAX_PAGE_BYTES) -> LogPage:
+	"""Up to ``max_lines`` lines starting at offset ``after``.
+
+	A file now shorter than ``after`` was truncated or rotated: reading
+	restarts at 0, which the caller sees as ``start < after``.
+	"""
+	with path.open("rb") as f:
+		size = os.fstat(f.fileno()).st_size
+		if after > size:
+			after = 0
+		f.seek(after)
+		buf = f.read(min(max_bytes, size - after))
+		if len(buf) == max_bytes and b"\n" not in buf:
+			# A line over ``max_bytes``: return its head and move past it once it is complete
+			end = _line_end(f, after + len(buf))
+			if end is None:
+				return LogPage([], after, after, False)
+			return LogPage([_oversized(f, after, max_bytes)], after, end, end < size)
+	raw = buf[:buf.rfind(b"\n") + 1].split(b"\n")[:-1][:max(max_lines, 0)]
+	end = after + sum(len(line) + 1 for line in raw)
+	return LogPage(_decode(raw), after, end, end < size)
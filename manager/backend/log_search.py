@@ -0,0 +1,227 @@
+from __future__ import annotations
+
+import mmap
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Iterator, List, Tuple
+
+try:
+	from re import _parser as _sre_parse  # Python 3.11+
+except ImportError:  # pragma: no cover
+	import sre_parse as _sre_parse  # type: ignore[no-redef]
+
+
+# Files are split into chunks of this size (aligned to line boundaries) and
+# each chunk is scanned in slices so the deadline is checked regularly.
+CHUNK_BYTES = 4 * 1024 * 1024
+SLICE_BYTES = 64 * 1024
+MAX_LINE_BYTES = 4096
+MAX_WORKERS = 4
+
+
+@dataclass
+class LogMatch:
+	offset: int
+	line_number: int
+	line: str
+
+	def to_dict(self) -> dict:
+		return {"offset": self.offset, "line_number": self.line_number, "line": self.line}
+
+
+@dataclass
+class _ChunkResult:
+	start: int
+	newlines: int
+	matches: List[Tuple[int, int, int, str]]
+	timed_out: bool = False
+	limited: bool = False
+
+
+def _has_nested_repeat(items: Any, inside_repeat: bool = False) -> bool:
+	"""True if an unbounded repeat is nested inside another one, e.g. ``(a*)*``."""
+	for op, av in items:
+		if op in (_sre_parse.MAX_REPEAT, _sre_parse.MIN_REPEAT):
+			_, hi, sub = av
+			unbounded = hi == _sre_parse.MAXREPEAT
+			if unbounded and inside_repeat:
+				return True
+			if _has_nested_repeat(sub, inside_repeat or unbounded):
+				return True
+		elif op == _sre_parse.SUBPATTERN:
+			if _has_nested_repeat(av[-1], inside_repeat):
+				return True
+		elif op == _sre_parse.BRANCH:
+			if any(_has_nested_repeat(branch, inside_repeat) for branch in av[1]):
+				return True
+		elif op in (_sre_parse.ASSERT, _sre_parse.ASSERT_NOT):
+			if _has_nested_repeat(av[1], inside_repeat):
+				return True
+	return False
+
+
+def compile_pattern(pattern: str, ignore_case: bool = False) -> "re.Pattern[bytes]":
+	"""Compile a user-supplied search pattern.
+
+	``re`` holds the GIL for the whole of a single match attempt, so the time
+	budget alone cannot stop catastrophic backtracking; patterns with nested
+	unbounded repeats are rejected up front with ``re.error``.
+	"""
+	raw = pattern.encode("utf-8")
+	flags = re.MULTILINE | (re.IGNORECASE if ignore_case else 0)
+	if _has_nested_repeat(_sre_parse.parse(raw, flags)):
+		raise re.error("nested unbounded repetition is not allowed")
+	return re.compile(raw, flags)
+
+
+def _chunk_bounds(mm: mmap.mmap, start: int, end: int, chunk_bytes: int) -> List[Tuple[int, int]]:
+	"""Split [start, end) into ranges that begin and end on line boundaries."""
+	bounds: List[Tuple[int, int]] = []
+	pos = start
+	while pos < end:
+		stop = min(pos + chunk_bytes, end)
+		if stop < end:
+			nl = mm.find(b"\n", stop, end)
+			stop = end if nl < 0 else nl + 1
+		bounds.append((pos, stop))
+		pos = stop
+	return bounds
+
+
+def _scan_chunk(
+	mm: mmap.mmap,
+	regex: "re.Pattern[bytes]",
+	start: int,
+	end: int,
+	limit: int,
+	deadline: float,
+	cancelled: threading.Event,
+) -> _ChunkResult:
+	"""Scan one chunk; matches are (line offset, next line offset, line index in chunk, text)."""
+	result = _ChunkResult(start=start, newlines=0, matches=[])
+	pos = start
+	while pos < end:
+		if cancelled.is_set() or time.monotonic() > deadline:
+			result.timed_out = True
+			return result
+		stop = min(pos + SLICE_BYTES, end)
+		if stop < end:
+			nl = mm.find(b"\n", stop, end)
+			stop = end if nl < 0 else nl + 1
+		data = mm[pos:stop]
+		last_line_start = -1
+		counted_to = 0
+		line_idx = result.newlines
+		for m in regex.finditer(data):
+			line_start = data.rfind(b"\n", 0, m.start()) + 1
+			if line_start == last_line_start:
+				continue
+			last_line_start = line_start
+			line_end = data.find(b"\n", m.start())
+			next_line = len(data) if line_end < 0 else line_end + 1
+			if line_end < 0:
+				line_end = len(data)
+			line_idx += data.count(b"\n", counted_to, line_start)
+			counted_to = line_start
+			text = data[line_start:min(line_end, line_start + MAX_LINE_BYTES)]
+			result.matches.append((pos + line_start, pos + next_line, line_idx, text.decode("utf-8", errors="replace").rstrip("\r")))
+			if len(result.matches) >= limit:
+				result.limited = True
+				return result
+			if cancelled.is_set() or time.monotonic() > deadline:
+				result.timed_out = True
+				return result
+		result.newlines += data.count(b"\n")
+		pos = stop
+	return result
+
+
+def _count_newlines(mm: mmap.mmap, start: int, end: int) -> int:
+	count = 0
+	pos = start
+	while pos < end:
+		stop = min(pos + CHUNK_BYTES, end)
+		count += mm[pos:stop].count(b"\n")
+		pos = stop
+	return count
+
+
+def search_log(
+	path: Path,
+	pattern: "re.Pattern[bytes]",
+	since: int = 0,
+	limit: int = 100,
+	time_budget_seconds: float = 2.0,
+	chunk_bytes: int = CHUNK_BYTES,
+	max_workers: int = MAX_WORKERS,
+) -> Iterator[dict]:
+	"""Search a log file with a compiled regex and yield matches in file order.
+
+	``since`` is a byte offset to start scanning from (e.g. the offset of the
+	last match of a previous request). Line numbers are 1-based and always
+	relative to the start of the file. The generator finishes with a summary
+	record (``{"done": true, ...}``) telling whether the scan was complete;
+	its ``scanned_to`` offset can be passed back as ``since`` to resume.
+	"""
+	started = time.monotonic()
+	deadline = started + time_budget_seconds
+	with path.open("rb") as f:
+		size = f.seek(0, 2)
+		since = max(0, min(since, size))
+		if size == 0 or since >= size:
+			yield {
+				"done": True,
+				"matches": 0,
+				"timed_out": False,
+				"truncated": False,
+				"scanned_to": size,
+				"elapsed_ms": round((time.monotonic() - started) * 1000, 2),
+			}
+			return
+		with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+			if since > 0:
+				# Snap to the beginning of the line containing ``since``
+				since = mm.rfind(b"\n", 0, since) + 1
+			line_base = _count_newlines(mm, 0, since) + 1
+			bounds = _chunk_bounds(mm, since, size, chunk_bytes)
+			emitted = 0
+			timed_out = False
+			truncated = False
+			scanned_to = since
+			cancelled = threading.Event()
+			with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(bounds)))) as pool:
+				futures = [pool.submit(_scan_chunk, mm, pattern, s, e, limit, deadline, cancelled) for s, e in bounds]
+				try:
+					for (s, e), fut in zip(bounds, futures):
+						res = fut.result()
+						for offset, next_offset, line_idx, text in res.matches:
+							yield LogMatch(offset, line_base + line_idx, text).to_dict()
+							emitted += 1
+							scanned_to = next_offset
+							if emitted >= limit:
+								truncated = True
+								break
+						if truncated:
+							break
+						if res.timed_out:
+							timed_out = True
+							break
+						line_base += res.newlines
+						scanned_to = e
+				finally:
+					# Make any still-running chunk scan bail out promptly
+					cancelled.set()
+					for fut in futures:
+						fut.cancel()
+			yield {
+				"done": True,
+				"matches": emitted,
+				"timed_out": timed_out,
+				"truncated": truncated,
+				"scanned_to": scanned_to,
+				"elapsed_ms": round((time.monotonic() - started) * 1000, 2),
+			}
@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+import math
+from array import array
+from typing import Dict, List, Tuple
+
+# (absolute column index, min, max); column = floor(t / seconds_per_column)
+Column = Tuple[int, float, float]
+
+
+class MetricHistory:
+	"""Bounded history of one metric for charting.
+
+	The last ``raw_capacity`` samples are kept as they came, in fixed-size
+	arrays used as a ring; every sample is also folded into per-bucket
+	min/max (``bucket_seconds`` wide, ``buckets`` of them), which is what
+	long views are drawn from once raw samples have been overwritten.
+	Memory is fixed at creation, whatever the sampling rate or uptime.
+	"""
+
+	def __init__(self, raw_capacity: int = 900, bucket_seconds: int = 60, buckets: int = 1440) -> None:
+		self.raw_capacity = raw_capacity
+		self.bucket_seconds = bucket_seconds
+		self._times = array("d", [math.nan]) * raw_capacity
+		self._values = array("f", [0.0]) * raw_capacity
+		self._head = 0
+		self._count = 0
+		self._bucket_ids = array("q", [-1]) * buckets
+		self._mins = array("f", [0.0]) * buckets
+		self._maxs = array("f", [0.0]) * buckets
+		self.last_time = -math.inf
+		self.last_value = math.nan
+
+	def __len__(self) -> int:
+		return self._count
+
+	def add(self, t: float, value: float) -> None:
+		self._times[self._head] = t
+		self._values[self._head] = value
+		self._head = (self._head + 1) % self.raw_capacity
+		self._count = min(self._count + 1, self.raw_capacity)
+		if t >= self.last_time:
+			self.last_time = t
+			self.last_value = value
+
+		bucket = int(t // self.bucket_seconds)
+		slot = bucket % len(self._bucket_ids)
+		if self._bucket_ids[slot] != bucket:
+			self._bucket_ids[slot] = bucket
+			self._mins[slot] = self._maxs[slot] = value
+		else:
+			if value < self._mins[slot]:
+				self._mins[slot] = value
+			if value > self._maxs[slot]:
+				self._maxs[slot] = value
+
+	def oldest_raw(self) -> float:
+		if self._count < self.raw_capacity:
+			return self._times[0] if self._count else math.inf
+		return self._times[self._head]
+
+	def columns(self, start: float, end: float, seconds_per_column: float) -> List[Column]:
+		"""Min and max per pixel column over ``[start, end)``, oldest column first.
+
+		Raw samples are used where they still exist and minute buckets
+		before that, so a 24-hour view costs one pass over at most
+		``raw_capacity + buckets`` entries and yields at most one column
+		per pixel, whatever the number of samples behind it.
+		"""
+		acc: Dict[int, List[float]] = {}
+
+		def put(column: int, lo: float, hi: float) -> None:
+			seen = acc.get(column)
+			if seen is None:
+				acc[column] = [lo, hi]
+			else:
+				if lo < seen[0]:
+					seen[0] = lo
+				if hi > seen[1]:
+					seen[1] = hi
+
+		raw_from = max(start, self.oldest_raw())
+		if raw_from > start:
+			width = self.bucket_seconds
+			for slot, bucket in enumerate(self._bucket_ids):
+				t = bucket * width
+				if bucket >= 0 and t + width > start and t < raw_from:
+					put(int((t + width / 2) // seconds_per_column), self._mins[slot], self._maxs[slot])
+		times, values = self._times, self._values
+		for i in range(self._count):
+			t = times[i]
+			if raw_from <= t < end:
+				v = values[i]
+				put(int(t // seconds_per_column), v, v)
+		return [(column, lo, hi) for column, (lo, hi) in sorted(acc.items())]
@@ -6,15 +6,20 @@ from typing import Dict, List, Literal, Optional
 from pydantic import BaseModel, Field
 
 
-HealthType = Literal["http", "tcp", "process", "none"]
+HealthType = Literal["http", "tcp", "process", "command", "none"]
 
 
 class HealthcheckConfig(BaseModel):
-	"""Configuration for project health checking."""
+	"""Configuration for project health checking.
+
+	``url`` and ``command`` may contain ``{port}`` and ``{instance}``; each
+	instance is then checked on its own (see ``health.per_instance``).
+	"""
 	type: HealthType = Field(default="process")
 	url: Optional[str] = None
 	tcp_host: Optional[str] = None
 	tcp_port: Optional[int] = None
+	command: List[str] = Field(default_factory=list, description="Probe to run for command healthchecks (exit code 0 is healthy)")
 	interval_seconds: int = Field(default=10, ge=2, le=3600)
 	timeout_seconds: int = Field(default=3, ge=1, le=60)
 
@@ -42,6 +47,7 @@ class ProjectConfig(BaseModel):
 	instances: int = Field(default=1, ge=1, le=64)
 	actions: Dict[str, List[str]] = Field(default_factory=dict, description="Custom actions: name -> args list to run with 'command'")
 	description: Optional[str] = None
+	tags: List[str] = Field(default_factory=list, description="Free-form labels for grouping and filtering")
 
 
 RuntimeStatus = Literal[
@@ -71,6 +77,14 @@ class ProcessMetrics(BaseModel):
 	uptime_seconds: Optional[float] = None
 
 
+class InstanceRuntime(BaseModel):
+	"""One running instance of a project, by its index in ``range(config.instances)``."""
+	index: int
+	pid: Optional[int] = None
+	health: HealthReport = Field(default_factory=HealthReport)
+	restarts_total: int = 0
+
+
 class ProjectRuntime(BaseModel):
 	pid: Optional[int] = None
 	pids: List[int] = Field(default_factory=list)
@@ -83,6 +97,7 @@ class ProjectRuntime(BaseModel):
 	window_started_at: Optional[datetime] = None
 	metrics: ProcessMetrics = Field(default_factory=ProcessMetrics)
 	health: HealthReport = Field(default_factory=HealthReport)
+	instances: List[InstanceRuntime] = Field(default_factory=list)
 
 
 class Project(BaseModel):
@@ -90,6 +105,33 @@ class Project(BaseModel):
 	runtime: ProjectRuntime = Field(default_factory=ProjectRuntime)
 
 
+def fork(project: Project) -> Project:
+	"""Private working copy of a published project for a writer to change and publish.
+
+	The config is shared (configs are replaced, never edited in place) and
+	the runtime is copied along with ``metrics``, the one part updated
+	field by field; ``health``, ``pids`` and ``instances`` are always
+	reassigned whole.
+	"""
+	runtime = project.runtime
+	return project.model_copy(update={"runtime": runtime.model_copy(update={"metrics": runtime.metrics.model_copy()})})
+
+
+def instance_port(config: ProjectConfig, index: int) -> Optional[int]:
+	"""The port of instance ``index``: its entry in ``ports``, if there is one."""
+	return config.ports[index] if index < len(config.ports) else None
+
+
+def fill_instance_template(text: str, index: int, port: Optional[int]) -> str:
+	"""Substitute ``{instance}`` and ``{port}`` in a URL or argument; other braces are left alone."""
+	text = text.replace("{instance}", str(index))
+	if "{port}" in text:
+		if port is None:
+			raise ValueError(f"No port configured for instance {index}")
+		text = text.replace("{port}", str(port))
+	return text
+
+
 # API Schemas
 class CreateOrUpdateProjectRequest(BaseModel):
 	config: ProjectConfig
@@ -104,6 +146,26 @@ class StartProjectRequest(BaseModel):
 class TailLogsResponse(BaseModel):
 	lines: List[str]
 	truncated: bool = False
+	# Byte offsets of the first line and just past the last one (None for placeholder messages)
+	start: Optional[int] = None
+	end: Optional[int] = None
+
+
+JobStatus = Literal["queued", "running", "succeeded", "failed", "cancelled"]
+
+
+class JobInfo(BaseModel):
+	id: str
+	project_id: str
+	action: str
+	command: List[str]
+	status: JobStatus = "queued"
+	created_at: datetime
+	started_at: Optional[datetime] = None
+	finished_at: Optional[datetime] = None
+	return_code: Optional[int] = None
+	output_lines: int = 0
+	message: Optional[str] = None
 
 
 class OperationResult(BaseModel):
@@ -1,13 +1,28 @@
 from __future__ import annotations
 
 import asyncio
+import logging
+import time
 from datetime import datetime, timedelta
-from typing import Awaitable, Callable, List, Set
+from typing import Awaitable, Callable, Dict, List, Optional, Set, Tuple
 
-from .health import check_health
-from .models import Project
+from .health import ProbePool, aggregate_health, check_health, per_instance
+from .instrumentation import TickProfiler
+from .models import HealthReport, Project, ProjectConfig, fork
 from .process_manager import ProcessManager
-from .project_store import ProjectStore
+from .project_store import BaseProjectStore, StoreDiff
+from .runtime_journal import RuntimeJournal, apply_state
+from .runtime_records import RuntimeRecord
+
+
+logger = logging.getLogger(__name__)
+
+# Config fields that shape the running process; editing any of them restarts a running project
+LAUNCH_FIELDS = ("working_dir", "command", "args", "python_path", "env", "instances", "ports", "log_path")
+
+
+def needs_restart(old: ProjectConfig, new: ProjectConfig) -> bool:
+	return any(getattr(old, name) != getattr(new, name) for name in LAUNCH_FIELDS)
 
 
 class BroadcastHub:
@@ -29,7 +44,16 @@ class BroadcastHub:
 
 
 class Orchestrator:
-	def __init__(self, store: ProjectStore, proc: ProcessManager, hub: BroadcastHub) -> None:
+	def __init__(
+		self,
+		store: BaseProjectStore,
+		proc: ProcessManager,
+		hub: BroadcastHub,
+		tick_budget_seconds: float = 1.0,
+		watch_store: bool = False,
+		journal: Optional[RuntimeJournal] = None,
+		probes: Optional[ProbePool] = None,
+	) -> None:
 		self._store = store
 		self._proc = proc
 		self._hub = hub
@@ -37,84 +61,291 @@ class Orchestrator:
 		self._stopped = asyncio.Event()
 		self._last_metrics_update = datetime.utcnow()
 		self._last_health_update = datetime.utcnow()
+		self.profiler = TickProfiler(budget_seconds=tick_budget_seconds)
+		self.errors_total = 0
+		self._watch_store = watch_store
+		self._journal = journal
+		self.adopted_total = 0
+		self._records: Dict[str, RuntimeRecord] = {}
+		self.probes = probes if probes is not None else ProbePool()
+
+	def restore(self) -> int:
+		"""Pick up where the previous hub left off; returns how many projects were re-adopted.
+
+		Processes still alive from the previous run are adopted from their pid
+		files, and journaled runtime state (restart counters, exit codes,
+		health) is put back, all in one publish. From then on the journal
+		records every durable change.
+		"""
+		projects = self._store.list_projects()
+		saved = self._journal.load() if self._journal is not None else {}
+		adopted = self._proc.adopt(projects)
+		updates = []
+		for project in projects:
+			state = saved.get(project.config.id)
+			pids = adopted.get(project.config.id)
+			if state is None and not pids:
+				continue
+			work = fork(project)
+			if state is not None:
+				apply_state(work.runtime, state)
+			if pids:
+				work.runtime.pids = pids
+				work.runtime.pid = pids[0]
+				work.runtime.status = "running"
+			updates.append((project, work))
+		if updates:
+			self._store.publish(updates, force=True)
+		if self._journal is not None:
+			self._journal.forget(set(saved) - {p.config.id for p in projects})
+			self._store.attach_journal(self._journal)
+		self.adopted_total = len(adopted)
+		if adopted:
+			logger.info("Re-adopted %d running project(s) from the previous run", len(adopted))
+		return len(adopted)
 
 	async def start(self) -> None:
 		self._stopped.clear()
+		await asyncio.get_running_loop().run_in_executor(None, self.restore)
+		if self._watch_store:
+			loop = asyncio.get_running_loop()
+			# Called on the watcher thread; the diff is applied on the event loop
+			self._store.watch(lambda diff: asyncio.run_coroutine_threadsafe(self.apply_store_diff(diff), loop))
 		self._task = asyncio.create_task(self._run())
 
 	async def stop(self) -> None:
 		self._stopped.set()
+		if self._watch_store:
+			self._store.unwatch()
 		if self._task:
 			await asyncio.wait([self._task])
 
+	async def apply_store_diff(self, diff: StoreDiff) -> None:
+		"""Bring processes in line with an edit of the store made behind our back.
+
+		Removed projects are stopped; running projects whose launch settings
+		changed are restarted with the new config. Everything else, including
+		metadata-only edits (name, tags, healthcheck, restart policy), takes
+		effect without touching the process.
+		"""
+		loop = asyncio.get_running_loop()
+		for project in diff.removed:
+			if self._proc.is_running(project.config.id):
+				logger.info("Stopping %s: removed from the store", project.config.id)
+				await loop.run_in_executor(None, self._proc.stop, fork(project))
+		for project, old in diff.changed:
+			if needs_restart(old, project.config) and self._proc.is_running(project.config.id):
+				logger.info("Restarting %s: launch settings changed", project.config.id)
+				work = fork(project)
+				await loop.run_in_executor(None, self._proc.stop, work)
+				result = await loop.run_in_executor(None, self._proc.start, work)
+				if not result.success:
+					logger.warning("Failed to restart %s: %s", project.config.id, result.message)
+				self._store.publish([(project, work)], force=True)
+		await self._hub.broadcast(self._store.list_projects())
+
+	def timings(self) -> dict:
+		return {
+			**self.profiler.snapshot(),
+			"errors_total": self.errors_total,
+			"health_probe_timeouts_total": self.probes.timeouts_total,
+		}
+
 	async def _run(self) -> None:
 		while not self._stopped.is_set():
 			try:
-				projects = self._store.list_projects()
-				
-				# Update status for all projects
-				for p in projects:
-					self._proc.status(p)
-				
-				# Update metrics every 5 seconds
-				now = datetime.utcnow()
-				if (now - self._last_metrics_update).total_seconds() >= 5:
-					for p in projects:
-						if p.runtime.status == "running":
-							self._proc.collect_metrics(p)
-					self._last_metrics_update = now
-				
-				# Update health every 10 seconds
-				if (now - self._last_health_update).total_seconds() >= 10:
-					for p in projects:
-						if p.runtime.status == "running":
-							try:
-								report = await check_health(p)
-								p.runtime.health = report
-								
-								# Auto-restart if unhealthy and autorestart is enabled
-								if (report.status == "unhealthy" and 
-									p.config.restart_policy.autorestart):
-									await self._maybe_restart(p)
-							except Exception as e:
-								# Log health check error but don't fail
-								print(f"Health check failed for {p.config.id}: {e}")
-					self._last_health_update = now
-				
-				# Broadcast snapshot
-				await self._hub.broadcast([p for p in projects])
-				
+				await self._tick()
 				# Wait before next iteration
 				await asyncio.sleep(2)
-				
-			except Exception as e:
-				print(f"Orchestrator error: {e}")
+			except Exception:
+				self.errors_total += 1
+				logger.exception("Orchestrator tick failed")
 				await asyncio.sleep(5)  # Wait longer on error
 
-	async def _maybe_restart(self, project: Project) -> None:
+	def _record(self, project: Project) -> RuntimeRecord:
+		record = self._records.get(project.config.id)
+		if record is None or record.source is not project.runtime:
+			record = self._records[project.config.id] = RuntimeRecord(project.runtime)
+		return record
+
+	def _publish_records(self, pending: List[Tuple[Project, RuntimeRecord]]) -> None:
+		if not pending:
+			return
+		published = self._store.publish(
+			(p, p.model_copy(update={"runtime": record.materialize()})) for p, record in pending
+		)
+		for p, record in pending:
+			new = published.get(p.config.id)
+			if new is not None:
+				record.source = new.runtime
+
+	async def _tick(self) -> None:
+		# The status and metrics phases work on RuntimeRecords and publish
+		# models only for the projects that changed, in one swap per phase,
+		# so readers see a whole phase's results or none of them
+		store = self._store
+		prof = self.profiler
+		clock = time.perf_counter
+		prof.begin_tick()
+		try:
+			# Update status for all projects
+			prof.begin_phase("status")
+			snapshot = store.snapshot()
+			if len(self._records) > len(snapshot):
+				self._records = {pid: r for pid, r in self._records.items() if pid in snapshot.index}
+			pending = []
+			for p in snapshot.projects:
+				t = clock()
+				record = self._record(p)
+				instances = tuple(sorted(self._proc.alive_instances(p.config.id).items()))
+				status = "running" if instances else "stopped"
+				if instances != record.instances or status != record.status:
+					record.instances = instances
+					record.pids = tuple(pid for _, pid in instances)
+					record.status = status
+					pending.append((p, record))
+				prof.record_project(p.config.id, clock() - t)
+			self._publish_records(pending)
+			prof.end_phase()
+			
+			# Update metrics (and uptime) every 5 seconds
+			now = datetime.utcnow()
+			if (now - self._last_metrics_update).total_seconds() >= 5:
+				prof.begin_phase("metrics")
+				pending = []
+				for p in store.snapshot().query(status="running"):
+					t = clock()
+					record = self._record(p)
+					sample = self._proc.sample(record.pids)
+					if sample != record.metrics:
+						record.metrics = sample
+						pending.append((p, record))
+					prof.record_project(p.config.id, clock() - t)
+				self._publish_records(pending)
+				prof.end_phase()
+				self._last_metrics_update = now
+			
+			# Update health every 10 seconds
+			if (now - self._last_health_update).total_seconds() >= 10:
+				prof.begin_phase("health")
+				
+				async def timed_check(p: Project):
+					t = clock()
+					try:
+						if not per_instance(p.config):
+							return await check_health(p, self.probes)
+						# Instance index -> report; instances that are not running need no probe
+						alive = {inst.index for inst in p.runtime.instances if inst.pid is not None}
+						indices = range(p.config.instances)
+						reports = await asyncio.gather(*(check_health(p, self.probes, idx) for idx in indices if idx in alive))
+						by_index = dict(zip([idx for idx in indices if idx in alive], reports))
+						for idx in indices:
+							if idx not in alive:
+								by_index[idx] = HealthReport(status="unhealthy", message="Instance not running", last_checked_at=datetime.utcnow())
+						return by_index
+					finally:
+						prof.record_project(p.config.id, clock() - t)
+				
+				# Checks run concurrently; command probes are bounded by the probe pool
+				running = store.snapshot().query(status="running")
+				results = await asyncio.gather(*(timed_check(p) for p in running), return_exceptions=True)
+				for p, result in zip(running, results):
+					try:
+						if isinstance(result, BaseException):
+							raise result
+						work = fork(p)
+						failing: Optional[List[int]] = None
+						if isinstance(result, dict):
+							work.runtime.instances = [
+								inst.model_copy(update={"health": result[inst.index]}) if inst.index in result else inst
+								for inst in p.runtime.instances
+							]
+							report = aggregate_health(result)
+							failing = [idx for idx, r in sorted(result.items()) if r.status == "unhealthy"]
+						else:
+							report = result
+						work.runtime.health = report
+						p = store.publish([(p, work)]).get(p.config.id, p)
+						
+						# Auto-restart if unhealthy and autorestart is enabled; per-instance
+						# checks replace only the failing instances
+						if (report.status == "unhealthy" and 
+							p.config.restart_policy.autorestart):
+							await self._maybe_restart(p, failing)
+					except Exception:
+						# Log health check error but don't fail
+						logger.exception("Health check failed for %s", p.config.id)
+				prof.end_phase()
+				self._last_health_update = now
+			
+			# Broadcast snapshot
+			prof.begin_phase("broadcast")
+			await self._hub.broadcast(store.list_projects())
+			prof.end_phase()
+		finally:
+			prof.end_tick()
+
+	async def _maybe_restart(self, project: Project, instances: Optional[List[int]] = None) -> None:
+		"""Restart an unhealthy project, or only its ``instances`` if given, within the restart policy."""
 		policy = project.config.restart_policy
+		work = fork(project)
 		
 		# Basic sliding window 1 hour
 		now = datetime.utcnow()
-		window_start = project.runtime.window_started_at or now
+		window_start = work.runtime.window_started_at or now
 		
 		if (now - window_start) > timedelta(hours=1):
-			project.runtime.window_started_at = now
-			project.runtime.restarts_in_window = 0
+			work.runtime.window_started_at = now
+			work.runtime.restarts_in_window = 0
+		
+		if work.runtime.restarts_in_window >= policy.max_restarts_per_hour:
+			logger.warning("Max restarts reached for %s", project.config.id)
+			self._store.publish([(project, work)])
+			return
 		
-		if project.runtime.restarts_in_window >= policy.max_restarts_per_hour:
-			print(f"Max restarts reached for {project.config.id}")
+		if instances is not None:
+			await self._restart_instances(project, work, instances)
 			return
 		
-		# Perform restart
-		print(f"Restarting unhealthy project: {project.config.id}")
-		self._proc.stop(project)
+		# Perform restart; stop/start run in the executor as stopping waits for the process to exit
+		loop = asyncio.get_running_loop()
+		logger.info("Restarting unhealthy project: %s", project.config.id)
+		await loop.run_in_executor(None, self._proc.stop, work)
+		self._store.publish([(project, work)], force=True)
 		await asyncio.sleep(policy.restart_delay_seconds)
-		result = self._proc.start(project)
+		result = await loop.run_in_executor(None, self._proc.start, work)
 		
 		if result.success:
-			project.runtime.restarts_in_window += 1
-			project.runtime.restarts_total += 1
-			print(f"Successfully restarted {project.config.id}")
+			work.runtime.restarts_in_window += 1
+			work.runtime.restarts_total += 1
+			logger.info("Successfully restarted %s", project.config.id)
 		else:
-			print(f"Failed to restart {project.config.id}: {result.message}") 
\ No newline at end of file
+			logger.warning("Failed to restart %s: %s", project.config.id, result.message)
+		# The process really was restarted: record it even if the project changed meanwhile
+		self._store.publish([(project, work)], force=True)
+
+	async def _restart_instances(self, project: Project, work: Project, instances: List[int]) -> None:
+		# Stop/start run in the executor: stopping waits for the process to exit
+		loop = asyncio.get_running_loop()
+		policy = project.config.restart_policy
+		logger.info("Restarting unhealthy instance(s) %s of %s", instances, project.config.id)
+		for idx in instances:
+			await loop.run_in_executor(None, self._proc.stop_instance, work, idx)
+		self._store.publish([(project, work)], force=True)
+		await asyncio.sleep(policy.restart_delay_seconds)
+		restarted = []
+		for idx in instances:
+			result = await loop.run_in_executor(None, self._proc.start_instance, work, idx)
+			if result.success:
+				restarted.append(idx)
+			else:
+				logger.warning("Failed to restart %s instance %d: %s", project.config.id, idx, result.message)
+		if restarted:
+			work.runtime.restarts_in_window += 1
+			work.runtime.restarts_total += 1
+			work.runtime.instances = [
+				inst.model_copy(update={"restarts_total": inst.restarts_total + 1}) if inst.index in restarted else inst
+				for inst in work.runtime.instances
+			]
+			logger.info("Successfully restarted %s instance(s) %s", project.config.id, restarted)
+		self._store.publish([(project, work)], force=True)
@@ -1,21 +1,131 @@
 from __future__ import annotations
 
+import asyncio
+import functools
+import hashlib
+import logging
 import os
 import signal
 import subprocess
 import time
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Optional
+from types import ModuleType
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
 
-import psutil
+from .models import OperationResult, Project, fill_instance_template, instance_port
+from .runtime_records import MetricsSample, merge_instances
 
-from .models import OperationResult, Project
+
+logger = logging.getLogger(__name__)
 
 
 # Windows-specific flags to hide console window
 CREATE_NO_WINDOW = 0x08000000 if os.name == "nt" else 0
 DETACHED_PROCESS = 0x00000008 if os.name == "nt" else 0
+CREATE_NEW_PROCESS_GROUP = 0x00000200 if os.name == "nt" else 0
+
+
+# psutil derives create_time from boot time plus clock ticks; allow for rounding
+CREATE_TIME_TOLERANCE = 0.05
+
+
+@functools.lru_cache(maxsize=None)
+def _psutil() -> ModuleType:
+	"""psutil, imported on first use so that importing the app stays cheap."""
+	import psutil
+
+	return psutil
+
+
+class PidRecord(NamedTuple):
+	"""One line of a pid file: ``<pid> <create_time> <cmdline digest>``.
+
+	Pid files written before identities were recorded hold only the pid.
+	"""
+
+	pid: int
+	create_time: Optional[float] = None
+	cmdline: Optional[str] = None
+
+	def matches(self, create_time: float, cmdline: Optional[str]) -> bool:
+		"""Whether a live process with these properties is the one this record describes."""
+		if self.create_time is not None and abs(create_time - self.create_time) > CREATE_TIME_TOLERANCE:
+			return False
+		return self.cmdline is None or cmdline is None or self.cmdline == cmdline
+
+
+def cmdline_digest(cmdline: List[str]) -> str:
+	return hashlib.sha256("\0".join(cmdline).encode("utf-8", "surrogateescape")).hexdigest()[:16]
+
+
+def _identity(pid: int) -> Optional[Tuple[float, Optional[str]]]:
+	"""(create_time, cmdline digest) of a live process, or None if it is gone."""
+	psutil = _psutil()
+
+	try:
+		proc = psutil.Process(pid)
+		with proc.oneshot():
+			create_time = proc.create_time()
+			try:
+				cmdline: Optional[str] = cmdline_digest(proc.cmdline())
+			except psutil.AccessDenied:
+				cmdline = None
+		if proc.status() == psutil.STATUS_ZOMBIE:
+			return None
+	except psutil.Error:
+		return None
+	return create_time, cmdline
+
+
+def kill_process_tree(pid: int, timeout_seconds: float = 3.0) -> None:
+	"""Terminate a process and all of its descendants, killing stragglers."""
+	psutil = _psutil()
+
+	try:
+		root = psutil.Process(pid)
+		procs = root.children(recursive=True) + [root]
+	except psutil.Error:
+		return
+	for p in procs:
+		try:
+			p.terminate()
+		except psutil.Error:
+			pass
+	_, alive = psutil.wait_procs(procs, timeout=timeout_seconds)
+	for p in alive:
+		try:
+			p.kill()
+		except psutil.Error:
+			pass
+
+
+def process_group_kwargs() -> dict:
+	"""Popen/asyncio subprocess arguments giving a child its own process group.
+
+	Short-lived helpers (jobs, health probes) are started this way so that
+	everything they spawn can be killed together.
+	"""
+	if os.name == "nt":
+		return {"creationflags": CREATE_NO_WINDOW | CREATE_NEW_PROCESS_GROUP}
+	return {"start_new_session": True}
+
+
+async def kill_process_group(proc: asyncio.subprocess.Process) -> None:
+	"""Kill a helper's whole process group/tree without blocking the event loop."""
+	if os.name != "nt":
+		try:
+			os.killpg(proc.pid, signal.SIGTERM)
+		except (ProcessLookupError, PermissionError):
+			pass
+	loop = asyncio.get_running_loop()
+	await loop.run_in_executor(None, kill_process_tree, proc.pid)
+	if os.name != "nt":
+		try:
+			os.killpg(proc.pid, signal.SIGKILL)
+		except (ProcessLookupError, PermissionError):
+			pass
+	await proc.wait()
 
 
 class ProcessManager:
@@ -25,6 +135,7 @@ class ProcessManager:
 		self._runtime_dir = runtime_dir
 		self._runtime_dir.mkdir(parents=True, exist_ok=True)
 		self._running: Dict[str, List[subprocess.Popen]] = {}
+		self._total_memory: Optional[int] = None
 
 	def _build_env(self, project: Project, override_env: Optional[Dict[str, str]] = None) -> Dict[str, str]:
 		env = os.environ.copy()
@@ -42,19 +153,116 @@ class ProcessManager:
 		return self._runtime_dir / f"{project_id}-{idx}.pid"
 
 	def _write_pid(self, project_id: str, idx: int, pid: int) -> None:
-		self._pid_file(project_id, idx).write_text(str(pid), encoding="utf-8")
+		identity = _identity(pid)
+		line = f"{pid} {identity[0]!r} {identity[1] or '-'}" if identity else str(pid)
+		self._pid_file(project_id, idx).write_text(line, encoding="utf-8")
 
-	def _read_pids(self, project_id: str) -> List[int]:
-		pids: List[int] = []
+	def _read_records(self, project_id: str) -> List[PidRecord]:
+		"""Pid records by instance index; an unreadable file or a gap (pid 0) counts as a dead instance."""
+		records: List[PidRecord] = []
 		for idx in range(0, 256):
 			pf = self._pid_file(project_id, idx)
 			if not pf.exists():
 				break
 			try:
-				pids.append(int(pf.read_text(encoding="utf-8").strip()))
-			except Exception:
+				parts = pf.read_text(encoding="utf-8").split()
+				pid = int(parts[0])
+				create_time = float(parts[1]) if len(parts) > 1 else None
+				cmdline = parts[2] if len(parts) > 2 and parts[2] != "-" else None
+			except (OSError, ValueError, IndexError):
+				pid, create_time, cmdline = 0, None, None
+			records.append(PidRecord(pid, create_time, cmdline))
+		return records
+
+	def _read_pids(self, project_id: str) -> List[int]:
+		return [r.pid for r in self._read_records(project_id) if r.pid]
+
+	def alive_pids(self, project_id: str) -> List[int]:
+		return list(self.alive_instances(project_id).values())
+
+	def alive_instances(self, project_id: str) -> Dict[int, int]:
+		"""Instance index -> pid, for pid files whose process is still the one we started.
+
+		Our own children are polled (which also reaps them); anything else
+		must still have the recorded create time, so a pid the OS has
+		handed to an unrelated process is not mistaken for ours.
+		"""
+		psutil = _psutil()
+
+		children = {p.pid: p for p in self._running.get(project_id, ())}
+		alive: Dict[int, int] = {}
+		for idx, record in enumerate(self._read_records(project_id)):
+			if not record.pid:
+				continue
+			child = children.get(record.pid)
+			if child is not None:
+				if child.poll() is None:
+					alive[idx] = record.pid
 				continue
-		return pids
+			if record.create_time is None:
+				if psutil.pid_exists(record.pid):
+					alive[idx] = record.pid
+				continue
+			try:
+				if abs(psutil.Process(record.pid).create_time() - record.create_time) <= CREATE_TIME_TOLERANCE:
+					alive[idx] = record.pid
+			except psutil.Error:
+				pass
+		return alive
+
+	def adopt(self, projects: Iterable[Project]) -> Dict[str, List[int]]:
+		"""Take back processes a previous hub left running; returns the adopted pids per project.
+
+		Meant for startup, before anything else touches the pid files. The
+		process table is listed once and only pids named in pid files are
+		inspected; a process is adopted only if its create time and command
+		line still match its record (records from older hubs, which lack
+		them, need the project's command in the command line). Pid files are
+		rewritten to hold just the adopted processes, with full identities.
+		"""
+		psutil = _psutil()
+
+		records = {p.config.id: self._read_records(p.config.id) for p in projects}
+		commands = {p.config.id: os.path.basename(p.config.command) for p in projects}
+		wanted = {r.pid for recs in records.values() for r in recs}
+		if not wanted:
+			return {}
+		candidates = wanted.intersection(psutil.pids())
+		adopted: Dict[str, List[int]] = {}
+		for project_id, recs in records.items():
+			if not recs:
+				continue
+			keep: Dict[int, int] = {}
+			for idx, record in enumerate(recs):
+				if not record.pid or record.pid not in candidates:
+					continue
+				identity = _identity(record.pid)
+				if identity is None or not record.matches(*identity):
+					continue
+				if record.create_time is None and not self._runs_command(record.pid, commands[project_id]):
+					continue
+				keep[idx] = record.pid
+			self._remove_pid_files(project_id)
+			# Instances keep their index; gone ones below the last kept stay as pid 0 gaps
+			for idx in range(max(keep, default=-1) + 1):
+				if idx in keep:
+					self._write_pid(project_id, idx, keep[idx])
+				else:
+					self._pid_file(project_id, idx).write_text("0", encoding="utf-8")
+			if keep:
+				adopted[project_id] = list(keep.values())
+			if len(keep) != len(recs):
+				logger.info("%s: %d of %d recorded process(es) gone or not ours", project_id, len(recs) - len(keep), len(recs))
+		return adopted
+
+	@staticmethod
+	def _runs_command(pid: int, command: str) -> bool:
+		psutil = _psutil()
+
+		try:
+			return any(os.path.basename(arg) == command for arg in psutil.Process(pid).cmdline())
+		except psutil.Error:
+			return False
 
 	def _remove_pid_files(self, project_id: str) -> None:
 		for idx in range(0, 256):
@@ -68,65 +276,130 @@ class ProcessManager:
 				break
 
 	def is_running(self, project_id: str) -> bool:
-		pids = self._read_pids(project_id)
-		return any(pid and psutil.pid_exists(pid) for pid in pids)
+		return bool(self.alive_pids(project_id))
 
 	def start(self, project: Project, override_args: Optional[list[str]] = None, override_env: Optional[Dict[str, str]] = None) -> OperationResult:
 		if self.is_running(project.config.id):
 			return OperationResult(success=False, message="Process already running", project=project)
-
-		command = self._build_command(project, override_args)
-		env = self._build_env(project, override_env)
 		cwd = Path(project.config.working_dir)
 		if not cwd.exists():
 			return OperationResult(success=False, message=f"Working dir not found: {cwd}", project=project)
 
-		# Configure output handling
-		stdout = subprocess.DEVNULL
-		stderr = subprocess.STDOUT
-		if project.config.log_path:
-			log_path = Path(project.config.log_path)
-			log_path.parent.mkdir(parents=True, exist_ok=True)
-			stdout = open(log_path, "a", encoding="utf-8", buffering=1)
-			stderr = subprocess.STDOUT
-
-		# Use proper flags to hide console window on Windows
-		creationflags = 0
-		if os.name == "nt":
-			creationflags = CREATE_NO_WINDOW | DETACHED_PROCESS
-		
 		procs: List[subprocess.Popen] = []
 		for idx in range(project.config.instances):
 			try:
-				proc = subprocess.Popen(
-					command,
-					cwd=str(cwd),
-					env=env,
-					stdin=subprocess.DEVNULL,
-					stdout=stdout,
-					stderr=stderr,
-					creationflags=creationflags,
-					startupinfo=self._get_startupinfo() if os.name == "nt" else None,
-				)
-				procs.append(proc)
+				procs.append(self._spawn(project, idx, override_args, override_env))
 			except FileNotFoundError as e:
 				return OperationResult(success=False, message=f"Executable not found: {e}", project=project)
 			except Exception as e:
 				return OperationResult(success=False, message=f"Failed to start: {e}", project=project)
 
 		self._running[project.config.id] = procs
-		project.runtime.pids = [p.pid for p in procs]
-		project.runtime.pid = project.runtime.pids[0] if project.runtime.pids else None
 		for idx, proc in enumerate(procs):
 			self._write_pid(project.config.id, idx, proc.pid)
-		project.runtime.status = "running"
+		self._sync_runtime(project, {idx: proc.pid for idx, proc in enumerate(procs)})
 		project.runtime.started_at = datetime.utcnow()
 		return OperationResult(success=True, message="Started", project=project)
 
+	def _spawn(self, project: Project, idx: int, override_args: Optional[list[str]] = None, override_env: Optional[Dict[str, str]] = None) -> subprocess.Popen:
+		"""Start instance ``idx`` of a project.
+
+		``{instance}`` and ``{port}`` in its args are filled in, and
+		NEXTGEN_INSTANCE (plus NEXTGEN_PORT, if ``ports`` has an entry for
+		it) tell the process which instance it is.
+		"""
+		port = instance_port(project.config, idx)
+		command = [fill_instance_template(arg, idx, port) for arg in self._build_command(project, override_args)]
+		env = self._build_env(project, override_env)
+		env["NEXTGEN_INSTANCE"] = str(idx)
+		if port is not None:
+			env["NEXTGEN_PORT"] = str(port)
+
+		# Configure output handling
+		stdout = subprocess.DEVNULL
+		if project.config.log_path:
+			log_path = Path(project.config.log_path)
+			log_path.parent.mkdir(parents=True, exist_ok=True)
+			stdout = open(log_path, "a", encoding="utf-8", buffering=1)
+
+		# Use proper flags to hide console window on Windows
+		creationflags = 0
+		if os.name == "nt":
+			creationflags = CREATE_NO_WINDOW | DETACHED_PROCESS
+		try:
+			return subprocess.Popen(
+				command,
+				cwd=project.config.working_dir,
+				env=env,
+				stdin=subprocess.DEVNULL,
+				stdout=stdout,
+				stderr=subprocess.STDOUT,
+				creationflags=creationflags,
+				startupinfo=self._get_startupinfo() if os.name == "nt" else None,
+				# Own session: a Ctrl+C or restart of the hub must not take services down with it
+				start_new_session=os.name != "nt",
+			)
+		finally:
+			if stdout is not subprocess.DEVNULL:
+				stdout.close()  # the child has its own handle
+
+	def _sync_runtime(self, project: Project, alive: Dict[int, int]) -> None:
+		project.runtime.pids = list(alive.values())
+		project.runtime.pid = project.runtime.pids[0] if project.runtime.pids else None
+		project.runtime.instances = merge_instances(project.runtime.instances, sorted(alive.items()))
+		project.runtime.status = "running" if alive else "stopped"
+
+	def start_instance(self, project: Project, idx: int) -> OperationResult:
+		"""Start instance ``idx`` of a running project in place of one that died or was stopped."""
+		project_id = project.config.id
+		alive = self.alive_instances(project_id)
+		if idx in alive:
+			return OperationResult(success=False, message=f"Instance {idx} already running", project=project)
+		try:
+			proc = self._spawn(project, idx)
+		except FileNotFoundError as e:
+			return OperationResult(success=False, message=f"Executable not found: {e}", project=project)
+		except Exception as e:
+			return OperationResult(success=False, message=f"Failed to start instance {idx}: {e}", project=project)
+		self._running[project_id] = [p for p in self._running.get(project_id, ()) if p.poll() is None] + [proc]
+		# Pid files are read up to the first missing index: fill any gap below this one
+		for gap in range(idx):
+			if not self._pid_file(project_id, gap).exists():
+				self._pid_file(project_id, gap).write_text("0", encoding="utf-8")
+		self._write_pid(project_id, idx, proc.pid)
+		alive[idx] = proc.pid
+		self._sync_runtime(project, dict(sorted(alive.items())))
+		return OperationResult(success=True, message=f"Started instance {idx}", project=project)
+
+	def stop_instance(self, project: Project, idx: int, timeout_seconds: int = 10) -> OperationResult:
+		"""Stop instance ``idx`` only; its pid file is kept (now naming a dead process) for ``start_instance``."""
+		alive = self.alive_instances(project.config.id)
+		pid = alive.pop(idx, None)
+		if pid is not None:
+			self._terminate(pid, timeout_seconds)
+		self._sync_runtime(project, alive)
+		return OperationResult(success=True, message=f"Stopped instance {idx}", project=project)
+
+	@staticmethod
+	def _terminate(pid: int, timeout_seconds: float) -> None:
+		psutil = _psutil()
+
+		try:
+			process = psutil.Process(pid)
+			if os.name == "nt":
+				process.send_signal(signal.SIGTERM)
+			else:
+				process.terminate()
+			try:
+				process.wait(timeout=timeout_seconds)
+			except psutil.TimeoutExpired:
+				process.kill()
+		except psutil.Error:
+			pass
+
 	def _get_startupinfo(self):
 		"""Get startup info to hide console window on Windows"""
 		if os.name == "nt":
-			import subprocess
 			startupinfo = subprocess.STARTUPINFO()
 			startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
 			startupinfo.wShowWindow = subprocess.SW_HIDE
@@ -134,55 +407,48 @@ class ProcessManager:
 		return None
 
 	def stop(self, project: Project, timeout_seconds: int = 10) -> OperationResult:
-		pids = self._read_pids(project.config.id)
-		if not pids:
+		if not self._read_pids(project.config.id):
 			return OperationResult(success=True, message="Already stopped", project=project)
 
-		for pid in pids:
-			try:
-				process = psutil.Process(pid)
-				if os.name == "nt":
-					process.send_signal(signal.SIGTERM)
-				else:
-					process.terminate()
-				try:
-					process.wait(timeout=timeout_seconds)
-				except psutil.TimeoutExpired:
-					process.kill()
-			except psutil.Error:
-				pass
+		# Only signal pids that are still ours; a recycled pid belongs to someone else
+		for pid in self.alive_pids(project.config.id):
+			self._terminate(pid, timeout_seconds)
 		self._remove_pid_files(project.config.id)
 		project.runtime.status = "stopped"
 		project.runtime.stopped_at = datetime.utcnow()
 		project.runtime.last_exit_code = None
 		project.runtime.pids = []
 		project.runtime.pid = None
+		project.runtime.instances = []
 		return OperationResult(success=True, message="Stopped", project=project)
 
 	def status(self, project: Project) -> Project:
-		pids = self._read_pids(project.config.id)
-		alive = [pid for pid in pids if pid and psutil.pid_exists(pid)]
-		project.runtime.pids = alive
-		project.runtime.pid = alive[0] if alive else None
-		project.runtime.status = "running" if alive else "stopped"
+		alive = self.alive_instances(project.config.id)
+		self._sync_runtime(project, alive)
 		
 		# Update uptime if running
 		if alive and project.runtime.started_at:
-			project.runtime.uptime_seconds = (datetime.utcnow() - project.runtime.started_at).total_seconds()
+			project.runtime.metrics.uptime_seconds = (datetime.utcnow() - project.runtime.started_at).total_seconds()
 		
 		return project
 
 	def collect_metrics(self, project: Project) -> Project:
-		pids = self._read_pids(project.config.id)
-		alive = [pid for pid in pids if pid and psutil.pid_exists(pid)]
+		alive = self.alive_pids(project.config.id)
+		m = project.runtime.metrics
 		if not alive:
-			m = project.runtime.metrics
 			m.cpu_percent = 0.0
 			m.memory_rss_mb = 0.0
 			m.memory_vms_mb = 0.0
 			m.threads = 0
 			m.uptime_seconds = None
 			return project
+		for name, value in self.sample(alive).as_dict().items():
+			setattr(m, name, value)
+		return project
+
+	def sample(self, pids: Iterable[int]) -> MetricsSample:
+		"""Resource usage summed over ``pids``; vanished processes count as nothing."""
+		psutil = _psutil()
 
 		total_cpu = 0.0
 		total_rss = 0
@@ -190,7 +456,7 @@ class ProcessManager:
 		total_threads = 0
 		first_create = None
 		
-		for pid in alive:
+		for pid in pids:
 			try:
 				p = psutil.Process(pid)
 				with p.oneshot():
@@ -205,24 +471,22 @@ class ProcessManager:
 					total_threads += p.num_threads()
 					
 					# Get creation time
-					ct = getattr(p, "create_time", None)
+					ct = p.create_time()
 					if ct and (first_create is None or ct < first_create):
 						first_create = ct
 			except psutil.Error:
 				continue
 		
-		m = project.runtime.metrics
-		m.cpu_percent = round(float(total_cpu), 2)
-		m.memory_rss_mb = round(total_rss / (1024 * 1024), 2)
-		m.memory_vms_mb = round(total_vms / (1024 * 1024), 2)
-		m.threads = int(total_threads)
-		m.uptime_seconds = float(time.time() - first_create) if first_create else None
-		
-		# Calculate memory percentage
-		try:
-			system_memory = psutil.virtual_memory()
-			m.memory_percent = round((total_rss / system_memory.total) * 100, 2)
-		except:
-			m.memory_percent = 0.0
-		
-		return project 
\ No newline at end of file
+		if self._total_memory is None:
+			try:
+				self._total_memory = psutil.virtual_memory().total
+			except Exception:
+				self._total_memory = 0
+		return MetricsSample(
+			cpu_percent=round(float(total_cpu), 2),
+			memory_rss_mb=round(total_rss / (1024 * 1024), 2),
+			memory_vms_mb=round(total_vms / (1024 * 1024), 2),
+			memory_percent=round((total_rss / self._total_memory) * 100, 2) if self._total_memory else 0.0,
+			threads=int(total_threads),
+			uptime_seconds=float(time.time() - first_create) if first_create else None,
+		)
@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from types import CodeType, FrameType
+from typing import Dict, List, Optional, Tuple
+
+
+class ProfilerBusy(Exception):
+	"""Raised when a profile is requested while another one is running."""
+
+
+class SamplingProfiler:
+	"""Statistical profiler that samples every thread's stack via ``sys._current_frames``.
+
+	Sampling runs on the calling thread (run it in an executor from async
+	code); the sampled threads are never paused beyond the GIL hand-off of
+	each ``_current_frames`` call. Output is in the collapsed-stack format
+	consumed by flamegraph.pl and speedscope: ``thread;outer;inner count``.
+	Only one profile runs at a time.
+	"""
+
+	def __init__(self) -> None:
+		self._lock = threading.Lock()
+		self._labels: Dict[CodeType, str] = {}
+
+	@property
+	def busy(self) -> bool:
+		return self._lock.locked()
+
+	def _label(self, code: CodeType) -> str:
+		label = self._labels.get(code)
+		if label is None:
+			label = f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+			self._labels[code] = label
+		return label
+
+	def _stack(self, frame: Optional[FrameType]) -> Tuple[str, ...]:
+		labels: List[str] = []
+		while frame is not None:
+			labels.append(self._label(frame.f_code))
+			frame = frame.f_back
+		labels.reverse()
+		return tuple(labels)
+
+	def sample(self, seconds: float, interval_seconds: float = 0.01) -> "Counter[Tuple[str, ...]]":
+		"""Sample all threads for ``seconds``; returns stack tuples (thread name first) with counts."""
+		if not self._lock.acquire(blocking=False):
+			raise ProfilerBusy("A profile is already running")
+		try:
+			own = threading.get_ident()
+			counts: "Counter[Tuple[str, ...]]" = Counter()
+			deadline = time.monotonic() + seconds
+			while time.monotonic() < deadline:
+				names = {t.ident: t.name for t in threading.enumerate()}
+				for ident, frame in sys._current_frames().items():
+					if ident == own:
+						continue
+					thread = names.get(ident, f"thread-{ident}")
+					counts[(thread,) + self._stack(frame)] += 1
+				time.sleep(interval_seconds)
+			return counts
+		finally:
+			self._labels.clear()
+			self._lock.release()
+
+	def collapsed(self, seconds: float, interval_seconds: float = 0.01) -> str:
+		counts = self.sample(seconds, interval_seconds)
+		lines = [f"{';'.join(stack)} {n}" for stack, n in counts.most_common()]
+		return "\n".join(lines) + ("\n" if lines else "")
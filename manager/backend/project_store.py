@@ -1,80 +1,669 @@
 from __future__ import annotations
 
+import abc
+import hashlib
+import logging
+import os
+import pickle
+import shutil
 import threading
+import time
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import TYPE_CHECKING, Any, Callable, Dict, FrozenSet, Hashable, Iterable, List, Optional, Sequence, Set, Tuple
 
 import yaml
 from pydantic import ValidationError
 
+from .file_watcher import FileWatcher
+from .instrumentation import RollingHistogram
 from .models import Project, ProjectConfig, ProjectRuntime
 
+if TYPE_CHECKING:
+	from .runtime_journal import RuntimeJournal
 
-class ProjectStore:
-	"""Simple YAML-backed store for project configurations and lightweight runtime mirrors."""
 
-	def __init__(self, yaml_path: Path) -> None:
-		self._yaml_path = yaml_path
+logger = logging.getLogger(__name__)
+
+# libyaml bindings are ~10x faster; PyYAML ships without them on some platforms
+_SafeLoader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+_SafeDumper = getattr(yaml, "CSafeDumper", yaml.SafeDumper)
+
+# Bump when the snapshot cache layout changes
+_CACHE_VERSION = 1
+CacheKey = Tuple[int, int, str]
+
+
+def _schema_fingerprint() -> str:
+	"""Changes whenever a config model gains, loses or retypes a field."""
+	from .models import HealthcheckConfig, RestartPolicy
+	parts = []
+	for model in (ProjectConfig, HealthcheckConfig, RestartPolicy):
+		parts.extend(f"{model.__name__}.{name}:{info.annotation!r}:{info.default!r}" for name, info in model.model_fields.items())
+	return hashlib.sha256("\n".join(parts).encode("utf-8")).hexdigest()
+
+
+@dataclass
+class StoreDiff:
+	"""What a reload of the backing file changed; unchanged projects are not listed."""
+
+	added: List[Project] = field(default_factory=list)
+	removed: List[Project] = field(default_factory=list)
+	# (new version, previous config); the runtime carries over unchanged
+	changed: List[Tuple[Project, ProjectConfig]] = field(default_factory=list)
+
+	def __bool__(self) -> bool:
+		return bool(self.added or self.removed or self.changed)
+
+	def summary(self) -> Dict[str, List[str]]:
+		return {
+			"added": [p.config.id for p in self.added],
+			"removed": [p.config.id for p in self.removed],
+			"changed": [p.config.id for p, _ in self.changed],
+		}
+
+
+# Secondary indexes kept on every snapshot: name -> the keys a project is filed under
+INDEXED_FIELDS: Dict[str, Callable[[Project], Iterable[Hashable]]] = {
+	"status": lambda p: (p.runtime.status,),
+	"health": lambda p: (p.runtime.health.status,),
+	"port": lambda p: p.config.ports,
+	"command": lambda p: (p.config.command,),
+	"tag": lambda p: p.config.tags,
+}
+
+Postings = Dict[Hashable, FrozenSet[str]]
+
+
+class ProjectSnapshot:
+	"""One published version of a store: projects in order plus secondary indexes.
+
+	The indexes map each status, health status, declared port, command and
+	tag to the ids filed under it. A snapshot is never changed once
+	published; ``evolve`` builds the next one, re-filing only the projects
+	that changed, so a tick where nothing changed status costs nothing here.
+	"""
+
+	__slots__ = ("projects", "index", "postings", "restarts_total", "_positions")
+
+	def __init__(self, index: Dict[str, Project], postings: Dict[str, Postings], restarts_total: int) -> None:
+		self.projects: Tuple[Project, ...] = tuple(index.values())
+		self.index = index
+		self.postings = postings
+		self.restarts_total = restarts_total
+		self._positions: Optional[Dict[str, int]] = None
+
+	@classmethod
+	def build(cls, index: Dict[str, Project]) -> "ProjectSnapshot":
+		postings: Dict[str, Dict[Hashable, Set[str]]] = {name: {} for name in INDEXED_FIELDS}
+		for pid, project in index.items():
+			for name, keys in INDEXED_FIELDS.items():
+				for key in keys(project):
+					postings[name].setdefault(key, set()).add(pid)
+		frozen = {name: {k: frozenset(ids) for k, ids in by_key.items()} for name, by_key in postings.items()}
+		return cls(index, frozen, sum(p.runtime.restarts_total for p in index.values()))
+
+	def evolve(self, index: Dict[str, Project], changed: Iterable[str]) -> "ProjectSnapshot":
+		"""The snapshot for ``index``, which differs from this one only in the ``changed`` ids."""
+		added: Dict[str, Dict[Hashable, Set[str]]] = {}
+		removed: Dict[str, Dict[Hashable, Set[str]]] = {}
+		restarts = self.restarts_total
+		for pid in changed:
+			old = self.index.get(pid)
+			new = index.get(pid)
+			if old is new:
+				continue
+			if old is not None:
+				restarts -= old.runtime.restarts_total
+			if new is not None:
+				restarts += new.runtime.restarts_total
+			for name, keys in INDEXED_FIELDS.items():
+				if old is not None and new is not None and keys(old) == keys(new):
+					continue  # the usual case: a runtime update that leaves every key alone
+				before = set(keys(old)) if old is not None else set()
+				after = set(keys(new)) if new is not None else set()
+				for key in before - after:
+					removed.setdefault(name, {}).setdefault(key, set()).add(pid)
+				for key in after - before:
+					added.setdefault(name, {}).setdefault(key, set()).add(pid)
+		postings = self.postings
+		if added or removed:
+			postings = dict(postings)
+			for name in added.keys() | removed.keys():
+				by_key = postings[name] = dict(postings[name])
+				gone, new_ids = removed.get(name, {}), added.get(name, {})
+				for key in gone.keys() | new_ids.keys():
+					ids = (by_key.get(key, frozenset()) - gone.get(key, set())) | new_ids.get(key, set())
+					if ids:
+						by_key[key] = frozenset(ids)
+					else:
+						by_key.pop(key, None)
+		return ProjectSnapshot(index, postings, restarts)
+
+	def __len__(self) -> int:
+		return len(self.projects)
+
+	def ids(self, index_name: str, key: Hashable) -> FrozenSet[str]:
+		return self.postings[index_name].get(key, frozenset())
+
+	def count(self, index_name: str, key: Hashable) -> int:
+		return len(self.postings[index_name].get(key, ()))
+
+	def counts(self, index_name: str) -> Dict[Hashable, int]:
+		"""Number of projects under each key of one index, e.g. per status."""
+		return {key: len(ids) for key, ids in self.postings[index_name].items()}
+
+	def query(self, **criteria: Any) -> List[Project]:
+		"""Projects matching every criterion, in store order.
+
+		Each keyword names an index (``status``, ``health``, ``port``,
+		``command``, ``tag``); its value is one key or a collection of
+		keys, any of which matches. ``None`` means no constraint.
+		"""
+		selected: Optional[FrozenSet[str]] = None
+		for name, wanted in criteria.items():
+			if wanted is None:
+				continue
+			if name not in INDEXED_FIELDS:
+				raise ValueError(f"Not an indexed field: {name}")
+			keys = wanted if isinstance(wanted, (set, frozenset, list, tuple)) else (wanted,)
+			ids = frozenset().union(*(self.ids(name, k) for k in keys))
+			selected = ids if selected is None else selected & ids
+			if not selected:
+				return []
+		if selected is None:
+			return list(self.projects)
+		if len(selected) * 4 >= len(self.projects):
+			return [p for p in self.projects if p.config.id in selected]
+		if self._positions is None:
+			self._positions = {pid: i for i, pid in enumerate(self.index)}
+		positions = self._positions
+		return [self.index[pid] for pid in sorted(selected, key=positions.__getitem__)]
+
+	def port_conflicts(self) -> Dict[int, List[str]]:
+		"""Ports declared by more than one project, with the ids claiming them."""
+		return {port: sorted(ids) for port, ids in self.postings["port"].items() if len(ids) > 1}
+
+
+class BaseProjectStore(abc.ABC):
+	"""Interface shared by the project store backends.
+
+	Stores publish copy-on-write snapshots (``ProjectSnapshot``):
+	``list_projects`` returns an immutable tuple and ``get_project`` reads
+	the matching index, both swapped in as one reference, so readers never
+	lock and never see half of a write. Filters and counts should go
+	through ``snapshot()`` and its secondary indexes instead of scanning.
+	Published ``Project`` objects must not be changed; a writer ``fork()``s
+	one, updates the copy and ``publish``es it as the next version.
+	Backends record their writes in the shared instrumentation below,
+	which feeds /metrics and /api/system/store.
+	"""
+
+	def __init__(self) -> None:
+		# Serializes writers; readers never take it
 		self._lock = threading.RLock()
-		self._projects: Dict[str, Project] = {}
+		self._snapshot = ProjectSnapshot.build({})
+		self.version = 0
+		self._journal: Optional["RuntimeJournal"] = None
+		self.write_latency = RollingHistogram(window=500)
+		self.batch_sizes = RollingHistogram(window=500)
+		self.writes_total = 0
+		self.write_errors_total = 0
+
+	def _swap(self, index: Dict[str, Project], changed: Optional[Iterable[str]] = None) -> None:
+		"""Publish ``index`` (a fresh dict, never mutated afterwards) as the next version; call with _lock held.
+
+		``changed`` lists the ids that differ from the current version so the
+		indexes are updated incrementally; None rebuilds them.
+		"""
+		previous = self._snapshot
+		if changed is None:
+			self._snapshot = ProjectSnapshot.build(index)
+		else:
+			changed = tuple(changed)
+			self._snapshot = previous.evolve(index, changed)
+		self.version += 1
+		journal = self._journal
+		if journal is not None and changed is not None:
+			gone = [pid for pid in changed if pid not in index]
+			if gone:
+				journal.forget(gone)
+			journal.record(
+				index[pid] for pid in changed
+				if pid in index and (pid not in previous.index or previous.index[pid].runtime is not index[pid].runtime)
+			)
+
+	def attach_journal(self, journal: "RuntimeJournal") -> None:
+		"""Record durable runtime changes of every later version in ``journal``."""
+		with self._lock:
+			self._journal = journal
+
+	def snapshot(self) -> ProjectSnapshot:
+		"""The current version, with every project loaded; hold on to it for consistent reads."""
+		return self._snapshot
+
+	def list_projects(self) -> Sequence[Project]:
+		return self._snapshot.projects
+
+	def get_project(self, project_id: str) -> Optional[Project]:
+		return self._snapshot.index.get(project_id)
+
+	@abc.abstractmethod
+	def upsert_project(self, config: ProjectConfig) -> Project:
+		"""Insert or replace a project's config and persist it."""
+
+	@abc.abstractmethod
+	def delete_project(self, project_id: str) -> bool:
+		"""Remove a project; returns whether it existed."""
+
+	def publish(self, updates: Iterable[Tuple[Project, Project]], force: bool = False) -> Dict[str, Project]:
+		"""Swap in new versions of several projects at once; returns those published, by id.
+
+		``updates`` are ``(base, new)`` pairs where ``new`` is normally a
+		changed ``fork(base)``. A pair only applies while ``base`` is still
+		the current version, so a slow writer (a tick that awaited health
+		checks) cannot overwrite a newer one; the next tick redoes its work.
+		With ``force`` a stale pair still lands, as ``new``'s runtime on the
+		current config: use it for process changes that really happened.
+		Deleted projects are skipped. Runtime is not persisted, so nothing
+		is marked dirty.
+		"""
+		with self._lock:
+			current = self._snapshot.index
+			index: Optional[Dict[str, Project]] = None
+			published: Dict[str, Project] = {}
+			for base, new in updates:
+				pid = base.config.id
+				now = current.get(pid)
+				if now is None:
+					continue
+				if now is not base:
+					if not force:
+						continue
+					new = Project.model_construct(config=now.config, runtime=new.runtime)
+				if index is None:
+					index = dict(current)
+				index[pid] = published[pid] = new
+			if index is not None:
+				self._swap(index, published)
+			return published
+
+	def find_projects(self, name: Optional[str] = None, tag: Optional[str] = None) -> List[Project]:
+		"""Projects with exactly this name and/or carrying this tag."""
+		return [p for p in self.snapshot().query(tag=tag) if name is None or p.config.name == name]
+
+	@property
+	def pending_changes(self) -> int:
+		return 0
+
+	def flush(self) -> None:
+		"""Persist anything not yet on disk."""
+
+	def watch(self, on_reload: Callable[[StoreDiff], None]) -> bool:
+		"""Follow edits made to the backing storage by others; False if unsupported."""
+		return False
+
+	def unwatch(self) -> None:
+		pass
+
+	def close(self) -> None:
+		self.unwatch()
+		self.flush()
+
+	def _record_write(self, started: float, batch: int) -> None:
+		self.write_latency.observe(time.perf_counter() - started)
+		self.batch_sizes.observe(batch)
+		self.writes_total += 1
+
+	def stats(self) -> dict:
+		return {
+			"backend": type(self).__name__,
+			"pending_changes": self.pending_changes,
+			"writes_total": self.writes_total,
+			"write_errors_total": self.write_errors_total,
+			"write_latency": self.write_latency.snapshot(),
+			"batch_size_mean": round(self.batch_sizes.sum / self.batch_sizes.count, 2) if self.batch_sizes.count else 0.0,
+			"batch_size_max": int(self.batch_sizes.max),
+			"journal": self._journal.stats() if self._journal is not None else None,
+		}
+
+
+class ProjectStore(BaseProjectStore):
+	"""Simple YAML-backed store for project configurations and lightweight runtime mirrors.
+
+	Changes are written behind: the first change after a write arms a timer,
+	and everything that happens within ``flush_delay_seconds`` is persisted
+	in one write to a temp file that is fsynced and renamed over the YAML
+	file, so a crash leaves either the old or the new file, never half of
+	one. Call ``flush()`` before exiting (the app does on shutdown).
+
+	Next to the YAML file a pickled snapshot of the validated configs is
+	kept (``.projects.yaml.cache``), keyed by the file's mtime, size and
+	SHA-256 plus the config schema. While they match, startup skips YAML
+	parsing and validation; any mismatch falls back to a normal load.
+
+	``watch()`` follows edits made to the file by hand or by config
+	management: the new content is diffed against memory and only added,
+	removed and changed projects are touched, so everything else keeps its
+	runtime state. The file wins over in-memory changes not yet flushed.
+	"""
+
+	def __init__(self, yaml_path: Path, flush_delay_seconds: float = 0.2, snapshot_cache: bool = True) -> None:
+		super().__init__()
+		self._yaml_path = yaml_path
+		# Serializes file writes; taken before _lock, never while holding it
+		self._write_lock = threading.Lock()
+		self.flush_delay_seconds = flush_delay_seconds
+		self._pending = 0
+		self._timer: Optional[threading.Timer] = None
+		self._load_failed = False
+		self._cache_path: Optional[Path] = yaml_path.with_name(f".{yaml_path.name}.cache") if snapshot_cache else None
+		self.load_info: Dict[str, object] = {}
+		# Identity of the file content memory currently reflects (mtime_ns, size, sha256)
+		self._disk_key: Optional[CacheKey] = None
+		self._watcher: Optional[FileWatcher] = None
+		self._on_reload: Optional[Callable[[StoreDiff], None]] = None
+		self.reloads_total = 0
+		self.last_reload: Dict[str, object] = {}
 		self._yaml_path.parent.mkdir(parents=True, exist_ok=True)
 		self._load_from_disk()
 
 	def _load_from_disk(self) -> None:
-		if not self._yaml_path.exists():
-			self._projects = {}
+		started = time.perf_counter()
+		source = "empty"
+		configs: List[ProjectConfig] = []
+		if self._yaml_path.exists():
+			try:
+				with self._yaml_path.open("rb") as f:
+					raw = f.read()
+					st = os.fstat(f.fileno())
+				key: CacheKey = (st.st_mtime_ns, st.st_size, hashlib.sha256(raw).hexdigest())
+				self._disk_key = key
+				cached = self._read_cache(key)
+				if cached is not None:
+					configs, source = cached, "cache"
+				else:
+					configs, source = self._parse(raw), "yaml"
+					self._write_cache(key, configs)
+			except Exception:
+				# On any YAML read/parse error, treat as empty store (the file is
+				# set aside before the first write replaces it)
+				logger.exception("Could not load %s; starting with an empty store", self._yaml_path)
+				self._load_failed = True
+				configs, source = [], "error"
+		with self._lock:
+			self._swap({c.id: Project(config=c, runtime=ProjectRuntime()) for c in configs})
+		self.load_info = {
+			"source": source,
+			"projects": len(configs),
+			"ms": round((time.perf_counter() - started) * 1000, 2),
+		}
+
+	@staticmethod
+	def _parse(raw: bytes) -> List[ProjectConfig]:
+		data = yaml.load(raw, Loader=_SafeLoader) or {}
+		# Ensure data is a dict
+		if not isinstance(data, dict):
+			data = {}
+		configs: List[ProjectConfig] = []
+		for item in data.get("projects", []) or []:
+			try:
+				configs.append(ProjectConfig(**item))
+			except ValidationError:
+				continue
+		return configs
+
+	def _read_cache(self, key: CacheKey) -> Optional[List[ProjectConfig]]:
+		if self._cache_path is None or not self._cache_path.exists():
+			return None
+		try:
+			with self._cache_path.open("rb") as f:
+				snapshot = pickle.load(f)
+		except Exception:
+			return None
+		if (
+			not isinstance(snapshot, dict)
+			or snapshot.get("version") != _CACHE_VERSION
+			or snapshot.get("schema") != _schema_fingerprint()
+			or tuple(snapshot.get("key") or ()) != key
+		):
+			return None
+		return snapshot["configs"]
+
+	def _write_cache(self, key: CacheKey, configs: List[ProjectConfig]) -> None:
+		if self._cache_path is None:
 			return
+		snapshot = {"version": _CACHE_VERSION, "schema": _schema_fingerprint(), "key": key, "configs": configs}
+		tmp = self._cache_path.with_name(f"{self._cache_path.name}.{os.getpid()}.tmp")
 		try:
-			with self._yaml_path.open("r", encoding="utf-8") as f:
-				data = yaml.safe_load(f) or {}
-				# Ensure data is a dict
-				if not isinstance(data, dict):
-					data = {}
-				projects: Dict[str, Project] = {}
-				items = data.get("projects", []) if isinstance(data, dict) else []
-				for item in items:
-					try:
-						config = ProjectConfig(**item)
-						projects[config.id] = Project(config=config, runtime=ProjectRuntime())
-					except ValidationError:
-						continue
-				self._projects = projects
+			with tmp.open("wb") as f:
+				pickle.dump(snapshot, f, protocol=pickle.HIGHEST_PROTOCOL)
+			os.replace(tmp, self._cache_path)
 		except Exception:
-			# On any YAML read/parse error, treat as empty store
-			self._projects = {}
+			# Only a speed-up; the YAML file stays the source of truth
+			logger.debug("Could not write snapshot cache %s", self._cache_path, exc_info=True)
+			try:
+				tmp.unlink()
+			except OSError:
+				pass
 
-	def _write_to_disk(self) -> None:
-		data = {"projects": [p.config.model_dump() for p in self._projects.values()]}
-		with self._yaml_path.open("w", encoding="utf-8") as f:
-			yaml.safe_dump(data, f, sort_keys=False, allow_unicode=True)
+	def _mark_dirty(self) -> None:
+		"""Record a change and make sure a write is scheduled (call with _lock held)."""
+		self._pending += 1
+		if self._timer is None:
+			self._timer = threading.Timer(self.flush_delay_seconds, self._flush_in_background)
+			self._timer.name = "project-store-flush"
+			self._timer.start()
 
-	def list_projects(self) -> List[Project]:
-		with self._lock:
-			return list(self._projects.values())
+	def _flush_in_background(self) -> None:
+		try:
+			self.flush()
+		except Exception:
+			logger.exception("Failed to persist %s; will retry", self._yaml_path)
+			with self._lock:
+				if self._timer is None and self._pending:
+					self._timer = threading.Timer(max(1.0, self.flush_delay_seconds), self._flush_in_background)
+					self._timer.start()
 
-	def get_project(self, project_id: str) -> Optional[Project]:
-		with self._lock:
-			return self._projects.get(project_id)
+	def flush(self) -> None:
+		"""Persist pending changes now; a no-op when there are none."""
+		with self._write_lock:
+			with self._lock:
+				if self._timer is not None:
+					self._timer.cancel()
+					self._timer = None
+				if not self._pending:
+					return
+				batch, self._pending = self._pending, 0
+				configs = [p.config for p in self._snapshot.projects]
+			started = time.perf_counter()
+			try:
+				self._write_atomic(configs)
+			except Exception:
+				self.write_errors_total += 1
+				with self._lock:
+					self._pending += batch
+				raise
+			self._record_write(started, batch)
 
-	def upsert_project(self, config: ProjectConfig) -> Project:
-		with self._lock:
-			project = self._projects.get(config.id)
+	def _write_atomic(self, configs: List[ProjectConfig]) -> None:
+		path = self._yaml_path
+		data = {"projects": [c.model_dump() for c in configs]}
+		raw = yaml.dump(data, Dumper=_SafeDumper, sort_keys=False, allow_unicode=True).encode("utf-8")
+		if self._load_failed and path.exists():
+			backup = path.with_name(f"{path.name}.corrupt-{int(time.time())}")
+			shutil.copy2(path, backup)
+			logger.warning("Kept unreadable %s as %s", path, backup)
+		self._load_failed = False
+		tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+		try:
+			with tmp.open("wb") as f:
+				f.write(raw)
+				f.flush()
+				os.fsync(f.fileno())
+				st = os.fstat(f.fileno())
+			os.replace(tmp, path)
+		except BaseException:
+			try:
+				tmp.unlink()
+			except OSError:
+				pass
+			raise
+		_fsync_dir(path.parent)
+		key = (st.st_mtime_ns, st.st_size, hashlib.sha256(raw).hexdigest())
+		self._disk_key = key
+		# What we just wrote is already validated: the next start can skip parsing it
+		self._write_cache(key, configs)
+
+	def reload(self) -> Optional[StoreDiff]:
+		"""Re-read the file and apply what changed; None if the content is what we already have."""
+		with self._write_lock:
+			try:
+				with self._yaml_path.open("rb") as f:
+					raw = f.read()
+					st = os.fstat(f.fileno())
+			except FileNotFoundError:
+				# Mid-rename or deleted by hand: keep what we have, the next write recreates it
+				return None
+			key: CacheKey = (st.st_mtime_ns, st.st_size, hashlib.sha256(raw).hexdigest())
+			if key == self._disk_key:
+				return None
+			started = time.perf_counter()
+			try:
+				configs = self._parse(raw)
+			except Exception:
+				logger.exception("Ignoring unreadable edit of %s; keeping the current projects", self._yaml_path)
+				self._disk_key = key
+				# Set the broken edit aside rather than overwriting it on the next write
+				self._load_failed = True
+				return None
+			with self._lock:
+				diff = self._apply_configs(configs)
+				self._disk_key = key
+				self._load_failed = False
+			self._write_cache(key, configs)
+			self.reloads_total += 1
+			self.last_reload = {
+				**diff.summary(),
+				"ms": round((time.perf_counter() - started) * 1000, 2),
+				"at": time.time(),
+			}
+		if diff:
+			logger.info(
+				"Reloaded %s: %d added, %d removed, %d changed",
+				self._yaml_path, len(diff.added), len(diff.removed), len(diff.changed),
+			)
+		return diff
+
+	def _apply_configs(self, configs: List[ProjectConfig]) -> StoreDiff:
+		"""Make memory match ``configs``, keeping unchanged projects as they are (call with _lock held)."""
+		diff = StoreDiff()
+		old = self._snapshot.index
+		projects: Dict[str, Project] = {}
+		for config in configs:
+			project = old.get(config.id)
 			if project is None:
 				project = Project(config=config, runtime=ProjectRuntime())
-				self._projects[config.id] = project
-			else:
-				project.config = config
-			self._write_to_disk()
+				diff.added.append(project)
+			elif project.config != config:
+				previous = project.config
+				project = Project.model_construct(config=config, runtime=project.runtime)
+				diff.changed.append((project, previous))
+			projects[config.id] = project
+		diff.removed = [p for pid, p in old.items() if pid not in projects]
+		if self._pending:
+			logger.warning("%s was edited on disk; discarding %d unsaved change(s)", self._yaml_path, self._pending)
+			self._pending = 0
+			if self._timer is not None:
+				self._timer.cancel()
+				self._timer = None
+		changed = [p.config.id for p in diff.added + diff.removed] + [p.config.id for p, _ in diff.changed]
+		self._swap(projects, changed)
+		return diff
+
+	def watch(self, on_reload: Callable[[StoreDiff], None], poll_interval_seconds: float = 1.0) -> bool:
+		self._on_reload = on_reload
+		if self._watcher is None:
+			self._watcher = FileWatcher(self._yaml_path, self._file_changed, poll_interval_seconds=poll_interval_seconds)
+			self._watcher.start()
+		return True
+
+	def unwatch(self) -> None:
+		if self._watcher is not None:
+			self._watcher.stop()
+			self._watcher = None
+		self._on_reload = None
+
+	def _file_changed(self) -> None:
+		diff = self.reload()
+		callback = self._on_reload
+		if diff and callback is not None:
+			callback(diff)
+
+	@property
+	def pending_changes(self) -> int:
+		return self._pending
+
+	def stats(self) -> dict:
+		return {
+			**super().stats(),
+			"load": self.load_info,
+			"watch": self._watcher.backend if self._watcher is not None else None,
+			"reloads_total": self.reloads_total,
+			"last_reload": self.last_reload,
+		}
+
+	def upsert_project(self, config: ProjectConfig) -> Project:
+		with self._lock:
+			index = dict(self._snapshot.index)
+			current = index.get(config.id)
+			project = Project(config=config, runtime=current.runtime if current is not None else ProjectRuntime())
+			index[config.id] = project
+			self._swap(index, (config.id,))
+			self._mark_dirty()
 			return project
 
 	def delete_project(self, project_id: str) -> bool:
 		with self._lock:
-			if project_id in self._projects:
-				del self._projects[project_id]
-				self._write_to_disk()
-				return True
-			return False
+			if project_id not in self._snapshot.index:
+				return False
+			index = dict(self._snapshot.index)
+			del index[project_id]
+			self._swap(index, (project_id,))
+			self._mark_dirty()
+			return True
+
+
+def _fsync_dir(directory: Path) -> None:
+	"""Make a rename durable; directories can't be opened for fsync on Windows."""
+	if os.name == "nt":
+		return
+	try:
+		fd = os.open(str(directory), os.O_RDONLY)
+	except OSError:
+		return
+	try:
+		os.fsync(fd)
+	except OSError:
+		pass
+	finally:
+		os.close(fd)
 
 
 def default_store_path() -> Path:
-	return Path("manager/data/projects.yaml").resolve() 
\ No newline at end of file
+	return Path("manager/data/projects.yaml").resolve()
+
+
+SQLITE_SUFFIXES = (".db", ".sqlite", ".sqlite3")
+
+
+def open_store(path: Path, backend: Optional[str] = None) -> BaseProjectStore:
+	"""Open a project store; ``backend`` is "yaml" or "sqlite", inferred from the suffix when omitted."""
+	if backend is None:
+		backend = "sqlite" if path.suffix.lower() in SQLITE_SUFFIXES else "yaml"
+	if backend == "sqlite":
+		from .sqlite_store import SqliteProjectStore
+		return SqliteProjectStore(path)
+	if backend == "yaml":
+		return ProjectStore(path)
+	raise ValueError(f"Unknown store backend: {backend!r} (expected 'yaml' or 'sqlite')") 
\ No newline at end of file
@@ -0,0 +1,166 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Dict, List, Optional, Sequence, Tuple
+
+from .models import Project
+
+if TYPE_CHECKING:
+	from .instrumentation import RollingHistogram
+	from .orchestrator import Orchestrator
+	from .project_store import BaseProjectStore
+	from .watchdog import LoopLagWatchdog
+
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+_MB = 1024 * 1024
+_HEALTH_VALUES = {"healthy": 1, "unhealthy": 0}
+
+
+def _escape(value: str) -> str:
+	return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _fmt(value: float) -> str:
+	if value != value:  # NaN
+		return "NaN"
+	if value in (float("inf"), float("-inf")):
+		return "+Inf" if value > 0 else "-Inf"
+	if value == int(value) and abs(value) < 1e15:
+		return str(int(value))
+	return repr(float(value))
+
+
+class MetricsExporter:
+	"""Renders the Prometheus text exposition format from cached runtime state.
+
+	Only values already collected by the orchestrator are read; nothing here
+	touches psutil, so a scrape costs string formatting and nothing else.
+	Escaped ``project="..."`` label strings are cached per project id.
+	"""
+
+	def __init__(self) -> None:
+		self._labels: Dict[str, str] = {}
+
+	def _project_label(self, project_id: str) -> str:
+		label = self._labels.get(project_id)
+		if label is None:
+			if len(self._labels) > 10000:
+				self._labels.clear()
+			label = self._labels[project_id] = f'project="{_escape(project_id)}"'
+		return label
+
+	def render(
+		self,
+		projects: Sequence[Project],
+		orchestrator: Optional["Orchestrator"] = None,
+		watchdog: Optional["LoopLagWatchdog"] = None,
+		store: Optional["BaseProjectStore"] = None,
+	) -> str:
+		up: List[str] = []
+		status: List[str] = []
+		instances: List[str] = []
+		instance_up: List[str] = []
+		cpu: List[str] = []
+		rss: List[str] = []
+		vms: List[str] = []
+		threads: List[str] = []
+		uptime: List[str] = []
+		restarts: List[str] = []
+		health: List[str] = []
+		latency: List[str] = []
+
+		for p in projects:
+			label = self._project_label(p.config.id)
+			rt = p.runtime
+			running = rt.status == "running"
+			up.append(f"nextgen_project_up{{{label}}} {1 if running else 0}")
+			status.append(f'nextgen_project_status{{{label},status="{rt.status}"}} 1')
+			instances.append(f"nextgen_project_instances{{{label}}} {len(rt.pids)}")
+			for idx, pid in enumerate(rt.pids):
+				instance_up.append(f'nextgen_project_instance_up{{{label},instance="{idx}",pid="{pid}"}} 1')
+			restarts.append(f"nextgen_project_restarts_total{{{label}}} {rt.restarts_total}")
+			if running:
+				m = rt.metrics
+				cpu.append(f"nextgen_project_cpu_percent{{{label}}} {_fmt(m.cpu_percent)}")
+				rss.append(f"nextgen_project_memory_rss_bytes{{{label}}} {int(m.memory_rss_mb * _MB)}")
+				vms.append(f"nextgen_project_memory_vms_bytes{{{label}}} {int(m.memory_vms_mb * _MB)}")
+				threads.append(f"nextgen_project_threads{{{label}}} {m.threads}")
+				if m.uptime_seconds is not None:
+					uptime.append(f"nextgen_project_uptime_seconds{{{label}}} {_fmt(m.uptime_seconds)}")
+			h = rt.health
+			if h.status in _HEALTH_VALUES:
+				health.append(f"nextgen_project_healthy{{{label}}} {_HEALTH_VALUES[h.status]}")
+			if h.latency_ms is not None:
+				latency.append(f"nextgen_project_health_latency_seconds{{{label}}} {_fmt(h.latency_ms / 1000)}")
+
+		out: List[str] = []
+		_family(out, "nextgen_project_up", "gauge", "Whether any instance of the project is running.", up)
+		_family(out, "nextgen_project_status", "gauge", "Current runtime status of the project (one series per project).", status)
+		_family(out, "nextgen_project_instances", "gauge", "Number of live instance processes.", instances)
+		_family(out, "nextgen_project_instance_up", "gauge", "Live instance processes by instance index and PID.", instance_up)
+		_family(out, "nextgen_project_cpu_percent", "gauge", "CPU usage summed over instances, in percent.", cpu)
+		_family(out, "nextgen_project_memory_rss_bytes", "gauge", "Resident memory summed over instances.", rss)
+		_family(out, "nextgen_project_memory_vms_bytes", "gauge", "Virtual memory summed over instances.", vms)
+		_family(out, "nextgen_project_threads", "gauge", "Threads summed over instances.", threads)
+		_family(out, "nextgen_project_uptime_seconds", "gauge", "Seconds since the oldest instance started.", uptime)
+		_family(out, "nextgen_project_restarts_total", "counter", "Automatic restarts performed by the hub.", restarts)
+		_family(out, "nextgen_project_healthy", "gauge", "Result of the last health check (1 healthy, 0 unhealthy).", health)
+		_family(out, "nextgen_project_health_latency_seconds", "gauge", "Duration of the last health check.", latency)
+		_family(out, "nextgen_hub_projects", "gauge", "Projects configured in the hub.", [f"nextgen_hub_projects {len(projects)}"])
+		if orchestrator is not None:
+			_render_loop(out, orchestrator)
+		if watchdog is not None and watchdog.lag.count:
+			_summary(out, "nextgen_hub_event_loop_lag_seconds", "Event-loop scheduling lag measured by the watchdog.", [("", watchdog.lag)])
+			_family(out, "nextgen_hub_event_loop_stalls_total", "counter", "Lag samples over the watchdog threshold.", [
+				f"nextgen_hub_event_loop_stalls_total {watchdog.stalls_total}",
+			])
+		if store is not None:
+			_render_store(out, store)
+		out.append("")
+		return "\n".join(out)
+
+
+def _family(out: List[str], name: str, kind: str, help_text: str, samples: List[str]) -> None:
+	if not samples:
+		return
+	out.append(f"# HELP {name} {help_text}")
+	out.append(f"# TYPE {name} {kind}")
+	out.extend(samples)
+
+
+def _summary(out: List[str], name: str, help_text: str, hists: List[Tuple[str, "RollingHistogram"]]) -> None:
+	samples: List[str] = []
+	for label, hist in hists:
+		sep = "," if label else ""
+		for q, v in hist.quantiles().items():
+			samples.append(f'{name}{{{label}{sep}quantile="{q}"}} {_fmt(v)}')
+		suffix = f"{{{label}}}" if label else ""
+		samples.append(f"{name}_sum{suffix} {_fmt(hist.sum)}")
+		samples.append(f"{name}_count{suffix} {hist.count}")
+	_family(out, name, "summary", help_text, samples)
+
+
+def _render_loop(out: List[str], orch: "Orchestrator") -> None:
+	prof = orch.profiler
+	_summary(out, "nextgen_hub_tick_duration_seconds", "Duration of orchestrator loop ticks.", [("", prof.tick)])
+	_summary(out, "nextgen_hub_tick_phase_duration_seconds", "Duration of each orchestrator tick phase.", [
+		(f'phase="{name}"', hist) for name, hist in prof.phases.items() if hist.count
+	])
+	_family(out, "nextgen_hub_tick_overruns_total", "counter", "Ticks that exceeded the tick budget.", [
+		f"nextgen_hub_tick_overruns_total {prof.overruns_total}",
+	])
+	_family(out, "nextgen_hub_loop_errors_total", "counter", "Orchestrator ticks that failed with an exception.", [
+		f"nextgen_hub_loop_errors_total {orch.errors_total}",
+	])
+
+
+def _render_store(out: List[str], store: "BaseProjectStore") -> None:
+	_summary(out, "nextgen_store_write_duration_seconds", "Duration of project store writes (temp file, fsync, rename).", [("", store.write_latency)])
+	_summary(out, "nextgen_store_write_batch_size", "Changes coalesced into each project store write.", [("", store.batch_sizes)])
+	_family(out, "nextgen_store_write_errors_total", "counter", "Project store writes that failed.", [
+		f"nextgen_store_write_errors_total {store.write_errors_total}",
+	])
+	_family(out, "nextgen_store_pending_changes", "gauge", "Changes not yet written to disk.", [
+		f"nextgen_store_pending_changes {store.pending_changes}",
+	])
@@ -0,0 +1,340 @@
+from __future__ import annotations
+
+import asyncio
+import itertools
+import json
+import logging
+import socket
+import threading
+from typing import Any, AsyncIterator, BinaryIO, Dict, Iterable, List, Optional, Tuple
+
+from pydantic import TypeAdapter
+
+from .models import JobInfo, OperationResult, Project, ProjectConfig
+from .orchestrator import BroadcastHub
+from .project_store import ProjectSnapshot
+from .serialization import dumps
+from .supervisor import SupervisorError, connect
+
+
+logger = logging.getLogger(__name__)
+
+_PROJECTS = TypeAdapter(List[Project])
+
+
+class SupervisorClient:
+	"""Blocking request/response client for the supervisor, shared by a worker's threads.
+
+	Each call borrows a connection from a small pool (opening one if none is
+	idle), so a slow command such as a stop does not hold up the worker's
+	other requests. An idle connection that turns out to be broken is
+	replaced once, but only when the request had not been sent yet, so a
+	command is never delivered twice.
+	"""
+
+	def __init__(self, address: str, timeout_seconds: float = 30.0, pool_size: int = 4) -> None:
+		self.address = address
+		self.timeout_seconds = timeout_seconds
+		self.pool_size = pool_size
+		self._lock = threading.Lock()
+		self._idle: List[Tuple[socket.socket, BinaryIO]] = []
+		self._seq = itertools.count(1)
+
+	def _connect(self) -> Tuple[socket.socket, BinaryIO]:
+		sock = connect(self.address, timeout=self.timeout_seconds)
+		return sock, sock.makefile("rwb")
+
+	@staticmethod
+	def _discard(conn: Tuple[socket.socket, BinaryIO]) -> None:
+		for closable in reversed(conn):
+			try:
+				closable.close()
+			except OSError:
+				pass
+
+	def _release(self, conn: Tuple[socket.socket, BinaryIO]) -> None:
+		with self._lock:
+			if len(self._idle) < self.pool_size:
+				self._idle.append(conn)
+				return
+		self._discard(conn)
+
+	def close(self) -> None:
+		with self._lock:
+			idle, self._idle = self._idle, []
+		for conn in idle:
+			self._discard(conn)
+
+	def call(self, op: str, **args: Any) -> Any:
+		request = dumps({"id": next(self._seq), "op": op, "args": args}) + b"\n"
+		with self._lock:
+			conn = self._idle.pop() if self._idle else None
+		try:
+			try:
+				if conn is None:
+					conn = self._connect()
+				conn[1].write(request)
+				conn[1].flush()
+			except OSError:
+				# Stale connection (supervisor restarted): nothing was delivered, retry once
+				if conn is not None:
+					self._discard(conn)
+					conn = None
+				conn = self._connect()
+				conn[1].write(request)
+				conn[1].flush()
+			line = conn[1].readline()
+		except OSError as e:
+			if conn is not None:
+				self._discard(conn)
+			raise SupervisorError(f"Supervisor unavailable: {e}", 503)
+		if not line:
+			self._discard(conn)
+			raise SupervisorError("Supervisor closed the connection", 503)
+		self._release(conn)
+		reply = json.loads(line)
+		if "error" in reply:
+			raise SupervisorError(reply["error"], reply.get("status", 500))
+		return reply.get("result")
+
+
+class RemoteOrchestrator:
+	"""Worker-side stand-in for Orchestrator: follows the supervisor's snapshots.
+
+	A daemon thread holds a ``subscribe`` connection and swaps in each
+	snapshot as a new dict, so request handlers read the latest state
+	without any IPC; every snapshot is also re-broadcast to the worker's
+	own WebSocket subscribers on its event loop.
+	"""
+
+	def __init__(self, client: SupervisorClient, hub: BroadcastHub) -> None:
+		self._client = client
+		self._hub = hub
+		self._snapshot = ProjectSnapshot.build({})
+		self._write_lock = threading.Lock()
+		self._ready = threading.Event()
+		self._stopped = threading.Event()
+		self._thread: Optional[threading.Thread] = None
+		self._sock: Optional[socket.socket] = None
+		self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+	def snapshot(self) -> ProjectSnapshot:
+		return self._snapshot
+
+	def list(self) -> List[Project]:
+		return list(self._snapshot.projects)
+
+	def get(self, project_id: str) -> Optional[Project]:
+		return self._snapshot.index.get(project_id)
+
+	def put(self, project: Project) -> None:
+		"""Apply a command's result right away instead of waiting for the next snapshot."""
+		with self._write_lock:
+			projects = dict(self._snapshot.index)
+			projects[project.config.id] = project
+			self._snapshot = self._snapshot.evolve(projects, (project.config.id,))
+
+	def drop(self, project_id: str) -> None:
+		with self._write_lock:
+			projects = dict(self._snapshot.index)
+			projects.pop(project_id, None)
+			self._snapshot = self._snapshot.evolve(projects, (project_id,))
+
+	def timings(self) -> dict:
+		return self._client.call("timings")
+
+	async def start(self, ready_timeout_seconds: float = 10.0) -> None:
+		self._loop = asyncio.get_running_loop()
+		self._stopped.clear()
+		self._thread = threading.Thread(target=self._follow, name="supervisor-snapshots", daemon=True)
+		self._thread.start()
+		if not await self._loop.run_in_executor(None, self._ready.wait, ready_timeout_seconds):
+			logger.warning("No snapshot from supervisor at %s yet; serving empty state", self._client.address)
+
+	async def stop(self) -> None:
+		self._stopped.set()
+		sock = self._sock
+		if sock is not None:
+			try:
+				sock.shutdown(socket.SHUT_RDWR)
+			except OSError:
+				pass
+		if self._thread is not None:
+			await asyncio.get_running_loop().run_in_executor(None, self._thread.join, 2)
+			self._thread = None
+		self._client.close()
+
+	def _follow(self) -> None:
+		backoff = 0.5
+		while not self._stopped.is_set():
+			try:
+				self._sock = connect(self._client.address, timeout=5)
+				self._sock.settimeout(None)
+				with self._sock.makefile("rwb") as f:
+					f.write(b'{"op":"subscribe"}\n')
+					f.flush()
+					for line in f:
+						self._apply(line)
+						backoff = 0.5
+			except (OSError, ValueError) as e:
+				if not self._stopped.is_set():
+					logger.warning("Lost supervisor snapshot stream (%s); reconnecting", e)
+			finally:
+				if self._sock is not None:
+					self._sock.close()
+					self._sock = None
+			self._stopped.wait(backoff)
+			backoff = min(backoff * 2, 5.0)
+
+	def _apply(self, line: bytes) -> None:
+		projects = _PROJECTS.validate_python(json.loads(line)["snapshot"])
+		with self._write_lock:
+			self._snapshot = ProjectSnapshot.build({p.config.id: p for p in projects})
+		self._ready.set()
+		loop = self._loop
+		if loop is not None and not loop.is_closed():
+			asyncio.run_coroutine_threadsafe(self._hub.broadcast(projects), loop)
+
+
+class RemoteStore:
+	"""ProjectStore look-alike: reads come from the latest snapshot, writes go to the supervisor."""
+
+	def __init__(self, client: SupervisorClient, orchestrator: RemoteOrchestrator) -> None:
+		self._client = client
+		self._orchestrator = orchestrator
+
+	def list_projects(self) -> List[Project]:
+		return self._orchestrator.list()
+
+	def get_project(self, project_id: str) -> Optional[Project]:
+		return self._orchestrator.get(project_id)
+
+	def snapshot(self) -> ProjectSnapshot:
+		return self._orchestrator.snapshot()
+
+	def upsert_project(self, config: ProjectConfig) -> Project:
+		project = Project.model_validate(self._client.call("upsert_project", config=config.model_dump(mode="json")))
+		self._orchestrator.put(project)
+		return project
+
+	def delete_project(self, project_id: str) -> bool:
+		deleted = bool(self._client.call("delete_project", project_id=project_id))
+		if deleted:
+			self._orchestrator.drop(project_id)
+		return deleted
+
+	def publish(self, updates: Iterable[Tuple[Project, Project]], force: bool = False) -> Dict[str, Project]:
+		# Runtime is the supervisor's to publish; command results reach the snapshot via put()
+		return {}
+
+	def stats(self) -> dict:
+		return self._client.call("store_stats")
+
+
+class RemoteProcessManager:
+	"""ProcessManager look-alike that forwards start/stop to the supervisor.
+
+	``status`` and ``collect_metrics`` return the snapshot as-is: the
+	supervisor's orchestrator refreshes both every tick, so workers never
+	probe processes themselves.
+	"""
+
+	def __init__(self, client: SupervisorClient, orchestrator: RemoteOrchestrator) -> None:
+		self._client = client
+		self._orchestrator = orchestrator
+
+	def _result(self, data: Any) -> OperationResult:
+		result = OperationResult.model_validate(data)
+		if result.project is not None:
+			self._orchestrator.put(result.project)
+		return result
+
+	def is_running(self, project_id: str) -> bool:
+		project = self._orchestrator.get(project_id)
+		return project is not None and project.runtime.status == "running"
+
+	def start(self, project: Project, override_args: Optional[list[str]] = None, override_env: Optional[Dict[str, str]] = None) -> OperationResult:
+		return self._result(self._client.call(
+			"start",
+			project_id=project.config.id,
+			instances=project.config.instances,
+			override_args=override_args,
+			override_env=override_env,
+		))
+
+	def stop(self, project: Project, timeout_seconds: int = 10) -> OperationResult:
+		return self._result(self._client.call("stop", project_id=project.config.id, timeout_seconds=timeout_seconds))
+
+	def status(self, project: Project) -> Project:
+		return project
+
+	def collect_metrics(self, project: Project) -> Project:
+		return project
+
+
+class RemoteJob:
+	"""Job look-alike whose output lives in the supervisor; polled rather than pushed."""
+
+	poll_interval_seconds = 0.25
+
+	def __init__(self, client: SupervisorClient, info: JobInfo) -> None:
+		self._client = client
+		self.info = info
+
+	@property
+	def id(self) -> str:
+		return self.info.id
+
+	@property
+	def finished(self) -> bool:
+		return self.info.finished_at is not None
+
+	def lines_since(self, since: int) -> List[Tuple[int, str, str]]:
+		data = self._client.call("job_output", job_id=self.info.id, since=since)
+		self.info = JobInfo.model_validate(data["job"])
+		return [(seq, stream, text) for seq, stream, text in data["lines"]]
+
+	async def follow(self, since: int = 0) -> AsyncIterator[Tuple[int, str, str]]:
+		loop = asyncio.get_running_loop()
+		while True:
+			for item in await loop.run_in_executor(None, self.lines_since, since):
+				since = item[0] + 1
+				yield item
+			if self.finished:
+				return
+			await asyncio.sleep(self.poll_interval_seconds)
+
+	async def wait(self) -> None:
+		loop = asyncio.get_running_loop()
+		while not self.finished:
+			await asyncio.sleep(self.poll_interval_seconds)
+			data = await loop.run_in_executor(None, lambda: self._client.call("job_get", job_id=self.info.id))
+			if data is not None:
+				self.info = JobInfo.model_validate(data)
+
+
+class RemoteJobManager:
+	"""JobManager look-alike: jobs run in the supervisor so every worker sees the same ids."""
+
+	def __init__(self, client: SupervisorClient) -> None:
+		self._client = client
+
+	def submit(self, project: Project, action: str, args: List[str]) -> RemoteJob:
+		info = self._client.call("job_submit", project_id=project.config.id, action=action)
+		return RemoteJob(self._client, JobInfo.model_validate(info))
+
+	def get(self, job_id: str) -> Optional[RemoteJob]:
+		info = self._client.call("job_get", job_id=job_id)
+		return RemoteJob(self._client, JobInfo.model_validate(info)) if info is not None else None
+
+	def list(self, project_id: Optional[str] = None) -> List[RemoteJob]:
+		return [RemoteJob(self._client, JobInfo.model_validate(i)) for i in self._client.call("job_list", project_id=project_id)]
+
+	async def cancel(self, job: RemoteJob) -> RemoteJob:
+		loop = asyncio.get_running_loop()
+		job.info = JobInfo.model_validate(await loop.run_in_executor(None, lambda: self._client.call("job_cancel", job_id=job.id)))
+		return job
+
+	async def shutdown(self) -> None:
+		# Jobs belong to the supervisor and outlive any one worker
+		return None
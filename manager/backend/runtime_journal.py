@@ -0,0 +1,192 @@
+from __future__ import annotations
+
+import json
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from .models import Project, ProjectRuntime
+from .serialization import dumps
+
+
+logger = logging.getLogger(__name__)
+
+# Runtime fields worth keeping across hub restarts; pids and status are
+# re-derived by re-adopting processes, metrics by the next tick
+DURABLE_FIELDS = (
+	"started_at",
+	"stopped_at",
+	"last_exit_code",
+	"restarts_in_window",
+	"restarts_total",
+	"window_started_at",
+	"health",
+)
+
+
+def _key(runtime: ProjectRuntime) -> Tuple[Any, ...]:
+	"""What decides whether a runtime needs a new journal record.
+
+	Health timestamps and latency change on every check; only a change of
+	health status or message is worth a write (the record then carries the
+	full report).
+	"""
+	h = runtime.health
+	return (
+		runtime.started_at,
+		runtime.stopped_at,
+		runtime.last_exit_code,
+		runtime.restarts_in_window,
+		runtime.restarts_total,
+		runtime.window_started_at,
+		h.status,
+		h.message,
+	)
+
+
+def durable_state(runtime: ProjectRuntime) -> Dict[str, Any]:
+	return runtime.model_dump(mode="json", include=set(DURABLE_FIELDS))
+
+
+def apply_state(runtime: ProjectRuntime, state: Dict[str, Any]) -> ProjectRuntime:
+	"""Copy journaled fields onto ``runtime``; unknown or invalid fields are ignored."""
+	try:
+		restored = ProjectRuntime.model_validate({k: v for k, v in state.items() if k in DURABLE_FIELDS})
+	except ValueError:
+		logger.warning("Ignoring unreadable journaled runtime state: %r", state)
+		return runtime
+	for name in DURABLE_FIELDS:
+		if name in state:
+			setattr(runtime, name, getattr(restored, name))
+	return runtime
+
+
+class RuntimeJournal:
+	"""Append-only JSON-lines log of each project's durable runtime state.
+
+	One line per change, ``{"id": ..., "rt": {...}}`` (``"rt": null`` once a
+	project is gone); the last line per id wins. Writes are appended and
+	flushed but not fsynced: losing the last few after a power cut only
+	loses counters, while processes are re-adopted from their pid files.
+	Once the log holds several times more lines than live entries it is
+	rewritten, atomically, with one line per project.
+	"""
+
+	def __init__(self, path: Path, compact_factor: int = 4, min_compact_lines: int = 256) -> None:
+		self.path = path
+		self.compact_factor = compact_factor
+		self.min_compact_lines = min_compact_lines
+		self._lock = threading.Lock()
+		self._state: Dict[str, Dict[str, Any]] = {}
+		self._keys: Dict[str, Tuple[Any, ...]] = {}
+		self._lines = 0
+		self._file: Optional[Any] = None
+		self.records_total = 0
+		self.compactions_total = 0
+
+	def load(self) -> Dict[str, Dict[str, Any]]:
+		"""Read the journal; returns the latest state per project id."""
+		state: Dict[str, Dict[str, Any]] = {}
+		lines = 0
+		try:
+			with self.path.open("rb") as f:
+				for raw in f:
+					try:
+						entry = json.loads(raw)
+						project_id = entry["id"]
+					except (ValueError, KeyError, TypeError):
+						continue  # torn last line after a crash
+					lines += 1
+					if entry.get("rt") is None:
+						state.pop(project_id, None)
+					else:
+						state[project_id] = entry["rt"]
+		except FileNotFoundError:
+			pass
+		with self._lock:
+			self._state = dict(state)
+			self._keys = {}
+			self._lines = lines
+		return state
+
+	def record(self, projects: Iterable[Project]) -> None:
+		"""Journal the projects whose durable runtime state changed since their last record."""
+		with self._lock:
+			out = []
+			for project in projects:
+				pid = project.config.id
+				key = _key(project.runtime)
+				if self._keys.get(pid) == key:
+					continue
+				self._keys[pid] = key
+				state = durable_state(project.runtime)
+				if self._state.get(pid) == state:
+					continue  # e.g. restored at boot: already on disk
+				self._state[pid] = state
+				out.append(dumps({"id": pid, "rt": state}))
+			self._append(out)
+
+	def forget(self, project_ids: Iterable[str]) -> None:
+		with self._lock:
+			out = []
+			for pid in project_ids:
+				self._keys.pop(pid, None)
+				if self._state.pop(pid, None) is not None:
+					out.append(dumps({"id": pid, "rt": None}))
+			self._append(out)
+
+	def _append(self, lines: list) -> None:
+		if not lines:
+			return
+		try:
+			if self._file is None:
+				self.path.parent.mkdir(parents=True, exist_ok=True)
+				self._file = self.path.open("ab")
+			self._file.write(b"\n".join(lines) + b"\n")
+			self._file.flush()
+		except OSError:
+			logger.exception("Could not append to runtime journal %s", self.path)
+			return
+		self._lines += len(lines)
+		self.records_total += len(lines)
+		if self._lines > max(self.min_compact_lines, self.compact_factor * len(self._state)):
+			self._compact()
+
+	def _compact(self) -> None:
+		tmp = self.path.with_name(f".{self.path.name}.{os.getpid()}.tmp")
+		try:
+			with tmp.open("wb") as f:
+				for pid, state in self._state.items():
+					f.write(dumps({"id": pid, "rt": state}) + b"\n")
+				f.flush()
+				os.fsync(f.fileno())
+			if self._file is not None:
+				self._file.close()
+				self._file = None
+			os.replace(tmp, self.path)
+		except OSError:
+			logger.exception("Could not compact runtime journal %s", self.path)
+			try:
+				tmp.unlink()
+			except OSError:
+				pass
+			return
+		self._lines = len(self._state)
+		self.compactions_total += 1
+
+	def close(self) -> None:
+		with self._lock:
+			if self._file is not None:
+				self._file.close()
+				self._file = None
+
+	def stats(self) -> dict:
+		return {
+			"path": str(self.path),
+			"entries": len(self._state),
+			"lines": self._lines,
+			"records_total": self.records_total,
+			"compactions_total": self.compactions_total,
+		}
@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from .models import InstanceRuntime, ProcessMetrics, ProjectRuntime
+
+
+class MetricsSample:
+	"""Resource usage summed over one project's processes by a single psutil pass."""
+
+	__slots__ = ("cpu_percent", "memory_rss_mb", "memory_vms_mb", "memory_percent", "threads", "uptime_seconds")
+
+	def __init__(
+		self,
+		cpu_percent: float = 0.0,
+		memory_rss_mb: float = 0.0,
+		memory_vms_mb: float = 0.0,
+		memory_percent: float = 0.0,
+		threads: int = 0,
+		uptime_seconds: Optional[float] = None,
+	) -> None:
+		self.cpu_percent = cpu_percent
+		self.memory_rss_mb = memory_rss_mb
+		self.memory_vms_mb = memory_vms_mb
+		self.memory_percent = memory_percent
+		self.threads = threads
+		self.uptime_seconds = uptime_seconds
+
+	@classmethod
+	def of(cls, metrics: ProcessMetrics) -> "MetricsSample":
+		return cls(*(getattr(metrics, name) for name in cls.__slots__))
+
+	def as_dict(self) -> Dict[str, Any]:
+		return {name: getattr(self, name) for name in self.__slots__}
+
+	def to_model(self) -> ProcessMetrics:
+		return ProcessMetrics.model_construct(**self.as_dict())
+
+	def __eq__(self, other: object) -> bool:
+		if not isinstance(other, MetricsSample):
+			return NotImplemented
+		return all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
+
+	__hash__ = None  # type: ignore[assignment]
+
+
+def merge_instances(previous: List[InstanceRuntime], alive: Iterable[Tuple[int, int]]) -> List[InstanceRuntime]:
+	"""Instance entries for the live ``(index, pid)`` pairs.
+
+	An entry whose process is unchanged is kept as it was; a new process at
+	an index gets a fresh entry (health unknown) that keeps the index's
+	restart count.
+	"""
+	by_index = {inst.index: inst for inst in previous}
+	merged: List[InstanceRuntime] = []
+	for index, pid in alive:
+		prev = by_index.get(index)
+		if prev is not None and prev.pid == pid:
+			merged.append(prev)
+		else:
+			merged.append(InstanceRuntime(index=index, pid=pid, restarts_total=prev.restarts_total if prev is not None else 0))
+	return merged
+
+
+class RuntimeRecord:
+	"""The orchestrator's working state for one project, kept between ticks.
+
+	Ticks update these plain objects and compare them with the previous
+	values; a ``ProjectRuntime`` model is only built (``materialize``) for
+	projects whose state actually changed, and published as usual.
+	``source`` is the published runtime the record was last in sync with:
+	when the store holds another one (an API start or stop, a health
+	report), the record is re-read from it.
+	"""
+
+	__slots__ = ("source", "instances", "pids", "status", "metrics")
+
+	def __init__(self, source: ProjectRuntime) -> None:
+		self.source = source
+		# (index, pid) of each live instance; ``pids`` is the same pids in order
+		self.instances: Tuple[Tuple[int, int], ...] = tuple((i.index, i.pid) for i in source.instances if i.pid is not None)
+		self.pids: Tuple[int, ...] = tuple(source.pids)
+		self.status = source.status
+		self.metrics = MetricsSample.of(source.metrics)
+
+	def materialize(self) -> ProjectRuntime:
+		"""A new runtime model: ``source`` with this record's process state."""
+		pids = self.pids
+		return self.source.model_copy(update={
+			"pids": list(pids),
+			"pid": pids[0] if pids else None,
+			"status": self.status,
+			"metrics": self.metrics.to_model(),
+			"instances": merge_instances(self.source.instances, self.instances),
+		})
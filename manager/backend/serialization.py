@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+from typing import Any, Dict, Iterable, Optional, Sequence, Tuple
+
+import pydantic_core
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+from .models import Project, ProjectConfig
+
+try:
+	import orjson
+except ImportError:  # orjson is optional; pydantic-core is always available
+	orjson = None  # type: ignore[assignment]
+
+
+def _orjson_default(obj: Any) -> Any:
+	if isinstance(obj, BaseModel):
+		return obj.model_dump()
+	if isinstance(obj, (set, frozenset)):
+		return list(obj)
+	raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+def dumps(obj: Any) -> bytes:
+	"""Serialize ``obj`` to JSON bytes with the fastest available encoder."""
+	if isinstance(obj, BaseModel):
+		return pydantic_core.to_json(obj)
+	if orjson is not None:
+		return orjson.dumps(obj, default=_orjson_default, option=orjson.OPT_NON_STR_KEYS)
+	return pydantic_core.to_json(obj)
+
+
+class FastJSONResponse(JSONResponse):
+	"""JSONResponse rendered with orjson/pydantic-core; pre-encoded bytes pass through."""
+
+	def render(self, content: Any) -> bytes:
+		if isinstance(content, (bytes, bytearray)):
+			return bytes(content)
+		return dumps(content)
+
+
+def _fingerprint(value: Any) -> Any:
+	"""Cheap, hashable snapshot of a model's field values (recursively)."""
+	if isinstance(value, BaseModel):
+		return tuple(_fingerprint(v) for v in value.__dict__.values())
+	if isinstance(value, list):
+		return tuple(_fingerprint(v) for v in value)
+	if isinstance(value, dict):
+		return tuple((k, _fingerprint(v)) for k, v in value.items())
+	return value
+
+
+class ProjectJSONCache:
+	"""Encodes projects to JSON, reusing bytes for parts that did not change.
+
+	Configs are cached by object identity (``ProjectStore.upsert_project``
+	replaces the config object on change) and runtimes by a fingerprint of
+	their field values, so a tick that only touched a few projects only
+	re-serializes those. Encoding the same list object twice in a row (one
+	broadcast fanned out to many subscribers) returns the memoized payload.
+	"""
+
+	def __init__(self) -> None:
+		self._configs: Dict[str, Tuple[ProjectConfig, bytes]] = {}
+		self._runtimes: Dict[str, Tuple[Any, bytes]] = {}
+		self._last_list: Optional[Sequence[Project]] = None
+		self._last_payload = b"[]"
+		self.hits = 0
+		self.misses = 0
+
+	def encode_project(self, project: Project) -> bytes:
+		pid = project.config.id
+		cached_cfg = self._configs.get(pid)
+		if cached_cfg is not None and cached_cfg[0] is project.config:
+			cfg = cached_cfg[1]
+		else:
+			cfg = pydantic_core.to_json(project.config)
+			self._configs[pid] = (project.config, cfg)
+		key = _fingerprint(project.runtime)
+		cached_rt = self._runtimes.get(pid)
+		if cached_rt is not None and cached_rt[0] == key:
+			rt = cached_rt[1]
+			self.hits += 1
+		else:
+			rt = pydantic_core.to_json(project.runtime)
+			self._runtimes[pid] = (key, rt)
+			self.misses += 1
+		return b'{"config":' + cfg + b',"runtime":' + rt + b"}"
+
+	def encode_projects(self, projects: Sequence[Project], include: Optional[Dict[str, Any]] = None) -> bytes:
+		"""Encode a list of projects; ``include`` selects a subset of fields."""
+		if include is not None:
+			return b"[" + b",".join([p.__pydantic_serializer__.to_json(p, include=include) for p in projects]) + b"]"
+		if projects is self._last_list:
+			return self._last_payload
+		payload = b"[" + b",".join([self.encode_project(p) for p in projects]) + b"]"
+		self._last_list = projects
+		self._last_payload = payload
+		return payload
+
+	def forget(self, live_ids: Iterable[str]) -> None:
+		"""Drop cache entries for projects that no longer exist."""
+		live = set(live_ids)
+		for cache in (self._configs, self._runtimes):
+			for pid in [k for k in cache if k not in live]:
+				del cache[pid]
@@ -0,0 +1,215 @@
+from __future__ import annotations
+
+import argparse
+import sqlite3
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from pydantic import ValidationError
+
+from .models import Project, ProjectConfig, ProjectRuntime
+from .project_store import BaseProjectStore, ProjectSnapshot, ProjectStore
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS projects (
+	id TEXT PRIMARY KEY,
+	name TEXT NOT NULL,
+	config TEXT NOT NULL,
+	updated_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS projects_name ON projects(name);
+CREATE TABLE IF NOT EXISTS project_tags (
+	project_id TEXT NOT NULL REFERENCES projects(id) ON DELETE CASCADE,
+	tag TEXT NOT NULL,
+	PRIMARY KEY (project_id, tag)
+);
+CREATE INDEX IF NOT EXISTS project_tags_tag ON project_tags(tag);
+"""
+
+
+class SqliteProjectStore(BaseProjectStore):
+	"""SQLite-backed store for large fleets: one row per project, WAL mode.
+
+	The whole config is kept as a JSON column; id, name and tags are broken
+	out and indexed so lookups and ``find_projects`` run in SQL. Each upsert
+	or delete is its own transaction and is on disk when it returns, so
+	there is nothing to flush. Rows are loaded into the published snapshot
+	on first use, so runtime state survives between calls.
+	"""
+
+	def __init__(self, db_path: Path) -> None:
+		super().__init__()
+		self._db_path = db_path
+		self._all_loaded = False
+		db_path.parent.mkdir(parents=True, exist_ok=True)
+		self._conn = sqlite3.connect(str(db_path), check_same_thread=False, isolation_level=None)
+		self._conn.execute("PRAGMA journal_mode=WAL")
+		self._conn.execute("PRAGMA synchronous=NORMAL")
+		self._conn.execute("PRAGMA foreign_keys=ON")
+		self._conn.execute("PRAGMA busy_timeout=5000")
+		self._conn.executescript(_SCHEMA)
+
+	def _load_rows(self, rows: Iterable[Tuple[str, str]]) -> List[Project]:
+		"""Projects for ``rows``, publishing the ones not loaded yet in one new version (call with _lock held)."""
+		current = self._snapshot.index
+		index: Optional[Dict[str, Project]] = None
+		projects: List[Project] = []
+		loaded: List[str] = []
+		for project_id, config_json in rows:
+			project = current.get(project_id)
+			if project is None:
+				try:
+					config = ProjectConfig.model_validate_json(config_json)
+				except ValidationError:
+					continue
+				if index is None:
+					index = dict(current)
+				project = index[project_id] = Project(config=config, runtime=ProjectRuntime())
+				loaded.append(project_id)
+			projects.append(project)
+		if index is not None:
+			self._swap(index, loaded)
+		return projects
+
+	def list_projects(self) -> Sequence[Project]:
+		if not self._all_loaded:
+			with self._lock:
+				if not self._all_loaded:
+					rows = self._conn.execute("SELECT id, config FROM projects ORDER BY rowid").fetchall()
+					projects = self._load_rows(rows)
+					# Publish in table order, not in the order rows were first touched
+					self._swap({p.config.id: p for p in projects}, ())
+					self._all_loaded = True
+		return self._snapshot.projects
+
+	def snapshot(self) -> ProjectSnapshot:
+		self.list_projects()
+		return self._snapshot
+
+	def get_project(self, project_id: str) -> Optional[Project]:
+		project = self._snapshot.index.get(project_id)
+		if project is not None or self._all_loaded:
+			return project
+		with self._lock:
+			row = self._conn.execute("SELECT id, config FROM projects WHERE id = ?", (project_id,)).fetchone()
+			found = self._load_rows([row] if row else [])
+			return found[0] if found else None
+
+	def find_projects(self, name: Optional[str] = None, tag: Optional[str] = None) -> List[Project]:
+		sql = "SELECT p.id, p.config FROM projects p"
+		params: List[str] = []
+		if tag is not None:
+			sql += " JOIN project_tags t ON t.project_id = p.id AND t.tag = ?"
+			params.append(tag)
+		if name is not None:
+			sql += " WHERE p.name = ?"
+			params.append(name)
+		with self._lock:
+			rows = self._conn.execute(sql + " ORDER BY p.rowid", params).fetchall()
+			return self._load_rows(rows)
+
+	def _write(self, configs: List[ProjectConfig]) -> None:
+		now = datetime.utcnow().isoformat()
+		started = time.perf_counter()
+		conn = self._conn
+		try:
+			conn.execute("BEGIN IMMEDIATE")
+			try:
+				for config in configs:
+					conn.execute(
+						"INSERT INTO projects (id, name, config, updated_at) VALUES (?, ?, ?, ?) "
+						"ON CONFLICT(id) DO UPDATE SET name = excluded.name, config = excluded.config, updated_at = excluded.updated_at",
+						(config.id, config.name, config.model_dump_json(), now),
+					)
+					conn.execute("DELETE FROM project_tags WHERE project_id = ?", (config.id,))
+					conn.executemany(
+						"INSERT INTO project_tags (project_id, tag) VALUES (?, ?)",
+						[(config.id, tag) for tag in dict.fromkeys(config.tags)],
+					)
+				conn.execute("COMMIT")
+			except BaseException:
+				conn.execute("ROLLBACK")
+				raise
+		except sqlite3.Error:
+			self.write_errors_total += 1
+			raise
+		self._record_write(started, len(configs))
+
+	def _apply(self, configs: List[ProjectConfig]) -> List[Project]:
+		"""Publish new versions for freshly written configs (call with _lock held)."""
+		index = dict(self._snapshot.index)
+		projects = []
+		for config in configs:
+			current = index.get(config.id)
+			project = index[config.id] = Project(config=config, runtime=current.runtime if current is not None else ProjectRuntime())
+			projects.append(project)
+		self._swap(index, [c.id for c in configs])
+		return projects
+
+	def upsert_project(self, config: ProjectConfig) -> Project:
+		with self._lock:
+			self._write([config])
+			return self._apply([config])[0]
+
+	def upsert_many(self, configs: Iterable[ProjectConfig]) -> List[Project]:
+		"""Insert or update several projects in a single transaction."""
+		configs = list(configs)
+		with self._lock:
+			self._write(configs)
+			return self._apply(configs)
+
+	def delete_project(self, project_id: str) -> bool:
+		with self._lock:
+			started = time.perf_counter()
+			try:
+				deleted = self._conn.execute("DELETE FROM projects WHERE id = ?", (project_id,)).rowcount > 0
+			except sqlite3.Error:
+				self.write_errors_total += 1
+				raise
+			if project_id in self._snapshot.index:
+				index = dict(self._snapshot.index)
+				del index[project_id]
+				self._swap(index, (project_id,))
+			if deleted:
+				self._record_write(started, 1)
+			return deleted
+
+	def close(self) -> None:
+		with self._lock:
+			self._conn.close()
+
+
+def migrate(sources: Iterable[Path], target: Path) -> int:
+	"""Import projects from YAML store files into a SQLite store; returns the number imported.
+
+	Re-running is safe: projects are upserted by id, later files win.
+	"""
+	store = SqliteProjectStore(target)
+	try:
+		total = 0
+		for source in sources:
+			configs = [p.config for p in ProjectStore(source).list_projects()]
+			store.upsert_many(configs)
+			total += len(configs)
+		return total
+	finally:
+		store.close()
+
+
+def main() -> None:
+	parser = argparse.ArgumentParser(description="Import projects.yaml files into a SQLite project store")
+	parser.add_argument("sources", nargs="+", type=Path, help="projects.yaml files to import")
+	parser.add_argument("--to", dest="target", type=Path, required=True, help="SQLite database to create or update")
+	args = parser.parse_args()
+	missing = [str(p) for p in args.sources if not p.exists()]
+	if missing:
+		parser.error("not found: " + ", ".join(missing))
+	count = migrate(args.sources, args.target)
+	print(f"Imported {count} project(s) into {args.target}")
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,335 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import dataclasses
+import functools
+import json
+import logging
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple, Union
+
+from pydantic import ValidationError
+
+from .config import HubConfig
+from .dependencies import HubState
+from .jobs import JobQueueFull
+from .models import JobInfo, OperationResult, Project, ProjectConfig, fork
+from .serialization import dumps
+
+
+logger = logging.getLogger(__name__)
+
+# Upper bound for one request line; project configs are far smaller
+MAX_LINE_BYTES = 16 * 1024 * 1024
+# A worker that falls this far behind on snapshots is dropped and reconnects
+MAX_SUBSCRIBER_BUFFER = 8 * 1024 * 1024
+# Ops that touch the job manager, whose tasks and buffers live on the event loop
+LOOP_OPS = frozenset({"job_submit", "job_get", "job_list", "job_output", "job_cancel"})
+
+
+class SupervisorError(Exception):
+	"""A command the supervisor rejected or failed; carries the HTTP status to report."""
+
+	def __init__(self, message: str, status_code: int = 400) -> None:
+		super().__init__(message)
+		self.status_code = status_code
+
+
+def parse_address(address: str) -> Union[str, Tuple[str, int]]:
+	"""``host:port`` is TCP; anything else is a Unix socket path."""
+	host, sep, port = address.rpartition(":")
+	if sep and host and port.isdigit():
+		return (host, int(port))
+	return address
+
+
+def default_address(config: HubConfig) -> str:
+	if hasattr(socket, "AF_UNIX") and os.name != "nt":
+		return str(config.data_dir / "supervisor.sock")
+	return "127.0.0.1:8078"
+
+
+def connect(address: str, timeout: Optional[float] = None) -> socket.socket:
+	target = parse_address(address)
+	if isinstance(target, tuple):
+		return socket.create_connection(target, timeout=timeout)
+	sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+	sock.settimeout(timeout)
+	try:
+		sock.connect(target)
+	except OSError:
+		sock.close()
+		raise
+	return sock
+
+
+class Supervisor:
+	"""Owns orchestration for a multi-worker hub and serves it to API workers.
+
+	The supervisor is the single writer for pid files and the project store;
+	workers (see ``remote.py``) follow its snapshots and forward commands.
+	The protocol is newline-delimited JSON over a Unix socket (TCP on
+	localhost where those are unavailable).
+
+	A request is ``{"id", "op", "args"}`` and gets exactly one
+	``{"id", "result"}`` or ``{"id", "error", "status"}`` reply, in order.
+	The ``subscribe`` op instead turns the connection into a stream of
+	``{"snapshot": [...]}`` lines: one right away and one per orchestrator
+	tick, encoded once and shared by every subscriber.
+
+	Commands other than job ops run in the default executor: stopping a
+	project waits for its processes to exit, and that must not stall the
+	orchestrator tick, the snapshot fan-out or other connections.
+	"""
+
+	def __init__(self, state: HubState, address: str) -> None:
+		self.state = state
+		self.address = address
+		self._server: Optional[asyncio.AbstractServer] = None
+		self._subscribers: Set[asyncio.StreamWriter] = set()
+		self._ops: Dict[str, Callable[..., Any]] = {
+			"list_projects": self._list_projects,
+			"upsert_project": self._upsert_project,
+			"delete_project": self._delete_project,
+			"start": self._start,
+			"stop": self._stop,
+			"timings": self._timings,
+			"store_stats": self._store_stats,
+			"metrics": self._metrics,
+			"job_submit": self._job_submit,
+			"job_get": self._job_get,
+			"job_list": self._job_list,
+			"job_output": self._job_output,
+			"job_cancel": self._job_cancel,
+		}
+
+	async def start(self) -> None:
+		target = parse_address(self.address)
+		if isinstance(target, tuple):
+			self._server = await asyncio.start_server(self._handle, target[0], target[1], limit=MAX_LINE_BYTES)
+		else:
+			path = Path(target)
+			path.parent.mkdir(parents=True, exist_ok=True)
+			if path.exists():
+				path.unlink()  # stale socket from a previous run
+			self._server = await asyncio.start_unix_server(self._handle, path=str(path), limit=MAX_LINE_BYTES)
+		self.state.hub.subscribe(self._publish)
+		await self.state.startup()
+		logger.info("Supervisor listening on %s", self.address)
+
+	async def stop(self) -> None:
+		self.state.hub.unsubscribe(self._publish)
+		if self._server is not None:
+			self._server.close()
+			await self._server.wait_closed()
+			self._server = None
+		for writer in list(self._subscribers):
+			writer.close()
+		self._subscribers.clear()
+		await self.state.shutdown()
+		target = parse_address(self.address)
+		if isinstance(target, str) and os.path.exists(target):
+			os.unlink(target)
+
+	def _snapshot_line(self, projects: List[Project]) -> bytes:
+		return b'{"snapshot":' + self.state.json_cache.encode_projects(projects) + b"}\n"
+
+	async def _publish(self, projects: List[Project]) -> None:
+		if not self._subscribers:
+			return
+		line = self._snapshot_line(projects)
+		for writer in list(self._subscribers):
+			if writer.is_closing() or writer.transport.get_write_buffer_size() > MAX_SUBSCRIBER_BUFFER:
+				self._subscribers.discard(writer)
+				writer.close()
+				continue
+			writer.write(line)
+
+	async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+		loop = asyncio.get_running_loop()
+		try:
+			while True:
+				line = await reader.readline()
+				if not line:
+					break
+				request_id = None
+				try:
+					request = json.loads(line)
+					request_id = request.get("id")
+					op = request.get("op")
+					if op == "subscribe":
+						projects = await loop.run_in_executor(None, self._list_projects)
+						writer.write(self._snapshot_line(projects))
+						self._subscribers.add(writer)
+						continue
+					handler = self._ops.get(op)
+					if handler is None:
+						raise SupervisorError(f"Unknown op: {op!r}")
+					args = request.get("args") or {}
+					if op in LOOP_OPS:
+						result = handler(**args)
+						if asyncio.iscoroutine(result):
+							result = await result
+					else:
+						result = await loop.run_in_executor(None, functools.partial(handler, **args))
+					reply: Dict[str, Any] = {"id": request_id, "result": result}
+				except SupervisorError as e:
+					reply = {"id": request_id, "error": str(e), "status": e.status_code}
+				except ValidationError as e:
+					reply = {"id": request_id, "error": str(e), "status": 422}
+				except Exception as e:
+					logger.exception("Supervisor command failed")
+					reply = {"id": request_id, "error": str(e), "status": 500}
+				writer.write(dumps(reply) + b"\n")
+				await writer.drain()
+		except (ConnectionError, asyncio.IncompleteReadError, asyncio.LimitOverrunError, ValueError):
+			pass
+		finally:
+			self._subscribers.discard(writer)
+			writer.close()
+
+	def _project(self, project_id: str) -> Project:
+		project = self.state.store.get_project(project_id)
+		if project is None:
+			raise SupervisorError("Project not found", 404)
+		return project
+
+	def _list_projects(self) -> List[Project]:
+		proc = self.state.proc
+		return [proc.status(fork(p)) for p in self.state.store.list_projects()]
+
+	def _upsert_project(self, config: dict) -> Project:
+		project = self.state.store.upsert_project(ProjectConfig(**config))
+		return self.state.proc.status(fork(project))
+
+	def _commit(self, base: Project, result: OperationResult) -> OperationResult:
+		if result.success and result.project is not None:
+			self.state.store.publish([(base, result.project)], force=True)
+		return result
+
+	def _delete_project(self, project_id: str) -> bool:
+		store = self.state.store
+		deleted = store.delete_project(project_id)
+		if deleted:
+			self.state.json_cache.forget(p.config.id for p in store.list_projects())
+		return deleted
+
+	def _start(
+		self,
+		project_id: str,
+		instances: Optional[int] = None,
+		override_args: Optional[List[str]] = None,
+		override_env: Optional[Dict[str, str]] = None,
+	) -> OperationResult:
+		project = self._project(project_id)
+		work = fork(project)
+		if instances:
+			work.config = project.config.model_copy(update={"instances": max(1, min(instances, 64))})
+		return self._commit(project, self.state.proc.start(work, override_args=override_args, override_env=override_env))
+
+	def _stop(self, project_id: str, timeout_seconds: int = 10) -> OperationResult:
+		project = self._project(project_id)
+		return self._commit(project, self.state.proc.stop(fork(project), timeout_seconds=timeout_seconds))
+
+	def _store_stats(self) -> dict:
+		return self.state.store.stats()
+
+	def _timings(self) -> dict:
+		return self.state.orchestrator.timings()
+
+	def _metrics(self) -> str:
+		state = self.state
+		return state.exporter.render(state.store.list_projects(), state.orchestrator, state.watchdog, state.store)
+
+	def _job(self, job_id: str):
+		job = self.state.jobs.get(job_id)
+		if job is None:
+			raise SupervisorError("Job not found", 404)
+		return job
+
+	def _job_submit(self, project_id: str, action: str) -> JobInfo:
+		project = self._project(project_id)
+		args = project.config.actions.get(action)
+		if not args:
+			raise SupervisorError("Action not found", 404)
+		try:
+			return self.state.jobs.submit(project, action, args).info
+		except JobQueueFull as e:
+			raise SupervisorError(str(e), 429)
+
+	def _job_get(self, job_id: str) -> Optional[JobInfo]:
+		job = self.state.jobs.get(job_id)
+		return job.info if job is not None else None
+
+	def _job_list(self, project_id: Optional[str] = None) -> List[JobInfo]:
+		return [j.info for j in self.state.jobs.list(project_id)]
+
+	def _job_output(self, job_id: str, since: int = 0) -> dict:
+		job = self._job(job_id)
+		return {"lines": job.lines_since(since), "job": job.info}
+
+	async def _job_cancel(self, job_id: str) -> JobInfo:
+		job = await self.state.jobs.cancel(self._job(job_id))
+		return job.info
+
+
+async def serve(config: HubConfig, address: Optional[str] = None) -> None:
+	"""Run a supervisor until SIGINT/SIGTERM."""
+	# The supervisor owns the real services even if the env points workers at it
+	config = dataclasses.replace(config, supervisor_address=None)
+	supervisor = Supervisor(HubState(config), address or default_address(config))
+	await supervisor.start()
+	stopped = asyncio.Event()
+	loop = asyncio.get_running_loop()
+	for sig in (signal.SIGINT, signal.SIGTERM):
+		try:
+			loop.add_signal_handler(sig, stopped.set)
+		except (NotImplementedError, RuntimeError):
+			pass  # Windows: rely on KeyboardInterrupt / process termination
+	try:
+		await stopped.wait()
+	finally:
+		await supervisor.stop()
+
+
+def spawn(address: str, ready_timeout_seconds: float = 15.0) -> subprocess.Popen:
+	"""Start a supervisor in a child process and wait until it accepts connections."""
+	env = dict(os.environ)
+	env.pop("NEXTGEN_SUPERVISOR_ADDR", None)
+	package_root = str(Path(__file__).resolve().parents[2])
+	env["PYTHONPATH"] = os.pathsep.join(p for p in (package_root, env.get("PYTHONPATH")) if p)
+	child = subprocess.Popen([sys.executable, "-m", "manager.backend.supervisor", "--address", address], env=env)
+	deadline = time.monotonic() + ready_timeout_seconds
+	while time.monotonic() < deadline:
+		if child.poll() is not None:
+			raise RuntimeError(f"Supervisor exited with code {child.returncode}")
+		try:
+			connect(address, timeout=1).close()
+			return child
+		except OSError:
+			time.sleep(0.1)
+	child.terminate()
+	raise RuntimeError(f"Supervisor did not start listening on {address}")
+
+
+def main() -> None:
+	"""``python -m manager.backend.supervisor``; ``app.run(workers=N)`` starts it for you."""
+	parser = argparse.ArgumentParser(description="NextGen Hub supervisor (owns orchestration for API workers)")
+	parser.add_argument("--address", help="Unix socket path or host:port (default: <data dir>/supervisor.sock)")
+	args = parser.parse_args()
+	logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+	try:
+		asyncio.run(serve(HubConfig.from_env(), args.address))
+	except KeyboardInterrupt:
+		pass
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from datetime import datetime
+from typing import Deque, Optional
+
+from .instrumentation import RollingHistogram
+
+
+logger = logging.getLogger(__name__)
+
+
+class LoopLagWatchdog:
+	"""Measures event-loop lag from a helper thread and captures blocking stacks.
+
+	Every ``interval_seconds`` the watchdog schedules a no-op callback on the
+	loop with ``call_soon_threadsafe`` and measures how long it takes to run.
+	If it has not run after ``threshold_seconds``, the loop thread is blocked:
+	its current stack is captured with ``sys._current_frames`` while the
+	offending code is still on it. The thread only sleeps and waits on an
+	``Event``, so it costs nothing measurable when the loop is healthy.
+	"""
+
+	def __init__(self, interval_seconds: float = 0.1, threshold_seconds: float = 0.25, max_stalls: int = 20) -> None:
+		self.interval_seconds = interval_seconds
+		self.threshold_seconds = threshold_seconds
+		self.lag = RollingHistogram(window=3000)
+		self.stalls: Deque[dict] = deque(maxlen=max_stalls)
+		self.stalls_total = 0
+		self._loop: Optional[asyncio.AbstractEventLoop] = None
+		self._loop_thread_id: Optional[int] = None
+		self._thread: Optional[threading.Thread] = None
+		self._stopped = threading.Event()
+
+	@property
+	def running(self) -> bool:
+		return self._thread is not None and self._thread.is_alive()
+
+	def start(self) -> None:
+		"""Start watching the running loop; must be called from the loop thread."""
+		if self.running:
+			return
+		self._loop = asyncio.get_running_loop()
+		self._loop_thread_id = threading.get_ident()
+		self._stopped.clear()
+		self._thread = threading.Thread(target=self._watch, name="loop-lag-watchdog", daemon=True)
+		self._thread.start()
+
+	def stop(self) -> None:
+		self._stopped.set()
+		if self._thread is not None:
+			self._thread.join(timeout=2)
+			self._thread = None
+
+	def _watch(self) -> None:
+		loop = self._loop
+		assert loop is not None
+		while not self._stopped.wait(self.interval_seconds):
+			acked = threading.Event()
+			sent = time.perf_counter()
+			try:
+				loop.call_soon_threadsafe(acked.set)
+			except RuntimeError:
+				return  # loop closed
+			stall: Optional[dict] = None
+			if not acked.wait(self.threshold_seconds):
+				stall = self._capture(time.perf_counter() - sent)
+				while not acked.wait(0.5):
+					if self._stopped.is_set() or loop.is_closed():
+						return
+			lag = time.perf_counter() - sent
+			self.lag.observe(lag)
+			if stall is not None:
+				stall["lag_ms"] = round(lag * 1000, 2)
+				logger.warning("Event loop blocked for %.0f ms at:\n%s", lag * 1000, stall["stack"])
+
+	def _capture(self, lag_so_far: float) -> dict:
+		frame = sys._current_frames().get(self._loop_thread_id or 0)
+		stack = "".join(traceback.format_stack(frame)) if frame is not None else "<loop thread not found>"
+		stall = {
+			"at": datetime.utcnow().isoformat(),
+			"lag_ms": round(lag_so_far * 1000, 2),
+			"stack": stack,
+		}
+		self.stalls.append(stall)
+		self.stalls_total += 1
+		return stall
+
+	def snapshot(self) -> dict:
+		return {
+			"enabled": self.running,
+			"interval_ms": round(self.interval_seconds * 1000, 2),
+			"threshold_ms": round(self.threshold_seconds * 1000, 2),
+			"lag": self.lag.snapshot(),
+			"stalls_total": self.stalls_total,
+			"recent_stalls": list(self.stalls),
+		}
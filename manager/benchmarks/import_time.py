@@ -0,0 +1,70 @@
+"""Startup benchmark: how long `import manager.backend.app` takes, per module.
+
+Runs a fresh interpreter under ``python -X importtime`` and reports the
+total plus the slowest modules by cumulative time. Run from the repo root:
+
+    python manager/benchmarks/import_time.py [--top 15] [--module manager.backend.app] [--json]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+
+
+def measure(module: str):
+    """Return [(module, self_us, cumulative_us)] in import order."""
+    env = dict(os.environ, PYTHONPATH=str(REPO_ROOT))
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=str(REPO_ROOT),
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        rows.append((name.strip(), int(self_us), int(cumulative_us)))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", default="manager.backend.app")
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--json", action="store_true", help="machine-readable output for tracking over time")
+    args = parser.parse_args()
+
+    rows = measure(args.module)
+    total_us = sum(self_us for _, self_us, _ in rows)
+    slowest = sorted(rows, key=lambda r: r[2], reverse=True)[: args.top]
+    loaded = {name for name, _, _ in rows}
+    heavy = {name: name in loaded for name in ("psutil", "httpx", "uvicorn")}
+
+    if args.json:
+        print(json.dumps({
+            "module": args.module,
+            "total_ms": round(total_us / 1000, 2),
+            "modules": len(rows),
+            "heavy_imports": heavy,
+            "slowest": [{"module": n, "self_ms": s / 1000, "cumulative_ms": c / 1000} for n, s, c in slowest],
+        }, indent=2))
+        return
+
+    print(f"import {args.module}: {total_us / 1000:.1f} ms across {len(rows)} modules")
+    print("heavy imports loaded: " + ", ".join(f"{k}={'yes' if v else 'no'}" for k, v in heavy.items()))
+    print(f"{'cumulative ms':>14} {'self ms':>9}  module")
+    for name, self_us, cumulative_us in slowest:
+        print(f"{cumulative_us / 1000:>14.1f} {self_us / 1000:>9.1f}  {name}")
+
+
+if __name__ == "__main__":
+    main()
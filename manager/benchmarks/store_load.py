@@ -0,0 +1,77 @@
+"""Cold-load benchmark for the YAML project store.
+
+Writes a projects.yaml with N projects to a temp dir and times
+ProjectStore construction with the pure-Python loader, with libyaml's
+CSafeLoader, and from the validated-snapshot cache. Run from the repo root:
+
+    python manager/benchmarks/store_load.py [--projects 5000] [--repeat 3]
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import yaml
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from manager.backend import project_store  # noqa: E402
+from manager.backend.models import ProjectConfig  # noqa: E402
+from manager.backend.project_store import ProjectStore  # noqa: E402
+
+
+def _fixture(path: Path, count: int) -> None:
+    store = ProjectStore(path, snapshot_cache=False)
+    for i in range(count):
+        store.upsert_project(ProjectConfig(
+            id=f"project-{i}",
+            name=f"Project {i}",
+            working_dir=f"/srv/project-{i}",
+            command="python",
+            args=["-m", "app", "--port", str(8000 + i)],
+            env={"ENV": "prod", "WORKERS": "4"},
+            ports=[8000 + i],
+            actions={"migrate": ["-m", "app.migrate"]},
+            tags=["web", f"team-{i % 7}"],
+        ))
+    store.flush()
+
+
+def _best(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--projects", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "projects.yaml"
+        _fixture(path, args.projects)
+        size_kb = path.stat().st_size / 1024
+
+        c_loader = project_store._SafeLoader
+        project_store._SafeLoader = yaml.SafeLoader
+        pure = _best(lambda: ProjectStore(path, snapshot_cache=False), args.repeat)
+        project_store._SafeLoader = c_loader
+        libyaml = _best(lambda: ProjectStore(path, snapshot_cache=False), args.repeat)
+        ProjectStore(path)  # prime the cache
+        cached = _best(lambda: ProjectStore(path), args.repeat)
+
+    print(f"{args.projects} projects, {size_kb:.0f} KiB of YAML (best of {args.repeat})")
+    print(f"  pure-Python SafeLoader + validation: {pure:>9.1f} ms")
+    print(f"  {c_loader.__name__:<11} + validation:         {libyaml:>9.1f} ms")
+    print(f"  validated-snapshot cache:            {cached:>9.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -6,8 +6,11 @@ Supports Arabic and English languages
 """
 
 import tkinter as tk
+import tkinter.font as tkfont
 from tkinter import ttk, messagebox, scrolledtext
 import threading
+import math
+import queue
 import time
 import json
 import requests
@@ -17,15 +20,20 @@ import subprocess
 import sys
 import os
 from pathlib import Path
+from typing import List
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import itertools
 import locale
+import traceback
 
 # Add backend to path
 sys.path.append(str(Path(__file__).parent / "backend"))
 
-from backend.process_manager import ProcessManager
-from backend.project_store import ProjectStore
 from backend.orchestrator import Orchestrator
-from backend.models import ProjectConfig, HealthcheckConfig, RestartPolicy
+from backend.models import ProjectConfig, HealthcheckConfig, RestartPolicy, Project
+from backend.metric_history import MetricHistory
+from pydantic import TypeAdapter, ValidationError
 
 # Language support
 class LanguageManager:
@@ -131,6 +139,487 @@ class LanguageManager:
         self.current_language = lang
 
 
+class BackgroundWorker:
+    """Runs blocking work (psutil sampling, HTTP calls) off the Tk main thread.
+
+    Tk must only be touched from the main thread, so callbacks are not run
+    by the worker threads: finished tasks are queued and the main loop
+    drains the queue with ``root.after``. A task submitted with a ``key`` is
+    dropped while another task with that key is still in flight, so a slow
+    refresh never piles up behind itself.
+    """
+
+    def __init__(self, root, max_workers=2, poll_ms=50):
+        self.root = root
+        self.poll_ms = poll_ms
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="desktop-worker")
+        self._done = queue.SimpleQueue()
+        self._busy = set()
+        self._closed = False
+        self.root.after(self.poll_ms, self._drain)
+
+    def submit(self, fn, on_done=None, on_error=None, key=None):
+        """Run ``fn()`` in the background, then ``on_done(result)`` or ``on_error(exc)`` on the Tk thread."""
+        if self._closed or (key is not None and key in self._busy):
+            return False
+        if key is not None:
+            self._busy.add(key)
+
+        def run():
+            try:
+                result = fn()
+            except Exception as e:
+                self._done.put((key, on_error, e))
+            else:
+                self._done.put((key, on_done, result))
+
+        self._pool.submit(run)
+        return True
+
+    def _drain(self):
+        while True:
+            try:
+                key, callback, value = self._done.get_nowait()
+            except queue.Empty:
+                break
+            self._busy.discard(key)
+            if callback is None:
+                if isinstance(value, Exception):
+                    traceback.print_exception(type(value), value, value.__traceback__)
+                continue
+            try:
+                callback(value)
+            except Exception:
+                traceback.print_exc()
+        if not self._closed:
+            self.root.after(self.poll_ms, self._drain)
+
+    def post(self, callback, value=None):
+        """Run ``callback(value)`` on the Tk thread; safe to call from any thread."""
+        self._done.put((None, callback, value))
+
+    def shutdown(self):
+        self._closed = True
+        self._pool.shutdown(wait=False)
+
+
+class HubClient:
+    """Client for the embedded hub server.
+
+    Commands go over REST through one pooled ``requests.Session``. Live
+    project snapshots come from the server's ``/ws`` stream, followed on a
+    daemon thread that reconnects with backoff, so the desktop never
+    samples processes the orchestrator is already sampling.
+    """
+
+    _projects = TypeAdapter(List[Project])
+
+    def __init__(self, base_url="http://127.0.0.1:8000"):
+        from requests.adapters import HTTPAdapter
+
+        self.base_url = base_url
+        self.session = requests.Session()
+        self.session.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=4))
+        self.connected = False
+        self._ws = None
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def call(self, method, path, timeout=10, **kwargs):
+        """One REST call; raises RuntimeError with the server's message on failure."""
+        response = self.session.request(method, self.base_url + path, timeout=timeout, **kwargs)
+        if response.status_code >= 400:
+            raise RuntimeError(response.text)
+        return response
+
+    def subscribe(self, on_snapshot, on_state):
+        """Follow /ws: ``on_snapshot(projects)`` per snapshot, ``on_state(connected)`` on (dis)connect.
+
+        Both are called on the stream thread.
+        """
+        self._thread = threading.Thread(target=self._follow, args=(on_snapshot, on_state), name="hub-stream", daemon=True)
+        self._thread.start()
+
+    def resync(self):
+        """Ask the server for a fresh snapshot now instead of at its next tick."""
+        ws = self._ws
+        if ws is not None:
+            try:
+                ws.send("{}")
+            except Exception:
+                pass
+
+    def _follow(self, on_snapshot, on_state):
+        from websockets.exceptions import WebSocketException
+        from websockets.sync.client import connect
+
+        url = "ws" + self.base_url[len("http"):] + "/ws"
+        delay = 0.5
+        while not self._stopped.is_set():
+            try:
+                with connect(url, open_timeout=5, max_size=None) as ws:
+                    self._ws = ws
+                    self.connected = True
+                    on_state(True)
+                    delay = 0.5
+                    for message in ws:
+                        try:
+                            projects = self._projects.validate_json(message)
+                        except ValidationError:
+                            continue  # e.g. {"error": ...} for a bad subscription
+                        on_snapshot(projects)
+            except (OSError, TimeoutError, WebSocketException):
+                pass
+            finally:
+                self._ws = None
+            if self.connected:
+                self.connected = False
+                on_state(False)
+            self._stopped.wait(delay)
+            delay = min(delay * 2, 10)
+
+    def close(self):
+        self._stopped.set()
+        ws = self._ws
+        if ws is not None:
+            ws.close()
+        self.session.close()
+
+
+def _nice_ceiling(value):
+    """Smallest 1, 2 or 5 times a power of ten that is >= value (chart y scales)"""
+    step = 10 ** math.floor(math.log10(value)) if value > 0 else 1
+    for m in (1, 2, 5, 10):
+        if m * step >= value:
+            return m * step
+    return 10 * step
+
+
+class MetricChart:
+    """Live chart of one MetricHistory on a Tk Canvas, one min/max line per pixel column.
+
+    Columns are absolute (``floor(t / seconds_per_pixel)``), so when time
+    advances everything already drawn moves left by whole pixels with one
+    ``canvas.move``, new columns are appended as a small line item, and
+    items that scrolled out are deleted. Only the newest, still-filling
+    column is redrawn on each update. A new history, view span, size or a
+    value above the y scale triggers a full redraw from the downsampled history.
+    """
+
+    HEIGHT = 110
+    PAD = 16
+
+    def __init__(self, parent, title, unit, color):
+        self.title = title
+        self.unit = unit
+        self.color = color
+        self.canvas = tk.Canvas(parent, height=self.HEIGHT, bg='#0f172a', highlightthickness=0)
+        self.history = None
+        self.span_seconds = 600
+        self._items = deque()  # (canvas item, last column it covers), oldest first
+        self._open_item = None
+        self._closed_column = None
+        self._now_column = None
+        self._width = 1
+        self._y_max = 1.0
+        self.canvas.bind('<Configure>', lambda e: self.redraw())
+
+    def show(self, history, span_seconds):
+        self.history = history
+        self.span_seconds = span_seconds
+        self.redraw()
+
+    def _seconds_per_pixel(self):
+        return self.span_seconds / self._width
+
+    def _coords(self, columns):
+        bottom = self.HEIGHT - 4
+        scale = (bottom - self.PAD) / self._y_max
+        coords = []
+        for column, lo, hi in columns:
+            x = self._width - 1 - (self._now_column - column)
+            coords += (x, bottom - hi * scale, x, bottom - lo * scale)
+        if len(coords) == 4:
+            coords += (coords[0] + 1, coords[1])  # a lone column still needs a visible line
+        return coords
+
+    def _draw(self, columns):
+        return self.canvas.create_line(*self._coords(columns), fill=self.color, tags=('data',))
+
+    def _label(self):
+        history = self.history
+        value = f"{history.last_value:.1f} {self.unit}" if history is not None and len(history) else "—"
+        self.canvas.delete('label')
+        self.canvas.create_text(6, 2, anchor='nw', fill='#cbd5e1', font=('Segoe UI', 8), tags=('label',),
+                                text=f"{self.title}: {value}   (scale {self._y_max:g} {self.unit})")
+
+    def redraw(self):
+        """Draw the whole view from the history"""
+        self.canvas.delete('data')
+        self._items.clear()
+        self._open_item = None
+        self._width = max(self.canvas.winfo_width(), 1)
+        history = self.history
+        if history is None or not len(history):
+            self._closed_column = None
+            self._label()
+            return
+        spp = self._seconds_per_pixel()
+        self._now_column = int(history.last_time // spp)
+        first = self._now_column - self._width + 1
+        columns = history.columns(first * spp, (self._now_column + 1) * spp, spp)
+        if not columns:
+            self._closed_column = None
+            self._label()
+            return
+        self._y_max = _nice_ceiling(max([hi for _, _, hi in columns] + [1e-9]))
+        if len(columns) > 1:
+            self._items.append((self._draw(columns[:-1]), columns[-2][0]))
+        self._closed_column = columns[-2][0] if len(columns) > 1 else None
+        self._open_item = self._draw(columns[-1:] if self._closed_column is None else columns[-2:])
+        self._label()
+
+    def update(self):
+        """Catch up with samples added to the history since the last draw"""
+        history = self.history
+        if history is None or not len(history):
+            return
+        if self._now_column is None or self.canvas.winfo_width() != self._width:
+            self.redraw()
+            return
+        spp = self._seconds_per_pixel()
+        now = int(history.last_time // spp)
+        since = self._now_column if self._closed_column is None else self._closed_column
+        columns = history.columns(since * spp, (now + 1) * spp, spp)
+        if not columns:
+            return
+        if max(hi for _, _, hi in columns) > self._y_max:
+            self.redraw()
+            return
+        if now != self._now_column:
+            self.canvas.move('data', -(now - self._now_column), 0)
+            self._now_column = now
+        if self._open_item is not None:
+            self.canvas.delete(self._open_item)
+        # Columns before `now` are final: draw them once, joined to what is already there
+        if len(columns) > 1 and columns[-2][0] != self._closed_column:
+            self._items.append((self._draw(columns[:-1]), columns[-2][0]))
+            self._closed_column = columns[-2][0]
+            columns = columns[-2:]
+        self._open_item = self._draw(columns)
+        oldest_visible = now - self._width
+        while self._items and self._items[0][1] < oldest_visible:
+            self.canvas.delete(self._items.popleft()[0])
+        self._label()
+
+
+class LogView:
+    """Virtualized view of a project's log, paged from the server by byte offset.
+
+    The buffer holds at most ``MAX_LINES`` lines, as pages of
+    ``(start offset, lines)``, and the Text widget only ever contains the
+    rows that fit on screen, so scrolling costs one small redraw whatever
+    the buffer size. Scrolling to the top fetches the page before the first
+    one (``before=``); follow mode polls for lines appended past the last
+    one (``after=``). Pages falling out of the bound are dropped from the
+    end away from the reader and fetched again if they scroll back.
+    """
+
+    PAGE_LINES = 500
+    MAX_LINES = 5000
+    POLL_MS = 2000
+
+    def __init__(self, parent, client, worker):
+        self.client = client
+        self.worker = worker
+        self.frame = tk.Frame(parent, bg='#1e293b')
+        self.font = tkfont.Font(family='Consolas', size=9)
+        self.text = tk.Text(self.frame, bg='#0f172a', fg='#f8fafc', font=self.font, wrap=tk.NONE,
+                            height=1, state=tk.DISABLED, cursor='arrow')
+        self.yscroll = ttk.Scrollbar(self.frame, orient=tk.VERTICAL, command=self._on_scrollbar)
+        xscroll = ttk.Scrollbar(self.frame, orient=tk.HORIZONTAL, command=self.text.xview)
+        self.text.configure(xscrollcommand=xscroll.set)
+        self.text.grid(row=0, column=0, sticky='nsew')
+        self.yscroll.grid(row=0, column=1, sticky='ns')
+        xscroll.grid(row=1, column=0, sticky='ew')
+        self.frame.rowconfigure(0, weight=1)
+        self.frame.columnconfigure(0, weight=1)
+        self.follow = tk.BooleanVar(value=True)
+
+        self.project_id = None
+        self._generation = 0
+        self._reset()
+        self.text.bind('<Configure>', lambda e: self.render())
+        self.text.bind('<MouseWheel>', lambda e: self.scroll(-3 if e.delta > 0 else 3))
+        self.text.bind('<Button-4>', lambda e: self.scroll(-3))
+        self.text.bind('<Button-5>', lambda e: self.scroll(3))
+        self.text.bind('<Prior>', lambda e: self.scroll(-self._rows()))
+        self.text.bind('<Next>', lambda e: self.scroll(self._rows()))
+        self.text.bind('<Home>', lambda e: self.scroll_to(0))
+        self.text.bind('<End>', lambda e: self.scroll_to(len(self.lines)))
+        self.text.bind('<Button-1>', lambda e: self.text.focus_set())
+        self.frame.after(self.POLL_MS, self._poll)
+
+    def _reset(self, message=None):
+        self.pages = deque()  # (start offset, line count), oldest first
+        self.lines = deque()
+        self.end = None  # offset just past the last buffered line
+        self.more_before = False
+        self.top = 0
+        self.stick = True  # keep the newest line in view as lines arrive
+        self.message = message
+
+    def show(self, project_id):
+        """Switch to a project's log (no-op if it is already shown)"""
+        if project_id != self.project_id:
+            self.project_id = project_id
+            self.reload()
+
+    def reload(self):
+        """Drop the buffer and fetch the tail again"""
+        self._generation += 1
+        self._reset()
+        if self.client.connected:
+            self._fetch({'lines': self.PAGE_LINES}, self._loaded_tail, key='logs-tail')
+        else:
+            self.message = "Server not running - cannot fetch logs"  # the next poll retries
+        self.render()
+
+    def clear(self):
+        """Empty the view; follow mode keeps adding lines written from now on"""
+        if self.end is not None:
+            end = self.end
+            self._reset()
+            self.end = end
+            self.pages.append((end, 0))
+            self.more_before = end > 0
+        self.render()
+
+    def _fetch(self, params, on_page, key):
+        if self.project_id is None:
+            return
+        generation, path = self._generation, f"/api/projects/{self.project_id}/logs"
+
+        def fetch():
+            return self.client.call("GET", path, params=params).json()
+
+        def done(data):
+            if generation == self._generation:
+                on_page(data)
+
+        def failed(error):
+            if generation == self._generation and self.end is None:
+                self.message = f"Error fetching logs: {error}"
+                self.render()
+
+        self.worker.submit(fetch, done, failed, key=key)
+
+    def _loaded_tail(self, data):
+        if data.get('start') is None:
+            # No log configured or not written yet: show the server's note and retry on the next poll
+            self.message = '\n'.join(data.get('lines', []))
+        else:
+            self.message = None
+            self.end = data['end']
+            self.pages.append((data['start'], len(data['lines'])))
+            self.lines.extend(data['lines'])
+            self.more_before = data.get('truncated', False)
+            self.top = len(self.lines)
+        self.render()
+
+    def _loaded_older(self, data):
+        lines = data.get('lines', [])
+        if data.get('start') is None or not self.pages or data['end'] != self.pages[0][0]:
+            return  # rotated meanwhile; the next follow poll resets
+        self.pages.appendleft((data['start'], len(lines)))
+        self.lines.extendleft(reversed(lines))
+        self.more_before = data.get('truncated', False) and bool(lines)
+        self.top += len(lines)
+        while len(self.lines) > self.MAX_LINES and len(self.pages) > 1:
+            # Reading back in time: forget the newest page, follow mode fetches it again
+            start, count = self.pages.pop()
+            for _ in range(count):
+                self.lines.pop()
+            self.end = start
+            self.stick = False
+        self.render()
+
+    def _loaded_newer(self, data):
+        lines = data.get('lines', [])
+        if data.get('start') is None:
+            return
+        progressed = data['end'] != self.end
+        if data['start'] < self.end:
+            # Truncated or rotated: start over from what the server found
+            self._reset()
+            self.more_before = data['start'] > 0
+        if lines:
+            self.pages.append((data['start'], len(lines)))
+            self.lines.extend(lines)
+        self.end = data['end']
+        while len(self.lines) > self.MAX_LINES and len(self.pages) > 1:
+            start, count = self.pages.popleft()
+            for _ in range(count):
+                self.lines.popleft()
+            self.top = max(0, self.top - count)
+            self.more_before = True
+        if self.stick:
+            self.top = len(self.lines)
+        self.render()
+        if data.get('truncated') and progressed and (self.stick or len(self.lines) < self.MAX_LINES):
+            self._poll(reschedule=False)
+
+    def _poll(self, reschedule=True):
+        if self.project_id is not None and self.client.connected:
+            if self.end is None:
+                self._fetch({'lines': self.PAGE_LINES}, self._loaded_tail, key='logs-tail')
+            elif self.follow.get() and (self.stick or len(self.lines) < self.MAX_LINES):
+                self._fetch({'after': self.end, 'lines': self.PAGE_LINES}, self._loaded_newer, key='logs-follow')
+        if reschedule:
+            self.frame.after(self.POLL_MS, self._poll)
+
+    def _rows(self):
+        return max(1, self.text.winfo_height() // self.font.metrics('linespace'))
+
+    def scroll(self, rows):
+        self.scroll_to(self.top + rows)
+        return 'break'
+
+    def scroll_to(self, top):
+        rows = self._rows()
+        last = max(0, len(self.lines) - rows)
+        self.top = max(0, min(top, last))
+        self.stick = self.top >= last
+        if self.top == 0 and self.more_before and self.pages:
+            self._fetch({'before': self.pages[0][0], 'lines': self.PAGE_LINES}, self._loaded_older, key='logs-older')
+        self.render()
+        return 'break'
+
+    def _on_scrollbar(self, action, amount, unit=None):
+        if action == 'moveto':
+            self.scroll_to(round(float(amount) * len(self.lines)))
+        elif action == 'scroll':
+            self.scroll(int(amount) * (self._rows() if unit == 'pages' else 1))
+
+    def render(self):
+        """Put the rows that fit on screen into the Text widget"""
+        rows = self._rows()
+        total = len(self.lines)
+        self.top = max(0, min(self.top, total - rows))
+        if self.message is not None:
+            content = self.message
+        else:
+            content = '\n'.join(itertools.islice(self.lines, self.top, self.top + rows))
+        self.text.configure(state=tk.NORMAL)
+        self.text.delete('1.0', tk.END)
+        self.text.insert('1.0', content)
+        self.text.configure(state=tk.DISABLED)
+        if total:
+            self.yscroll.set(self.top / total, min(1.0, (self.top + rows) / total))
+        else:
+            self.yscroll.set(0, 1)
+
+
 class NextGenDesktop:
     def __init__(self):
         self.root = tk.Tk()
@@ -151,13 +640,7 @@ class NextGenDesktop:
         except:
             pass
         
-        # Initialize backend components
-        from backend.project_store import default_store_path
-        from pathlib import Path
-        
-        self.store = ProjectStore(default_store_path())
-        runtime_dir = Path("data/runtime")
-        self.process_manager = ProcessManager(runtime_dir)
+        # The embedded server owns the store and the processes; this window only talks to it
         self.orchestrator = None
         
         # Server process
@@ -168,6 +651,17 @@ class NextGenDesktop:
         self.projects = []
         self.selected_project = None
         
+        # Metric history per project id: cpu, rss, health latency, last health check seen
+        self.histories = {}
+        self.chart_project_id = None
+        self.chart_span = 600
+        
+        # Sampling and HTTP calls run here, never on the Tk thread
+        self.worker = BackgroundWorker(self.root)
+        self.client = HubClient()
+        self._latest_snapshot = None
+        self._snapshot_lock = threading.Lock()
+        
         # Setup UI
         self.setup_styles()
         self.create_widgets()
@@ -176,9 +670,6 @@ class NextGenDesktop:
         # Start backend server
         self.start_backend_server()
         
-        # Start data refresh
-        self.refresh_data()
-        
         # Handle window close
         self.root.protocol("WM_DELETE_WINDOW", self.on_closing)
     
@@ -307,6 +798,9 @@ class NextGenDesktop:
                                 style='Custom.Treeview',
                                 columns=('status', 'cpu', 'memory'),
                                 show='tree headings')
+        # What each row currently shows, by iid, and the row order (see update_project_list)
+        self._tree_rows = {}
+        self._tree_order = []
         
         self.tree.heading('#0', text='Project Name')
         self.tree.heading('status', text='Status')
@@ -451,31 +945,93 @@ class NextGenDesktop:
         logs_control = tk.Frame(self.logs_frame, bg='#1e293b')
         logs_control.pack(fill=tk.X, padx=10, pady=5)
         
+        # Logs display: only the visible rows are in the widget, older pages load on scroll
+        self.log_view = LogView(self.logs_frame, self.client, self.worker)
+        
         ttk.Button(logs_control, 
                   text=f"🔄 {self.lang.get('refresh_logs')}", 
-                  command=self.refresh_logs).pack(side=tk.LEFT, padx=5)
+                  command=self.log_view.reload).pack(side=tk.LEFT, padx=5)
         
         ttk.Button(logs_control, 
                   text=f"🗑️ {self.lang.get('clear_logs')}", 
-                  command=self.clear_logs).pack(side=tk.LEFT, padx=5)
+                  command=self.log_view.clear).pack(side=tk.LEFT, padx=5)
         
-        # Logs display
-        self.logs_text = scrolledtext.ScrolledText(self.logs_frame, 
-                                                  bg='#0f172a', 
-                                                  fg='#f8fafc',
-                                                  font=('Consolas', 9),
-                                                  wrap=tk.WORD)
-        self.logs_text.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
+        ttk.Checkbutton(logs_control, text="Follow", variable=self.log_view.follow).pack(side=tk.LEFT, padx=5)
+        
+        self.log_view.frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
+    
+    CHART_SPANS = {'10 min': 600, '1 h': 3600, '24 h': 86400}
     
     def setup_metrics_tab(self):
         """Setup the metrics tab content"""
+        charts_control = tk.Frame(self.metrics_frame, bg='#1e293b')
+        charts_control.pack(fill=tk.X, padx=10, pady=(10, 0))
+        span_names = {v: k for k, v in self.CHART_SPANS.items()}
+        self.chart_span_var = tk.StringVar(value=span_names.get(self.chart_span, '10 min'))
+        span_box = ttk.Combobox(charts_control, textvariable=self.chart_span_var,
+                                values=list(self.CHART_SPANS), state='readonly', width=8)
+        span_box.pack(side=tk.RIGHT)
+        span_box.bind('<<ComboboxSelected>>', self.change_chart_span)
+        
+        self.charts = [
+            MetricChart(self.metrics_frame, 'CPU', '%', '#38bdf8'),
+            MetricChart(self.metrics_frame, 'RSS', 'MB', '#a78bfa'),
+            MetricChart(self.metrics_frame, 'Health latency', 'ms', '#34d399'),
+        ]
+        for chart in self.charts:
+            chart.canvas.pack(fill=tk.X, padx=10, pady=(6, 0))
+        self.chart_project_id = None
+        
         # Metrics display
         self.metrics_text = scrolledtext.ScrolledText(self.metrics_frame, 
                                                      bg='#334155', 
                                                      fg='#f8fafc',
-                                                     font=('Consolas', 9))
+                                                     font=('Consolas', 9),
+                                                     height=12)
         self.metrics_text.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
     
+    def change_chart_span(self, event=None):
+        self.chart_span = self.CHART_SPANS[self.chart_span_var.get()]
+        self.chart_project_id = None
+        self.update_charts()
+    
+    def record_history(self, projects, now=None):
+        """Append each running project's metrics to its history (health latency once per check)"""
+        now = time.time() if now is None else now
+        live = set()
+        for project in projects:
+            pid = project.config.id
+            live.add(pid)
+            runtime = project.runtime
+            entry = self.histories.get(pid)
+            if runtime.status != "running" and entry is None:
+                continue
+            if entry is None:
+                entry = self.histories[pid] = [MetricHistory(), MetricHistory(), MetricHistory(), None]
+            cpu, rss, latency, last_check = entry
+            if runtime.status == "running":
+                cpu.add(now, runtime.metrics.cpu_percent)
+                rss.add(now, runtime.metrics.memory_rss_mb)
+            health = runtime.health
+            if health.last_checked_at is not None and health.last_checked_at != last_check and health.latency_ms is not None:
+                latency.add(now, health.latency_ms)
+                entry[3] = health.last_checked_at
+        for pid in self.histories.keys() - live:
+            del self.histories[pid]
+    
+    def update_charts(self):
+        """Show the selected project's history, incrementally when it is the one already shown"""
+        project_id = self.selected_project.config.id if self.selected_project else None
+        entry = self.histories.get(project_id)
+        histories = entry[:3] if entry else (None, None, None)
+        refresh = project_id != self.chart_project_id
+        self.chart_project_id = project_id
+        for chart, history in zip(self.charts, histories):
+            if refresh or chart.history is not history:
+                chart.show(history, self.chart_span)
+            else:
+                chart.update()
+    
     def change_language(self, event=None):
         """Change the application language"""
         new_lang = self.lang_var.get()
@@ -510,10 +1066,10 @@ class NextGenDesktop:
         def run_server():
             try:
                 import uvicorn
-                from backend.app import app
+                from backend.app import create_app
                 
                 # Start server
-                uvicorn.run(app, host="127.0.0.1", port=8000, log_level="info")
+                uvicorn.run(create_app(), host="127.0.0.1", port=8000, log_level="info")
             except Exception as e:
                 print(f"Failed to start server: {e}")
         
@@ -521,80 +1077,111 @@ class NextGenDesktop:
         server_thread = threading.Thread(target=run_server, daemon=True)
         server_thread.start()
         
-        # Update status after delay
-        self.root.after(3000, self.check_server_status)
+        # Live snapshots from the server once it is up (the stream retries until then)
+        self.client.subscribe(self._on_snapshot, lambda connected: self.worker.post(self._server_state, connected))
     
-    def check_server_status(self):
-        """Check if the server is running"""
-        try:
-            response = requests.get("http://127.0.0.1:8000/api/projects", timeout=2)
-            if response.status_code == 200:
-                self.server_running = True
-                self.server_status_label.config(text="Server: Running ✅")
-            else:
-                self.server_status_label.config(text="Server: Error ❌")
-        except:
-            self.server_status_label.config(text="Server: Not Running ❌")
-            # Retry after 5 seconds
-            self.root.after(5000, self.check_server_status)
+    def _server_state(self, connected):
+        self.server_running = connected
+        self.server_status_label.config(text="Server: Running ✅" if connected else "Server: Not Running ❌")
+    
+    def _on_snapshot(self, projects):
+        """Stream thread: hand the newest snapshot to Tk, dropping any the UI had no time to show"""
+        with self._snapshot_lock:
+            pending = self._latest_snapshot is not None
+            self._latest_snapshot = projects
+        if not pending:
+            self.worker.post(self._show_latest_snapshot)
+    
+    def _show_latest_snapshot(self, _=None):
+        with self._snapshot_lock:
+            projects, self._latest_snapshot = self._latest_snapshot, None
+        if projects is not None:
+            self._show_projects(projects)
     
     def refresh_data(self):
-        """Refresh project data"""
-        try:
-            # Load projects from store
-            self.projects = []
-            for p in self.store.list_projects():
-                # Update status and collect metrics
-                updated_project = self.process_manager.status(p)
-                if updated_project.runtime.status == "running":
-                    updated_project = self.process_manager.collect_metrics(updated_project)
-                self.projects.append(updated_project)
-            self.update_project_list()
-            self.status_label.config(text=f"{self.lang.get('ready')}: {len(self.projects)}")
-            if self.selected_project:
-                # Keep selection consistent by id
-                sel_id = self.selected_project.config.id
-                for proj in self.projects:
-                    if proj.config.id == sel_id:
-                        self.selected_project = proj
-                        break
-                self.update_project_details()
-        except Exception as e:
-            self.status_label.config(text=f"Error loading projects: {e}")
-        # Schedule next refresh
-        self.root.after(5000, self.refresh_data)
+        """Ask the server for a fresh snapshot; until its stream is up the last one stays shown"""
+        if self.client.connected:
+            self.worker.submit(self.client.resync, key="resync")
+        else:
+            self.status_label.config(text=self.lang.get('server_starting'))
+    
+    def _require_server(self):
+        """Commands only go through the server: the store and pid files are its alone"""
+        if self.server_running:
+            return True
+        messagebox.showwarning("Warning", "Server is not running. Please wait for it to start.")
+        return False
+    
+    def _show_projects(self, projects):
+        self.projects = projects
+        self.record_history(projects)
+        self.update_project_list()
+        self.status_label.config(text=f"{self.lang.get('ready')}: {len(self.projects)}")
+        if self.selected_project:
+            # Keep selection consistent by id
+            sel_id = self.selected_project.config.id
+            for proj in self.projects:
+                if proj.config.id == sel_id:
+                    self.selected_project = proj
+                    break
+            self.update_project_details()
+    
+    @staticmethod
+    def _project_row(project):
+        """(text, values) of a project's Treeview row"""
+        status = project.runtime.status
+        cpu = f"{project.runtime.metrics.cpu_percent:.1f}" if project.runtime.metrics else "0.0"
+        memory = f"{project.runtime.metrics.memory_rss_mb:.1f}" if project.runtime.metrics else "0.0"
+        status_emoji = {
+            'running': '🟢',
+            'stopped': '🔴',
+            'error': '🟠',
+            'starting': '🟡',
+            'unhealthy': '🟡',
+            'crashed': '🔴'
+        }.get(status, '⚪')
+        # Health indicator
+        health_emoji = ""
+        if project.runtime.health:
+            if project.runtime.health.status == "healthy":
+                health_emoji = "✅"
+            elif project.runtime.health.status == "unhealthy":
+                health_emoji = "⚠️"
+            else:
+                health_emoji = "❓"
+        return f"{status_emoji} {project.config.name} {health_emoji}", (status, cpu, memory)
     
     def update_project_list(self):
-        """Update the project list in the treeview"""
-        # Clear existing items
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-        # Add projects
-        for project in self.projects:
-            status = project.runtime.status
-            cpu = f"{project.runtime.metrics.cpu_percent:.1f}" if project.runtime.metrics else "0.0"
-            memory = f"{project.runtime.metrics.memory_rss_mb:.1f}" if project.runtime.metrics else "0.0"
-            status_emoji = {
-                'running': '🟢',
-                'stopped': '🔴',
-                'error': '🟠',
-                'starting': '🟡',
-                'unhealthy': '🟡',
-                'crashed': '🔴'
-            }.get(status, '⚪')
-            # Health indicator
-            health_emoji = ""
-            if project.runtime.health:
-                if project.runtime.health.status == "healthy":
-                    health_emoji = "✅"
-                elif project.runtime.health.status == "unhealthy":
-                    health_emoji = "⚠️"
-                else:
-                    health_emoji = "❓"
-            # Use iid as project id to retrieve later
-            self.tree.insert('', 'end', iid=project.config.id,
-                             text=f"{status_emoji} {project.config.name} {health_emoji}",
-                             values=(status, cpu, memory))
+        """Bring the treeview in line with self.projects, touching only rows that changed.
+
+        Rows are keyed by project id (the iid); unchanged rows cost no Tk
+        calls, so selection, focus and scroll position survive a refresh.
+        """
+        rows = self._tree_rows
+        order = [p.config.id for p in self.projects]
+        gone = rows.keys() - set(order)
+        known = set(rows)
+        if gone:
+            self.tree.delete(*gone)
+            for iid in gone:
+                del rows[iid]
+        for index, project in enumerate(self.projects):
+            iid = project.config.id
+            row = self._project_row(project)
+            current = rows.get(iid)
+            if current is None:
+                self.tree.insert('', index, iid=iid, text=row[0], values=row[1])
+            elif current != row:
+                self.tree.item(iid, text=row[0], values=row[1])
+            rows[iid] = row
+        if order != self._tree_order:
+            # Inserts landed at their index; rows only need moving if existing ones were reordered
+            kept = [iid for iid in self._tree_order if iid not in gone]
+            if kept != [iid for iid in order if iid in known]:
+                for index, iid in enumerate(order):
+                    if self.tree.index(iid) != index:
+                        self.tree.move(iid, '', index)
+            self._tree_order = order
     
     def on_project_select(self, event):
         """Handle project selection"""
@@ -639,9 +1226,16 @@ Restart Policy:
             hours = int(project.runtime.metrics.uptime_seconds // 3600)
             minutes = int((project.runtime.metrics.uptime_seconds % 3600) // 60)
             uptime_str = f"{hours}h {minutes}m"
+        instances_info = '\n'.join(
+            f"  #{inst.index}: pid {inst.pid}, {inst.health.status}, {inst.restarts_total} restart(s)"
+            + (f" - {inst.health.message}" if inst.health.message else '')
+            for inst in project.runtime.instances
+        ) or '  None'
         status_info = f"""Status: {project.runtime.status}
 Health: {project.runtime.health.status if project.runtime.health else 'Unknown'}
 PIDs: {', '.join(map(str, project.runtime.pids)) if project.runtime.pids else 'None'}
+Instances:
+{instances_info}
 Uptime: {uptime_str}
 Restarts: {project.runtime.restarts_total}
 Last Started: {project.runtime.started_at.strftime('%Y-%m-%d %H:%M:%S') if project.runtime.started_at else 'Never'}
@@ -681,93 +1275,39 @@ Instances: {project.config.instances}"""
             metrics_info = "No metrics available - project may not be running"
         self.metrics_text.delete(1.0, tk.END)
         self.metrics_text.insert(1.0, metrics_info)
-        self.refresh_logs()
-    
-    def refresh_logs(self):
-        """Refresh project logs"""
-        if not self.selected_project:
-            return
-        
-        try:
-            if self.server_running:
-                response = requests.get(f"http://127.0.0.1:8000/api/projects/{self.selected_project.config.id}/logs")
-                if response.status_code == 200:
-                    logs_data = response.json()
-                    logs_content = '\n'.join(logs_data.get('logs', []))
-                else:
-                    logs_content = "Failed to fetch logs from server"
-            else:
-                logs_content = "Server not running - cannot fetch logs"
-        except Exception as e:
-            logs_content = f"Error fetching logs: {e}"
-        
-        self.logs_text.delete(1.0, tk.END)
-        self.logs_text.insert(1.0, logs_content)
-        self.logs_text.see(tk.END)
-    
-    def clear_logs(self):
-        """Clear the logs display"""
-        self.logs_text.delete(1.0, tk.END)
+        self.update_charts()
+        self.log_view.show(project.config.id)
     
     def start_project(self):
         """Start the selected project"""
-        if not self.selected_project:
-            messagebox.showwarning("Warning", "Please select a project first")
-            return
-        try:
-            if self.server_running:
-                response = requests.post(f"http://127.0.0.1:8000/api/projects/{self.selected_project.config.id}/start")
-                if response.status_code == 200:
-                    messagebox.showinfo("Success", f"Project '{self.selected_project.config.name}' started successfully")
-                    self.refresh_data()
-                else:
-                    messagebox.showerror("Error", f"Failed to start project: {response.text}")
-            else:
-                self.process_manager.start(self.selected_project)
-                messagebox.showinfo("Success", f"Project '{self.selected_project.config.name}' started successfully")
-                self.refresh_data()
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to start project: {e}")
+        self._project_action("start", "started")
     
     def stop_project(self):
         """Stop the selected project"""
-        if not self.selected_project:
-            messagebox.showwarning("Warning", "Please select a project first")
-            return
-        try:
-            if self.server_running:
-                response = requests.post(f"http://127.0.0.1:8000/api/projects/{self.selected_project.config.id}/stop")
-                if response.status_code == 200:
-                    messagebox.showinfo("Success", f"Project '{self.selected_project.config.name}' stopped successfully")
-                    self.refresh_data()
-                else:
-                    messagebox.showerror("Error", f"Failed to stop project: {response.text}")
-            else:
-                self.process_manager.stop(self.selected_project)
-                messagebox.showinfo("Success", f"Project '{self.selected_project.config.name}' stopped successfully")
-                self.refresh_data()
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to stop project: {e}")
+        self._project_action("stop", "stopped")
     
     def restart_project(self):
         """Restart the selected project"""
+        self._project_action("restart", "restarted")
+    
+    def _project_action(self, verb, done):
+        """Run a start/stop/restart through the server in the background"""
         if not self.selected_project:
             messagebox.showwarning("Warning", "Please select a project first")
             return
-        try:
-            if self.server_running:
-                response = requests.post(f"http://127.0.0.1:8000/api/projects/{self.selected_project.config.id}/restart")
-                if response.status_code == 200:
-                    messagebox.showinfo("Success", f"Project '{self.selected_project.config.name}' restarted successfully")
-                    self.refresh_data()
-                else:
-                    messagebox.showerror("Error", f"Failed to restart project: {response.text}")
-            else:
-                self.process_manager.restart(self.selected_project)
-                messagebox.showinfo("Success", f"Project '{self.selected_project.config.name}' restarted successfully")
-                self.refresh_data()
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to restart project: {e}")
+        if not self._require_server():
+            return
+        project = self.selected_project
+        
+        def run():
+            self.client.call("POST", f"/api/projects/{project.config.id}/{verb}", timeout=60)
+        
+        def succeeded(_):
+            messagebox.showinfo("Success", f"Project '{project.config.name}' {done} successfully")
+            self.refresh_data()
+        
+        self.status_label.config(text=f"{verb.capitalize()}: {project.config.name}...")
+        self.worker.submit(run, succeeded, lambda e: messagebox.showerror("Error", f"Failed to {verb} project: {e}"))
     
     def edit_project(self):
         """Edit the selected project"""
@@ -783,15 +1323,21 @@ Instances: {project.config.instances}"""
             messagebox.showwarning("Warning", "Please select a project first")
             return
         
+        if not self._require_server():
+            return
+        
+        project = self.selected_project
         if messagebox.askyesno(self.lang.get('delete_title'), 
-                              f"{self.lang.get('confirm_delete')} '{self.selected_project.config.name}'?"):
-            try:
-                self.store.delete_project(self.selected_project.config.id)
-                messagebox.showinfo("Success", f"Project '{self.selected_project.config.name}' deleted successfully")
+                              f"{self.lang.get('confirm_delete')} '{project.config.name}'?"):
+            def delete():
+                self.client.call("DELETE", f"/api/projects/{project.config.id}")
+            
+            def deleted(_):
+                messagebox.showinfo("Success", f"Project '{project.config.name}' deleted successfully")
                 self.selected_project = None
                 self.refresh_data()
-            except Exception as e:
-                messagebox.showerror("Error", f"Failed to delete project: {e}")
+            
+            self.worker.submit(delete, deleted, lambda e: messagebox.showerror("Error", f"Failed to delete project: {e}"))
     
     def show_add_project_dialog(self):
         """Show dialog to add a new project"""
@@ -799,20 +1345,33 @@ Instances: {project.config.instances}"""
     
     def show_project_dialog(self, project=None):
         """Show project creation/editing dialog"""
-        dialog = ProjectDialog(self.root, project, self.store)
-        if dialog.result:
+        if not self._require_server():
+            return
+        dialog = ProjectDialog(self.root, project)
+        config = dialog.result
+        if not config:
+            return
+        
+        def save():
+            # Fails with a connection error if the server went away while the dialog was open
+            self.client.call("POST", "/api/projects", json={"config": config.model_dump(mode="json")})
+        
+        def saved(_):
+            messagebox.showinfo("Success", f"Project '{config.name}' saved successfully")
             self.refresh_data()
+        
+        self.worker.submit(save, saved, lambda e: messagebox.showerror("Error", f"Failed to save project: {e}"))
     
     def open_web_dashboard(self):
         """Open the web dashboard in browser"""
-        if self.server_running:
+        if self._require_server():
             webbrowser.open("http://127.0.0.1:8000/dashboard")
-        else:
-            messagebox.showwarning("Warning", "Server is not running. Please wait for it to start.")
     
     def on_closing(self):
         """Handle application closing"""
         if messagebox.askokcancel("Quit", "Do you want to quit OrchestratorX Pro?"):
+            self.client.close()
+            self.worker.shutdown()
             self.root.destroy()
     
     def run(self):
@@ -821,10 +1380,11 @@ Instances: {project.config.instances}"""
 
 
 class ProjectDialog:
-    def __init__(self, parent, project=None, store=None):
+    """Modal form for a project's config; ``result`` is the validated ``ProjectConfig``, saved by the caller."""
+
+    def __init__(self, parent, project=None):
         self.parent = parent
         self.project = project
-        self.store = store
         self.result = None
         
         self.dialog = tk.Toplevel(parent)
@@ -1000,15 +1560,11 @@ class ProjectDialog:
                 env=env
             )
             
-            # Save project
-            self.store.upsert_project(project_config)
             self.result = project_config
-            
-            messagebox.showinfo("Success", f"Project '{name}' saved successfully")
             self.dialog.destroy()
             
         except Exception as e:
-            messagebox.showerror("Error", f"Failed to save project: {e}")
+            messagebox.showerror("Error", f"Invalid project: {e}")
     
     def cancel(self):
         """Cancel dialog"""
@@ -70,11 +70,15 @@ setup(
             "mkdocs>=1.4.0",
             "mkdocs-material>=8.0.0",
         ],
+        "speedups": [
+            "orjson>=3.9.0",
+        ],
     },
     entry_points={
         "console_scripts": [
             "nextgen-hub=manager.desktop_app:main",
             "nextgen-server=manager.backend.app:run",
+            "nextgen-supervisor=manager.backend.supervisor:main",
         ],
     },
     include_package_data=True,
@@ -0,0 +1,82 @@
+"""
+Tests for the application factory and lazy service construction
+"""
+
+import subprocess
+import sys
+from pathlib import Path
+
+from fastapi.testclient import TestClient
+
+from manager.backend.app import create_app
+from manager.backend.config import HubConfig
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+
+
+class TestCreateApp:
+    """Test cases for create_app"""
+
+    def test_import_defers_heavy_dependencies(self, tmp_path):
+        """Test that importing the app module loads neither psutil nor httpx and touches no files"""
+        code = (
+            "import sys, manager.backend.app as m\n"
+            "m.create_app()\n"
+            "print(sorted(k for k in ('psutil', 'httpx') if k in sys.modules))\n"
+        )
+        out = subprocess.run(
+            [sys.executable, "-c", code],
+            cwd=str(tmp_path),
+            env={"PYTHONPATH": str(REPO_ROOT)},
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+        assert out.strip() == "[]"
+        assert list(tmp_path.iterdir()) == []
+
+    def test_services_built_on_first_use(self, tmp_path):
+        """Test that create_app does no I/O until a request needs the store"""
+        config = HubConfig(data_dir=tmp_path / "data")
+        app = create_app(config)
+        assert not (tmp_path / "data").exists()
+        assert "store" not in app.state.hub.__dict__
+
+        with TestClient(app) as client:
+            assert client.get("/api/projects").json() == []
+        assert config.store_path.parent.exists()
+        assert "store" in app.state.hub.__dict__
+
+    def test_apps_are_isolated(self, tmp_path):
+        """Test that two apps in one process keep separate stores"""
+        first = create_app(HubConfig(data_dir=tmp_path / "one"))
+        second = create_app(HubConfig(data_dir=tmp_path / "two"))
+        body = {"config": {"id": "web", "name": "Web", "working_dir": str(tmp_path), "command": "true"}}
+
+        with TestClient(first) as a, TestClient(second) as b:
+            assert a.post("/api/projects", json=body).status_code == 200
+            assert [p["config"]["id"] for p in a.get("/api/projects").json()] == ["web"]
+            assert b.get("/api/projects").json() == []
+            assert a.get("/healthz").json() == {"ok": True, "app": "OrchestratorX"}
+
+    def test_ws_rejects_bad_subscription(self, tmp_path):
+        """Test that a subscription message with wrong option types gets an error reply and keeps the socket"""
+        with TestClient(create_app(HubConfig(data_dir=tmp_path / "data"))) as client:
+            with client.websocket_connect("/ws") as ws:
+                assert ws.receive_json() == []
+                ws.send_text('{"limit": "10"}')
+                assert ws.receive_json() == {"error": "limit must be an integer"}
+                ws.send_text('{"fields": ["name"]}')
+                assert ws.receive_json() == {"error": "fields must be a string"}
+                ws.send_text('{"fields": "id"}')
+                assert ws.receive_json() == []
+
+    def test_config_from_env(self, tmp_path, monkeypatch):
+        """Test that NEXTGEN_* environment variables override the defaults"""
+        monkeypatch.setenv("NEXTGEN_DATA_DIR", str(tmp_path))
+        monkeypatch.setenv("NEXTGEN_TICK_BUDGET_MS", "500")
+        config = HubConfig.from_env()
+        assert config.store_path == tmp_path.resolve() / "projects.yaml"
+        assert config.runtime_dir == tmp_path.resolve() / "runtime"
+        assert config.tick_budget_seconds == 0.5
+        assert config.loop_watchdog is False
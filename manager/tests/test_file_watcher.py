@@ -0,0 +1,48 @@
+"""
+Tests for the file watcher used by the project store
+"""
+
+import threading
+
+import pytest
+
+from manager.backend.file_watcher import FileWatcher, _load_libc
+
+
+def _watch(path, **kwargs):
+    changed = threading.Event()
+    watcher = FileWatcher(path, changed.set, poll_interval_seconds=0.05, debounce_seconds=0.02, **kwargs)
+    watcher.start()
+    return watcher, changed
+
+
+class TestFileWatcher:
+    def test_polling_sees_rewrites(self, tmp_path):
+        """Test that the polling fallback notices a changed file"""
+        path = tmp_path / "projects.yaml"
+        path.write_text("a", encoding="utf-8")
+        watcher, changed = _watch(path, use_inotify=False)
+        try:
+            assert watcher.backend == "poll"
+            path.write_text("bb", encoding="utf-8")
+            assert changed.wait(5)
+        finally:
+            watcher.stop()
+        assert not watcher.running
+
+    @pytest.mark.skipif(_load_libc() is None, reason="inotify is Linux-only")
+    def test_inotify_sees_rename_and_ignores_neighbours(self, tmp_path):
+        """Test that inotify reports a rename over the file but not other files in the directory"""
+        path = tmp_path / "projects.yaml"
+        path.write_text("a", encoding="utf-8")
+        watcher, changed = _watch(path)
+        try:
+            assert watcher.backend == "inotify"
+            (tmp_path / "other.yaml").write_text("x", encoding="utf-8")
+            assert not changed.wait(0.3)
+            tmp = tmp_path / ".projects.yaml.tmp"
+            tmp.write_text("b", encoding="utf-8")
+            tmp.replace(path)
+            assert changed.wait(5)
+        finally:
+            watcher.stop()
@@ -0,0 +1,151 @@
+"""
+Tests for command health checks and the probe pool
+"""
+
+import asyncio
+import os
+import sys
+import time
+
+import pytest
+
+from manager.backend.health import ProbePool, aggregate_health, check_health, per_instance
+from manager.backend.models import HealthcheckConfig, HealthReport, Project, ProjectConfig
+
+
+def make_project(tmp_path, script, project_id="svc", timeout=2):
+    config = ProjectConfig(
+        id=project_id,
+        name=project_id,
+        working_dir=str(tmp_path),
+        command=sys.executable,
+        env={"PROBE_GREETING": "pong"},
+        healthcheck=HealthcheckConfig(type="command", command=[sys.executable, "-c", script], timeout_seconds=timeout),
+    )
+    return Project(config=config)
+
+
+class TestCommandHealthcheck:
+    def test_exit_code_and_output(self, tmp_path):
+        """Test that exit code 0 is healthy and the probe's output becomes the message"""
+        ok = make_project(tmp_path, "import os; print(os.environ['PROBE_GREETING'])")
+        bad = make_project(tmp_path, "import sys; sys.stderr.write('queue depth 9000'); sys.exit(3)")
+
+        async def scenario():
+            pool = ProbePool()
+            return await check_health(ok, pool), await check_health(bad, pool)
+
+        healthy, unhealthy = asyncio.run(scenario())
+        assert (healthy.status, healthy.message) == ("healthy", "pong")
+        assert (unhealthy.status, unhealthy.message) == ("unhealthy", "queue depth 9000")
+
+    def test_output_keeps_the_tail(self, tmp_path):
+        """Test that only the last max_output_bytes of a chatty probe are kept"""
+        project = make_project(tmp_path, "print('x' * 100000 + 'END')")
+        report = asyncio.run(check_health(project, ProbePool(max_output_bytes=16)))
+        assert report.status == "healthy"
+        assert report.message.endswith("END") and len(report.message) <= 16
+
+    @pytest.mark.skipif(os.name == "nt", reason="process groups are POSIX")
+    def test_timeout_kills_the_process_group(self, tmp_path):
+        """Test that a hung probe is killed along with the processes it spawned"""
+        marker = tmp_path / "child.pid"
+        script = (
+            "import subprocess, sys, time\n"
+            "child = subprocess.Popen([sys.executable, '-c', 'import time; time.sleep(60)'])\n"
+            f"open({str(marker)!r}, 'w').write(str(child.pid))\n"
+            "print('started', flush=True)\n"
+            "time.sleep(60)\n"
+        )
+        project = make_project(tmp_path, script, timeout=1)
+        pool = ProbePool()
+        started = time.monotonic()
+        report = asyncio.run(check_health(project, pool))
+
+        assert time.monotonic() - started < 10
+        assert report.status == "unhealthy"
+        assert report.message == "Timed out after 1s: started"
+        assert pool.timeouts_total == 1 and pool.running == 0
+        child = int(marker.read_text())
+        deadline = time.monotonic() + 5
+        while time.monotonic() < deadline:
+            try:
+                os.kill(child, 0)
+            except ProcessLookupError:
+                break
+            time.sleep(0.05)
+        else:
+            pytest.fail("probe child survived the timeout")
+
+    def test_pool_limits_concurrency(self, tmp_path):
+        """Test that probes beyond the pool size wait and report unknown if no slot frees in time"""
+        slow = [make_project(tmp_path, "import time; time.sleep(1.5)", project_id=f"slow{i}") for i in range(2)]
+        late = make_project(tmp_path, "pass", project_id="late", timeout=1)
+
+        async def scenario():
+            pool = ProbePool(max_concurrent=2)
+            checks = [asyncio.ensure_future(check_health(p, pool)) for p in slow]
+            await asyncio.sleep(0.2)
+            late_report = await check_health(late, pool)
+            return late_report, await asyncio.gather(*checks)
+
+        late_report, slow_reports = asyncio.run(scenario())
+        assert late_report.status == "unknown"
+        assert late_report.message == "No probe slot free within 1s"
+        assert [r.status for r in slow_reports] == ["healthy", "healthy"]
+
+    def test_one_probe_per_project(self, tmp_path):
+        """Test that a project whose probe is still running does not get a second one"""
+        project = make_project(tmp_path, "import time; time.sleep(0.5)")
+
+        async def scenario():
+            pool = ProbePool()
+            return await asyncio.gather(check_health(project, pool), check_health(project, pool))
+
+        first, second = asyncio.run(scenario())
+        assert first.status == "healthy"
+        assert (second.status, second.message) == ("unknown", "Previous probe still running")
+
+
+class TestPerInstanceHealth:
+    def test_which_checks_are_per_instance(self):
+        """Test that only checks able to address one instance are run per instance"""
+        def config(instances=2, ports=(), **healthcheck):
+            return ProjectConfig(id="svc", name="svc", working_dir="/srv", command="x", instances=instances,
+                                 ports=list(ports), healthcheck=HealthcheckConfig(**healthcheck))
+
+        assert per_instance(config(type="http", url="http://localhost:{port}/health"))
+        assert not per_instance(config(type="http", url="http://localhost:8000/health"))
+        assert per_instance(config(type="command", command=["ping", "--worker={instance}"]))
+        assert per_instance(config(type="tcp", tcp_host="localhost", ports=[1, 2]))
+        assert not per_instance(config(type="tcp", tcp_host="localhost", tcp_port=1, ports=[1, 2]))
+        assert not per_instance(config(type="tcp", tcp_host="localhost", ports=[1]))
+        assert per_instance(config(type="process")) and not per_instance(config(instances=1, type="process"))
+
+    def test_command_probe_per_instance(self, tmp_path):
+        """Test that an instance's probe sees its own index and port"""
+        project = make_project(tmp_path, "import sys; print(sys.argv[1:]); sys.exit(sys.argv[1] == '1')")
+        project.config.healthcheck.command += ["{instance}", "{port}"]
+        project.config.ports = [7000, 7001]
+
+        async def scenario():
+            pool = ProbePool()
+            return await asyncio.gather(*(check_health(project, pool, idx) for idx in range(2)))
+
+        first, second = asyncio.run(scenario())
+        assert (first.status, first.message) == ("healthy", "['0', '7000']")
+        assert (second.status, second.message) == ("unhealthy", "['1', '7001']")
+
+    def test_aggregate_names_failing_instances(self):
+        """Test that the project report is unhealthy if any instance is, naming which"""
+        reports = {
+            0: HealthReport(status="healthy", latency_ms=3.0),
+            1: HealthReport(status="unhealthy", message="refused", latency_ms=9.0),
+            2: HealthReport(status="unhealthy"),
+        }
+        report = aggregate_health(reports)
+        assert report.status == "unhealthy"
+        assert report.message == "2/3 instances unhealthy: #1: refused; #2"
+        assert report.latency_ms == 9.0
+        assert aggregate_health({0: HealthReport(status="healthy")}).status == "healthy"
+        assert aggregate_health({0: HealthReport(status="healthy"), 1: HealthReport()}).status == "unknown"
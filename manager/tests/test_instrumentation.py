@@ -0,0 +1,66 @@
+"""
+Tests for orchestrator instrumentation
+"""
+
+import time
+
+from manager.backend.instrumentation import RollingHistogram, TickProfiler
+
+
+class TestRollingHistogram:
+    def test_quantiles(self):
+        """Test percentile computation over the window"""
+        hist = RollingHistogram(window=100)
+        for i in range(1, 101):
+            hist.observe(i / 1000)
+        qs = hist.quantiles((0.5, 0.99))
+        assert abs(qs[0.5] - 0.050) < 0.002
+        assert abs(qs[0.99] - 0.099) < 0.002
+        assert hist.count == 100
+        assert hist.snapshot()["max_ms"] == 100.0
+
+    def test_window_is_bounded(self):
+        """Test that old samples fall out of the window but totals keep counting"""
+        hist = RollingHistogram(window=10)
+        for _ in range(50):
+            hist.observe(1.0)
+        snap = hist.snapshot()
+        assert snap["window"] == 10
+        assert snap["count"] == 50
+
+    def test_empty(self):
+        """Test an empty histogram"""
+        assert RollingHistogram().snapshot()["p99_ms"] == 0.0
+
+
+class TestTickProfiler:
+    def test_phases_are_recorded(self):
+        """Test that each phase gets its own histogram"""
+        prof = TickProfiler(budget_seconds=10)
+        prof.begin_tick()
+        prof.begin_phase("status")
+        prof.end_phase()
+        prof.begin_phase("broadcast")
+        prof.end_tick()
+        snap = prof.snapshot()
+        assert snap["tick"]["count"] == 1
+        assert snap["phases"]["status"]["count"] == 1
+        assert snap["phases"]["broadcast"]["count"] == 1
+        assert snap["phases"]["health"]["count"] == 0
+        assert snap["overruns_total"] == 0
+
+    def test_overrun_names_slowest_project(self):
+        """Test that a tick over budget records the slowest project"""
+        prof = TickProfiler(budget_seconds=0.01)
+        prof.begin_tick()
+        prof.begin_phase("health")
+        prof.record_project("fast", 0.001)
+        prof.record_project("slow", 0.5)
+        time.sleep(0.02)
+        prof.end_phase()
+        prof.end_tick()
+        assert prof.overruns_total == 1
+        event = prof.snapshot()["recent_overruns"][0]
+        assert event["project_id"] == "slow"
+        assert event["phase"] == "health"
+        assert event["project_ms"] == 500.0
@@ -0,0 +1,107 @@
+"""
+Tests for the action job queue
+"""
+
+import asyncio
+import sys
+
+from manager.backend.jobs import TRUNCATED_MARKER, JobManager
+from manager.backend.models import Project, ProjectConfig
+
+
+def make_project(tmp_path, **actions):
+    config = ProjectConfig(
+        id="job-project",
+        name="Job Project",
+        working_dir=str(tmp_path),
+        command=sys.executable,
+        actions=actions,
+    )
+    return Project(config=config)
+
+
+class TestJobManager:
+    def test_job_runs_and_captures_output(self, tmp_path):
+        """Test that a job captures stdout and stderr separately"""
+        project = make_project(tmp_path)
+        script = "import sys; print('hello'); sys.stderr.write('oops\\n')"
+
+        async def scenario():
+            jobs = JobManager()
+            job = jobs.submit(project, "greet", ["-c", script])
+            assert job.info.status == "queued"
+            lines = [item async for item in job.follow()]
+            return job, lines
+
+        job, lines = asyncio.run(scenario())
+        assert job.info.status == "succeeded"
+        assert job.info.return_code == 0
+        assert sorted((stream, text) for _, stream, text in lines) == [("stderr", "oops"), ("stdout", "hello")]
+
+    def test_failed_job(self, tmp_path):
+        """Test that a non-zero exit marks the job failed"""
+        project = make_project(tmp_path)
+
+        async def scenario():
+            jobs = JobManager()
+            job = jobs.submit(project, "fail", ["-c", "raise SystemExit(3)"])
+            await job.task
+            return job
+
+        job = asyncio.run(scenario())
+        assert job.info.status == "failed"
+        assert job.info.return_code == 3
+
+    def test_per_project_limit_and_cancel(self, tmp_path):
+        """Test that a second job waits for the project slot and can be cancelled"""
+        project = make_project(tmp_path)
+
+        async def scenario():
+            jobs = JobManager(per_project_limit=1)
+            first = jobs.submit(project, "sleep", ["-c", "import time; time.sleep(30)"])
+            second = jobs.submit(project, "sleep", ["-c", "import time; time.sleep(30)"])
+            await asyncio.sleep(0.5)
+            statuses = (first.info.status, second.info.status)
+            await jobs.cancel(second)
+            await jobs.cancel(first)
+            return first, second, statuses
+
+        first, second, statuses = asyncio.run(scenario())
+        assert statuses == ("running", "queued")
+        assert second.info.status == "cancelled"
+        assert second.info.started_at is None
+        assert first.info.status == "cancelled"
+        assert first.info.finished_at is not None
+
+    def test_timeout_kills_job(self, tmp_path):
+        """Test that a job exceeding its timeout is killed"""
+        project = make_project(tmp_path)
+
+        async def scenario():
+            jobs = JobManager(timeout_seconds=0.5)
+            job = jobs.submit(project, "hang", ["-c", "import time; time.sleep(30)"])
+            await job.task
+            return job
+
+        job = asyncio.run(scenario())
+        assert job.info.status == "failed"
+        assert "Timed out" in job.info.message
+
+    def test_overlong_line_keeps_head(self, tmp_path):
+        """Test that a line over the reader limit keeps its head and later lines are intact"""
+        project = make_project(tmp_path)
+        script = "import sys; sys.stdout.write('a' * 3000000 + '\\nafter\\n' + 'b' * 3000000 + '\\ntail')"
+
+        async def scenario():
+            jobs = JobManager()
+            job = jobs.submit(project, "flood", ["-c", script])
+            await job.task
+            return job
+
+        job = asyncio.run(scenario())
+        assert job.info.status == "succeeded"
+        first, after, second, tail = [text for _, stream, text in job.lines_since(0)]
+        assert first.startswith("a" * 1024) and first.endswith(TRUNCATED_MARKER)
+        assert set(first[: -len(TRUNCATED_MARKER)]) == {"a"}
+        assert second.startswith("b") and second.endswith(TRUNCATED_MARKER)
+        assert (after, tail) == ("after", "tail")
@@ -0,0 +1,81 @@
+"""
+Tests for project listing queries
+"""
+
+import pytest
+from manager.backend.listing import ListQuery, parse_fields, parse_statuses
+from manager.backend.project_store import ProjectSnapshot
+
+
+class TestParseFields:
+    def test_aliases_and_dotted_paths(self):
+        """Test that aliases and dotted paths build a nested include spec"""
+        include = parse_fields("id,status,runtime.metrics.cpu_percent")
+        assert include == {
+            "config": {"id": True},
+            "runtime": {"status": True, "metrics": {"cpu_percent": True}},
+        }
+
+    def test_whole_section(self):
+        """Test that selecting a parent keeps it whole"""
+        assert parse_fields("runtime,runtime.status") == {"runtime": True}
+
+    def test_empty_and_unknown(self):
+        """Test empty selection and unknown fields"""
+        assert parse_fields(None) is None
+        assert parse_fields("") is None
+        with pytest.raises(ValueError):
+            parse_fields("config.nope")
+        with pytest.raises(ValueError):
+            parse_fields("id.more")
+
+
+class TestListQuery:
+    def test_status_filter(self, sample_projects):
+        """Test filtering by runtime status"""
+        page, cursor = ListQuery.parse(status="running").apply(sample_projects)
+        assert [p.config.id for p in page] == ["project-3"]
+        assert cursor is None
+        with pytest.raises(ValueError):
+            parse_statuses("sleeping")
+
+    def test_pagination(self, sample_projects):
+        """Test keyset pagination by project id"""
+        page, cursor = ListQuery.parse(limit=2).apply(list(reversed(sample_projects)))
+        assert [p.config.id for p in page] == ["project-1", "project-2"]
+        assert cursor == "project-2"
+
+        page, cursor = ListQuery.parse(limit=2, cursor=cursor).apply(sample_projects)
+        assert [p.config.id for p in page] == ["project-3"]
+        assert cursor is None
+
+    def test_unpaginated_keeps_order(self, sample_projects):
+        """Test that listings without paging keep store order"""
+        projects = list(reversed(sample_projects))
+        page, cursor = ListQuery.parse().apply(projects)
+        assert page == projects
+        assert cursor is None
+
+    def test_config_filters(self, sample_projects):
+        """Test tag, port and command filters, on a list and through the store indexes"""
+        projects = [p.model_copy(update={"config": p.config.model_copy(update={"tags": [f"t{i}"], "ports": [8000 + i]})})
+                    for i, p in enumerate(sample_projects)]
+        query = ListQuery.parse(tag="t0,t1", command="node")
+        page, _ = query.apply(projects)
+        assert [p.config.id for p in page] == ["project-2"]
+
+        snapshot = ProjectSnapshot.build({p.config.id: p for p in projects})
+        assert [p.config.id for p in query.select(snapshot)] == ["project-2"]
+        assert [p.config.id for p in ListQuery.parse(port=8002).select(snapshot)] == ["project-3"]
+        assert len(ListQuery.parse().select(snapshot)) == 3
+
+    def test_invalid_limit(self):
+        """Test limit bounds"""
+        with pytest.raises(ValueError):
+            ListQuery.parse(limit=0)
+
+    def test_invalid_types(self):
+        """Test that options of the wrong JSON type raise ValueError"""
+        for options in ({"limit": "10"}, {"limit": True}, {"fields": ["name"]}, {"port": 80.5}, {"status": 1}):
+            with pytest.raises(ValueError):
+                ListQuery.parse(**options)
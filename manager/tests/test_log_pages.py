@@ -0,0 +1,100 @@
+"""
+Tests for paging through log files by byte offset
+"""
+
+from fastapi.testclient import TestClient
+
+from manager.backend.app import create_app
+from manager.backend.config import HubConfig
+from manager.backend.log_pages import TRUNCATED_MARKER, read_after, read_before
+
+
+class TestLogPages:
+    def _write(self, tmp_path, count, tail=""):
+        path = tmp_path / "app.log"
+        path.write_text("".join(f"line {i}\n" for i in range(count)) + tail, encoding="utf-8")
+        return path
+
+    def test_pages_back_to_the_start(self, tmp_path):
+        """Test that following ``start`` backwards visits every line once, oldest page last"""
+        path = self._write(tmp_path, 1000)
+        page = read_before(path, None, 300)
+        seen = page.lines
+        while page.more:
+            page = read_before(path, page.start, 300, max_bytes=4096)
+            assert page.lines
+            seen = page.lines + seen
+        assert page.start == 0
+        assert seen == [f"line {i}" for i in range(1000)]
+
+    def test_pages_forward_from_an_offset(self, tmp_path):
+        """Test that following ``end`` forwards visits every line once and stops at the end"""
+        path = self._write(tmp_path, 1000)
+        page = read_after(path, 0, 128)
+        seen = list(page.lines)
+        while page.more:
+            page = read_after(path, page.end, 128)
+            seen += page.lines
+        assert seen == [f"line {i}" for i in range(1000)]
+        assert page.end == path.stat().st_size
+
+    def test_partial_last_line_is_held_back(self, tmp_path):
+        """Test that a line without its newline yet is left for the next read"""
+        path = self._write(tmp_path, 3, tail="half")
+        tail = read_before(path, None, 10)
+        assert tail.lines == ["line 0", "line 1", "line 2"]
+        assert read_after(path, tail.end, 10).lines == []
+        with path.open("a") as f:
+            f.write(" done\n")
+        assert read_after(path, tail.end, 10).lines == ["half done"]
+
+    def test_truncated_file_restarts_at_zero(self, tmp_path):
+        """Test that an offset past the end of a truncated file reads from the start"""
+        path = self._write(tmp_path, 100)
+        end = path.stat().st_size
+        path.write_text("fresh\n", encoding="utf-8")
+        page = read_after(path, end, 10)
+        assert page.start == 0 < end
+        assert page.lines == ["fresh"]
+
+    def test_oversized_line_does_not_stall_paging(self, tmp_path):
+        """Test that a line longer than a page comes back cut and paging moves past it both ways"""
+        path = tmp_path / "app.log"
+        path.write_bytes(b"before\n" + b"x" * 200000 + b"\nafter\n")
+        page = read_after(path, 7, 10, max_bytes=1024)
+        assert page.lines == ["x" * 1024 + TRUNCATED_MARKER]
+        assert (page.start, page.end, page.more) == (7, 200008, True)
+        assert read_after(path, page.end, 10, max_bytes=1024).lines == ["after"]
+
+        page = read_before(path, 200008, 10, max_bytes=1024)
+        assert page.lines == ["x" * 1024 + TRUNCATED_MARKER]
+        assert (page.start, page.end) == (7, 200008)
+        assert read_before(path, page.start, 10, max_bytes=1024).lines == ["before"]
+
+    def test_oversized_partial_line_waits(self, tmp_path):
+        """Test that an oversized line still being written yields an empty page that claims nothing more"""
+        path = tmp_path / "app.log"
+        path.write_bytes(b"done\n" + b"x" * 200000)
+        page = read_after(path, 5, 10, max_bytes=1024)
+        assert (page.lines, page.end, page.more) == ([], 5, False)
+        assert read_before(path, None, 10, max_bytes=1024).lines == ["done"]
+
+    def test_logs_endpoint_pages_by_offset(self, tmp_path):
+        """Test that the logs endpoint returns offsets that fetch the neighbouring pages"""
+        path = self._write(tmp_path, 50)
+        app = create_app(HubConfig(data_dir=tmp_path / "data"))
+        body = {"config": {"id": "web", "name": "Web", "working_dir": str(tmp_path), "command": "true", "log_path": str(path)}}
+
+        with TestClient(app) as client:
+            client.post("/api/projects", json=body)
+            tail = client.get("/api/projects/web/logs", params={"lines": 10}).json()
+            assert tail["lines"] == [f"line {i}" for i in range(40, 50)]
+            assert tail["truncated"] is True
+            older = client.get("/api/projects/web/logs", params={"lines": 10, "before": tail["start"]}).json()
+            assert older["lines"][-1] == "line 39" and older["end"] == tail["start"]
+            newer = client.get("/api/projects/web/logs", params={"after": tail["end"]}).json()
+            assert newer["lines"] == [] and newer["truncated"] is False
+            both = client.get("/api/projects/web/logs", params={"before": 1, "after": 1})
+            assert both.status_code == 400
+            negative = client.get("/api/projects/web/logs", params={"lines": 1, "after": -5}).json()
+            assert negative["lines"] == ["line 0"] and negative["start"] == 0
@@ -0,0 +1,79 @@
+"""
+Tests for log search
+"""
+
+import re
+
+import pytest
+from manager.backend.log_search import compile_pattern, search_log
+
+
+class TestLogSearch:
+    @pytest.fixture
+    def log_file(self, tmp_path):
+        """Create a log file with an ERROR line every 100 lines"""
+        path = tmp_path / "app.log"
+        lines = [f"line {i} {'ERROR boom' if i % 100 == 0 else 'ok'}\n" for i in range(1, 1001)]
+        path.write_text("".join(lines), encoding="utf-8")
+        return path
+
+    def test_matches_have_offsets_and_line_numbers(self, log_file):
+        """Test that matches report byte offsets and 1-based line numbers"""
+        records = list(search_log(log_file, compile_pattern("ERROR"), limit=100, chunk_bytes=512))
+        matches, summary = records[:-1], records[-1]
+
+        assert len(matches) == 10
+        assert [m["line_number"] for m in matches] == list(range(100, 1001, 100))
+        data = log_file.read_bytes()
+        for m in matches:
+            assert data[m["offset"]:].split(b"\n", 1)[0].decode() == m["line"]
+        assert summary["done"] is True
+        assert summary["timed_out"] is False
+        assert summary["truncated"] is False
+
+    def test_limit_and_resume(self, log_file):
+        """Test that scanned_to can be passed back as since"""
+        first = list(search_log(log_file, compile_pattern("ERROR"), limit=3, chunk_bytes=512))
+        assert len(first) == 4
+        assert first[-1]["truncated"] is True
+
+        rest = list(search_log(log_file, compile_pattern("ERROR"), since=first[-1]["scanned_to"], chunk_bytes=512))
+        assert [m["line_number"] for m in rest[:-1]] == list(range(400, 1001, 100))
+
+    def test_ignore_case(self, log_file):
+        """Test case-insensitive patterns"""
+        records = list(search_log(log_file, compile_pattern("error BOOM", ignore_case=True)))
+        assert len(records) == 11
+
+    def test_empty_file(self, tmp_path):
+        """Test searching an empty file"""
+        path = tmp_path / "empty.log"
+        path.write_bytes(b"")
+        records = list(search_log(path, compile_pattern("x")))
+        assert len(records) == 1
+        assert records[0].pop("elapsed_ms") >= 0
+        assert records == [{"done": True, "matches": 0, "timed_out": False, "truncated": False, "scanned_to": 0}]
+
+    def test_since_at_end(self, log_file):
+        """Test that resuming at the end of the file yields a full summary and no matches"""
+        size = log_file.stat().st_size
+        records = list(search_log(log_file, compile_pattern("ERROR"), since=size + 10))
+        assert len(records) == 1
+        assert records[0]["scanned_to"] == size
+        assert "elapsed_ms" in records[0]
+
+    def test_nested_repeat_rejected(self):
+        """Test that catastrophic-backtracking patterns are rejected"""
+        with pytest.raises(re.error):
+            compile_pattern("(a*)*b")
+        with pytest.raises(re.error):
+            compile_pattern("(?:x|y+)+z")
+        assert compile_pattern("(ab){2,5}c+") is not None
+
+    def test_time_budget(self, tmp_path):
+        """Test that the scan stops once the time budget is spent"""
+        path = tmp_path / "big.log"
+        path.write_text(("a" * 80 + "\n") * 50000, encoding="utf-8")
+        records = list(search_log(path, compile_pattern("a{10}b"), time_budget_seconds=0.0, chunk_bytes=4096))
+        assert records[-1]["timed_out"] is True
+        assert records[-1]["matches"] == 0
@@ -0,0 +1,42 @@
+"""
+Tests for the bounded metric history behind the desktop charts
+"""
+
+from manager.backend.metric_history import MetricHistory
+
+
+class TestMetricHistory:
+    def test_columns_hold_min_and_max(self):
+        """Test that samples falling in one pixel column collapse to their min and max"""
+        history = MetricHistory()
+        for i, value in enumerate([5, 1, 9, 3]):
+            history.add(100 + i * 0.25, value)
+        history.add(102, 7)
+        assert history.columns(100, 103, 1) == [(100, 1, 9), (102, 7, 7)]
+        assert history.last_value == 7
+
+    def test_raw_ring_is_bounded(self):
+        """Test that only the newest raw samples are kept"""
+        history = MetricHistory(raw_capacity=10)
+        for t in range(25):
+            history.add(t, t)
+        assert len(history) == 10
+        assert history.oldest_raw() == 15
+        assert [c for c, _, _ in history.columns(15, 25, 1)] == list(range(15, 25))
+
+    def test_buckets_cover_overwritten_samples(self):
+        """Test that long views fall back to per-bucket min/max once raw samples are gone"""
+        history = MetricHistory(raw_capacity=10, bucket_seconds=60, buckets=24)
+        for t in range(0, 600, 2):
+            history.add(t, 100 if t == 30 else t % 60)
+        columns = history.columns(0, 600, 60)
+        assert len(columns) == 10
+        assert columns[0] == (0, 0, 100)
+        assert columns[-1][0] == 9
+
+    def test_buckets_wrap_around(self):
+        """Test that the bucket ring forgets buckets older than its span"""
+        history = MetricHistory(raw_capacity=2, bucket_seconds=10, buckets=3)
+        for t in range(0, 100, 5):
+            history.add(t, 1)
+        assert [c for c, _, _ in history.columns(0, 90, 10)] == [7, 8]
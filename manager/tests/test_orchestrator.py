@@ -0,0 +1,186 @@
+"""
+Tests for the orchestrator tick
+"""
+
+import asyncio
+import sys
+import time
+from datetime import datetime, timedelta
+
+from manager.backend.models import HealthcheckConfig, OperationResult, ProjectConfig, RestartPolicy, fork
+from manager.backend.orchestrator import BroadcastHub, Orchestrator, needs_restart
+from manager.backend.process_manager import ProcessManager
+from manager.backend.project_store import ProjectStore
+from manager.backend.runtime_records import MetricsSample
+
+
+class FakeProcessManager(ProcessManager):
+    """Reports pids and metrics from dicts instead of the OS"""
+
+    def __init__(self, runtime_dir):
+        super().__init__(runtime_dir)
+        self.pids = {}
+        self.cpu = 1.0
+        self.calls = []
+
+    def alive_instances(self, project_id):
+        return {idx: pid for idx, pid in enumerate(self.pids.get(project_id, [])) if pid}
+
+    def stop_instance(self, project, idx, timeout_seconds=10):
+        self.calls.append(("stop", idx))
+        self.pids[project.config.id][idx] = None
+        self._sync_runtime(project, self.alive_instances(project.config.id))
+        return OperationResult(success=True)
+
+    def start_instance(self, project, idx):
+        self.calls.append(("start", idx))
+        self.pids[project.config.id][idx] = 1000 + len(self.calls)
+        self._sync_runtime(project, self.alive_instances(project.config.id))
+        return OperationResult(success=True)
+
+    def sample(self, pids):
+        return MetricsSample(cpu_percent=self.cpu, threads=len(pids))
+
+
+def _tick(orchestrator, metrics=False, health=False):
+    if metrics:
+        orchestrator._last_metrics_update = datetime.utcnow() - timedelta(seconds=10)
+    orchestrator._last_health_update = datetime.utcnow() - timedelta(seconds=20 if health else 0)
+    asyncio.run(orchestrator._tick())
+
+
+class TestNeedsRestart:
+    def test_launch_fields(self, tmp_path):
+        """Test that changing what a process is launched with needs a restart and cosmetic edits do not"""
+        old = ProjectConfig(id="svc", name="svc", working_dir=str(tmp_path), command="python", ports=[8000])
+        assert not needs_restart(old, old.model_copy(update={"name": "Service", "tags": ["web"]}))
+        assert needs_restart(old, old.model_copy(update={"ports": [8001]}))
+        assert needs_restart(old, old.model_copy(update={"instances": 2}))
+        assert needs_restart(old, old.model_copy(update={"log_path": str(tmp_path / "svc.log")}))
+
+
+class TestRuntimeRecords:
+    def _setup(self, tmp_path):
+        store = ProjectStore(tmp_path / "projects.yaml")
+        for pid in ("a", "b"):
+            store.upsert_project(ProjectConfig(id=pid, name=pid, working_dir="/srv", command="python"))
+        proc = FakeProcessManager(tmp_path / "runtime")
+        return store, proc, Orchestrator(store, proc, BroadcastHub())
+
+    def test_only_changed_projects_are_published(self, tmp_path):
+        """Test that a tick leaves projects whose process state did not change untouched"""
+        store, proc, orchestrator = self._setup(tmp_path)
+        _tick(orchestrator)
+        before = {p.config.id: p for p in store.list_projects()}
+        proc.pids["a"] = [123]
+        _tick(orchestrator)
+
+        a, b = store.get_project("a"), store.get_project("b")
+        assert a.runtime.status == "running"
+        assert a.runtime.pids == [123] and a.runtime.pid == 123
+        assert b is before["b"]
+        _tick(orchestrator)
+        assert store.get_project("a") is a
+
+    def test_metrics_follow_samples(self, tmp_path):
+        """Test that the metrics phase publishes new samples and skips identical ones"""
+        store, proc, orchestrator = self._setup(tmp_path)
+        proc.pids["a"] = [123]
+        _tick(orchestrator, metrics=True)
+        a = store.get_project("a")
+        assert a.runtime.metrics.cpu_percent == 1.0
+        assert a.runtime.metrics.threads == 1
+        assert store.get_project("b").runtime.metrics.cpu_percent == 0.0
+        _tick(orchestrator, metrics=True)
+        assert store.get_project("a") is a
+        proc.cpu = 2.5
+        _tick(orchestrator, metrics=True)
+        assert store.get_project("a").runtime.metrics.cpu_percent == 2.5
+
+    def test_records_resync_with_outside_publishes(self, tmp_path):
+        """Test that runtime published by others (an API start or stop) is not overwritten"""
+        store, proc, orchestrator = self._setup(tmp_path)
+        proc.pids["a"] = [123]
+        _tick(orchestrator)
+        base = store.get_project("a")
+        work = fork(base)
+        work.runtime.restarts_total = 7
+        store.publish([(base, work)])
+        proc.pids["a"] = [123, 124]
+        _tick(orchestrator)
+
+        a = store.get_project("a")
+        assert a.runtime.pids == [123, 124]
+        assert a.runtime.restarts_total == 7
+
+
+class TestInstanceRestart:
+    def test_only_the_failing_instance_is_restarted(self, tmp_path):
+        """Test that a per-instance check failing for one instance restarts just that one"""
+        store = ProjectStore(tmp_path / "projects.yaml")
+        probe = [sys.executable, "-c", "import sys; sys.exit(sys.argv[1] == '1')", "{instance}"]
+        store.upsert_project(ProjectConfig(
+            id="svc", name="svc", working_dir=str(tmp_path), command="python", instances=3,
+            healthcheck=HealthcheckConfig(type="command", command=probe),
+            restart_policy=RestartPolicy(restart_delay_seconds=1),
+        ))
+        proc = FakeProcessManager(tmp_path / "runtime")
+        proc.pids["svc"] = [101, 102, 103]
+        orchestrator = Orchestrator(store, proc, BroadcastHub())
+        _tick(orchestrator, health=True)
+
+        svc = store.get_project("svc")
+        assert proc.calls == [("stop", 1), ("start", 1)]
+        assert svc.runtime.pids == [101, 1002, 103]
+        assert [(i.index, i.pid, i.restarts_total) for i in svc.runtime.instances] == [(0, 101, 0), (1, 1002, 1), (2, 103, 0)]
+        assert svc.runtime.instances[0].health.status == "healthy"
+        assert svc.runtime.instances[1].health.status == "unknown"
+        assert svc.runtime.health.message.startswith("1/3 instances unhealthy: #1")
+        assert svc.runtime.restarts_total == 1
+
+    def test_project_restart_does_not_block_the_loop(self, tmp_path):
+        """Test that a slow stop during a whole-project restart leaves the event loop running"""
+
+        class SlowStop(FakeProcessManager):
+            stopping = False
+
+            def stop(self, project, timeout_seconds=10):
+                self.calls.append("stop")
+                self.stopping = True
+                time.sleep(0.5)
+                self.stopping = False
+                self.pids[project.config.id] = []
+                self._sync_runtime(project, {})
+                return OperationResult(success=True, project=project)
+
+            def start(self, project, override_args=None, override_env=None):
+                self.calls.append("start")
+                self.pids[project.config.id] = [2001]
+                self._sync_runtime(project, self.alive_instances(project.config.id))
+                return OperationResult(success=True, project=project)
+
+        store = ProjectStore(tmp_path / "projects.yaml")
+        store.upsert_project(ProjectConfig(
+            id="svc", name="svc", working_dir=str(tmp_path), command="python",
+            healthcheck=HealthcheckConfig(type="command", command=[sys.executable, "-c", "raise SystemExit(1)"]),
+            restart_policy=RestartPolicy(restart_delay_seconds=1),
+        ))
+        proc = SlowStop(tmp_path / "runtime")
+        proc.pids["svc"] = [101]
+        orchestrator = Orchestrator(store, proc, BroadcastHub())
+        orchestrator._last_health_update = datetime.utcnow() - timedelta(seconds=20)
+
+        async def scenario():
+            # Count loop iterations that happen while the stop is in progress
+            beats = 0
+            tick = asyncio.ensure_future(orchestrator._tick())
+            while not tick.done():
+                await asyncio.sleep(0.02)
+                beats += proc.stopping
+            await tick
+            return beats
+
+        assert asyncio.run(scenario()) >= 5
+        assert proc.calls == ["stop", "start"]
+        svc = store.get_project("svc")
+        assert (svc.runtime.pids, svc.runtime.restarts_total) == ([2001], 1)
@@ -0,0 +1,79 @@
+"""
+Tests for per-instance process management
+"""
+
+import json
+import sys
+import time
+
+import pytest
+
+from manager.backend.models import Project, ProjectConfig, fork
+from manager.backend.process_manager import ProcessManager
+
+SCRIPT = (
+    "import json, os, sys, time\n"
+    "path = os.path.join(os.getcwd(), 'instance-%s.json' % os.environ['NEXTGEN_INSTANCE'])\n"
+    "json.dump({'argv': sys.argv[1:], 'port': os.environ.get('NEXTGEN_PORT'), 'pid': os.getpid()}, open(path, 'w'))\n"
+    "time.sleep(60)\n"
+)
+
+
+def _wait_for(path):
+    deadline = time.monotonic() + 10
+    while time.monotonic() < deadline:
+        try:
+            return json.loads(path.read_text())
+        except (OSError, ValueError):
+            time.sleep(0.05)
+    pytest.fail(f"{path.name} was never written")
+
+
+class TestInstances:
+    @pytest.fixture
+    def running(self, tmp_path):
+        """Two instances of a sleeper, each on its own port"""
+        config = ProjectConfig(
+            id="svc",
+            name="svc",
+            working_dir=str(tmp_path),
+            command=sys.executable,
+            args=["-c", SCRIPT, "--port={port}", "--name=w{instance}"],
+            ports=[9100, 9101],
+            instances=2,
+        )
+        manager = ProcessManager(tmp_path / "runtime")
+        project = fork(Project(config=config))
+        assert manager.start(project).success
+        yield manager, project
+        manager.stop(project, timeout_seconds=2)
+
+    def test_instances_get_their_own_port(self, tmp_path, running):
+        """Test that each instance sees its index and port in its args and environment"""
+        manager, project = running
+        first, second = _wait_for(tmp_path / "instance-0.json"), _wait_for(tmp_path / "instance-1.json")
+        assert first["argv"] == ["--port=9100", "--name=w0"] and first["port"] == "9100"
+        assert second["argv"] == ["--port=9101", "--name=w1"] and second["port"] == "9101"
+        assert [(i.index, i.pid) for i in project.runtime.instances] == [(0, first["pid"]), (1, second["pid"])]
+
+    def test_restart_replaces_one_instance(self, tmp_path, running):
+        """Test that stopping and starting one instance leaves the other running as it was"""
+        manager, project = running
+        before = manager.alive_instances("svc")
+        _wait_for(tmp_path / "instance-1.json")
+        (tmp_path / "instance-1.json").unlink()
+
+        manager.stop_instance(project, 1, timeout_seconds=2)
+        assert manager.alive_instances("svc") == {0: before[0]}
+        assert [i.index for i in project.runtime.instances] == [0]
+        assert manager.start_instance(project, 1).success
+        assert not manager.start_instance(project, 1).success
+
+        after = manager.alive_instances("svc")
+        assert after[0] == before[0] and after[1] != before[1]
+        assert _wait_for(tmp_path / "instance-1.json")["pid"] == after[1]
+        assert project.runtime.pids == [after[0], after[1]]
+
+        second = ProcessManager(tmp_path / "runtime")
+        assert second.adopt([project]) == {"svc": [after[0], after[1]]}
+        assert second.alive_instances("svc") == after
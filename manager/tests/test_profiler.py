@@ -0,0 +1,51 @@
+"""
+Tests for the sampling profiler
+"""
+
+import threading
+import time
+
+import pytest
+from manager.backend.profiler import ProfilerBusy, SamplingProfiler
+
+
+def busy_worker(stop):
+    while not stop.is_set():
+        sum(range(1000))
+
+
+class TestSamplingProfiler:
+    def test_collapsed_output(self):
+        """Test that other threads' stacks are sampled in collapsed format"""
+        stop = threading.Event()
+        worker = threading.Thread(target=busy_worker, args=(stop,), name="busy-worker")
+        worker.start()
+        try:
+            text = SamplingProfiler().collapsed(0.2, 0.005)
+        finally:
+            stop.set()
+            worker.join()
+
+        lines = text.strip().splitlines()
+        assert lines
+        for line in lines:
+            stack, count = line.rsplit(" ", 1)
+            assert int(count) >= 1
+        worker_lines = [line for line in lines if line.startswith("busy-worker;")]
+        assert worker_lines
+        assert any("busy_worker (test_profiler.py:" in line for line in worker_lines)
+        # The sampling thread never profiles itself
+        assert not any("collapsed (profiler.py" in line for line in lines)
+
+    def test_single_profile_at_a_time(self):
+        """Test that concurrent profiles are rejected"""
+        profiler = SamplingProfiler()
+        thread = threading.Thread(target=profiler.sample, args=(0.3,))
+        thread.start()
+        time.sleep(0.05)
+        try:
+            with pytest.raises(ProfilerBusy):
+                profiler.sample(0.1)
+        finally:
+            thread.join()
+        assert not profiler.busy
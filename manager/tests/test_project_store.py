@@ -5,9 +5,14 @@ Tests for project store
 import pytest
 import tempfile
 import os
+import threading
+import time
 from pathlib import Path
-from manager.backend.models import ProjectConfig, Project, ProjectRuntime
-from manager.backend.project_store import ProjectStore
+from unittest.mock import Mock
+
+import yaml
+from manager.backend.models import ProjectConfig, Project, ProjectRuntime, fork
+from manager.backend.project_store import BaseProjectStore, ProjectSnapshot, ProjectStore
 
 
 class TestProjectStore:
@@ -226,6 +231,7 @@ projects:
         )
         
         store.upsert_project(config)
+        store.flush()
         
         # Create a new store instance with the same file
         new_store = ProjectStore(temp_yaml_file)
@@ -297,4 +303,330 @@ projects:
             try:
                 os.unlink(temp_file)
             except OSError:
-                pass 
\ No newline at end of file
+                pass
+
+
+class TestWriteBehind:
+    """Test cases for debounced, atomic persistence"""
+
+    def _config(self, idx):
+        return ProjectConfig(id=f"p{idx}", name=f"P{idx}", working_dir="/tmp", command="python")
+
+    def test_changes_are_coalesced(self, tmp_path):
+        """Test that a burst of changes is written once, after the delay"""
+        path = tmp_path / "projects.yaml"
+        store = ProjectStore(path, flush_delay_seconds=0.05)
+        for i in range(20):
+            store.upsert_project(self._config(i))
+        store.delete_project("p0")
+        assert not path.exists()
+        assert store.pending_changes == 21
+
+        deadline = time.monotonic() + 5
+        while store.writes_total == 0 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert store.writes_total == 1
+        assert store.batch_sizes.max == 21
+        assert store.pending_changes == 0
+        assert len(ProjectStore(path).list_projects()) == 19
+
+    def test_flush_is_atomic(self, tmp_path):
+        """Test that flush replaces the file via a temp file and leaves nothing behind"""
+        path = tmp_path / "projects.yaml"
+        store = ProjectStore(path, flush_delay_seconds=60)
+        store.upsert_project(self._config(1))
+        store.flush()
+        store.flush()  # nothing pending: no second write
+
+        assert store.writes_total == 1
+        assert sorted(p.name for p in tmp_path.iterdir()) == [".projects.yaml.cache", "projects.yaml"]
+        assert store.stats()["write_latency"]["count"] == 1
+
+    def test_failed_write_keeps_changes_pending(self, tmp_path, monkeypatch):
+        """Test that a failed write is counted and retried by the next flush"""
+        path = tmp_path / "projects.yaml"
+        store = ProjectStore(path, flush_delay_seconds=60)
+        store.upsert_project(self._config(1))
+        monkeypatch.setattr(yaml, "dump", Mock(side_effect=OSError("disk full")))
+
+        with pytest.raises(OSError):
+            store.flush()
+        assert store.write_errors_total == 1
+        assert store.pending_changes == 1
+        assert not path.exists()
+
+        monkeypatch.undo()
+        store.flush()
+        assert ProjectStore(path).get_project("p1") is not None
+
+    def test_unreadable_file_is_kept_aside(self, tmp_path):
+        """Test that the first write after a failed load backs the old file up"""
+        path = tmp_path / "projects.yaml"
+        path.write_text("projects: [unclosed", encoding="utf-8")
+        store = ProjectStore(path, flush_delay_seconds=60)
+        assert list(store.list_projects()) == []
+
+        store.upsert_project(self._config(1))
+        store.flush()
+        backups = list(tmp_path.glob("projects.yaml.corrupt-*"))
+        assert len(backups) == 1
+        assert backups[0].read_text(encoding="utf-8") == "projects: [unclosed"
+
+
+
+class TestSnapshotCache:
+    """Test cases for the validated-snapshot cache"""
+
+    def _write_store(self, path):
+        store = ProjectStore(path, flush_delay_seconds=60)
+        store.upsert_project(ProjectConfig(id="api", name="API", working_dir="/srv", command="python", tags=["web"]))
+        store.flush()
+
+    def test_unchanged_file_loads_from_cache(self, tmp_path):
+        """Test that a store written by the hub reloads without parsing YAML"""
+        path = tmp_path / "projects.yaml"
+        self._write_store(path)
+
+        store = ProjectStore(path)
+        assert store.load_info["source"] == "cache"
+        assert store.get_project("api").config.tags == ["web"]
+        assert store.stats()["load"]["projects"] == 1
+
+    def test_edited_file_is_reparsed(self, tmp_path):
+        """Test that an external edit invalidates the cache"""
+        path = tmp_path / "projects.yaml"
+        self._write_store(path)
+        path.write_text(path.read_text(encoding="utf-8").replace("name: API", "name: Edited"), encoding="utf-8")
+
+        store = ProjectStore(path)
+        assert store.load_info["source"] == "yaml"
+        assert store.get_project("api").config.name == "Edited"
+        assert ProjectStore(path).load_info["source"] == "cache"
+
+    def test_corrupt_cache_is_ignored(self, tmp_path):
+        """Test that an unreadable cache falls back to YAML"""
+        path = tmp_path / "projects.yaml"
+        self._write_store(path)
+        (tmp_path / ".projects.yaml.cache").write_bytes(b"not a pickle")
+
+        store = ProjectStore(path)
+        assert store.load_info["source"] == "yaml"
+        assert store.get_project("api") is not None
+
+    def test_cache_can_be_disabled(self, tmp_path):
+        """Test snapshot_cache=False"""
+        path = tmp_path / "projects.yaml"
+        self._write_store(path)
+        store = ProjectStore(path, snapshot_cache=False)
+        assert store.load_info["source"] == "yaml"
+
+
+class TestHotReload:
+    """Test cases for applying external edits of projects.yaml"""
+
+    def _store(self, path):
+        store = ProjectStore(path, flush_delay_seconds=60)
+        for pid in ("api", "worker", "cron"):
+            store.upsert_project(ProjectConfig(id=pid, name=pid.title(), working_dir="/srv", command="python"))
+        store.flush()
+        return store
+
+    def _edit(self, path, items):
+        path.write_text(yaml.safe_dump({"projects": items}), encoding="utf-8")
+
+    def test_diff_keeps_unchanged_projects(self, tmp_path):
+        """Test that only added, removed and changed projects are touched"""
+        path = tmp_path / "projects.yaml"
+        store = self._store(path)
+        api = store.get_project("api")
+        api.runtime.status = "running"
+        worker = store.get_project("worker")
+
+        self._edit(path, [
+            {"id": "api", "name": "Api", "working_dir": "/srv", "command": "python"},
+            {"id": "worker", "name": "Worker", "working_dir": "/srv", "command": "python", "tags": ["bg"]},
+            {"id": "web", "name": "Web", "working_dir": "/srv", "command": "node"},
+        ])
+        diff = store.reload()
+
+        assert diff.summary() == {"added": ["web"], "removed": ["cron"], "changed": ["worker"]}
+        assert store.get_project("api") is api
+        assert api.runtime.status == "running"
+        assert store.get_project("worker").runtime is worker.runtime
+        assert store.get_project("worker").config.tags == ["bg"]
+        assert worker.config.tags == []
+        assert diff.changed[0][1] is worker.config
+        assert [p.config.id for p in store.list_projects()] == ["api", "worker", "web"]
+
+    def test_own_writes_are_not_reloaded(self, tmp_path):
+        """Test that the store does not report its own flushes as edits"""
+        path = tmp_path / "projects.yaml"
+        store = self._store(path)
+        assert store.reload() is None
+        assert store.reloads_total == 0
+
+    def test_unreadable_edit_is_ignored(self, tmp_path):
+        """Test that a broken edit keeps the current projects and is set aside on the next write"""
+        path = tmp_path / "projects.yaml"
+        store = self._store(path)
+        path.write_text("projects: [unclosed", encoding="utf-8")
+
+        assert store.reload() is None
+        assert len(store.list_projects()) == 3
+        store.upsert_project(ProjectConfig(id="web", name="Web", working_dir="/srv", command="node"))
+        store.flush()
+        assert len(list(tmp_path.glob("projects.yaml.corrupt-*"))) == 1
+
+    def test_watch_applies_edits(self, tmp_path):
+        """Test that watch() notices an atomic rename and reports the diff"""
+        path = tmp_path / "projects.yaml"
+        store = self._store(path)
+        diffs = []
+        store.watch(diffs.append, poll_interval_seconds=0.05)
+        try:
+            tmp = tmp_path / "edit.tmp"
+            tmp.write_text(yaml.safe_dump({"projects": [
+                {"id": "api", "name": "Api", "working_dir": "/srv", "command": "python"},
+            ]}), encoding="utf-8")
+            os.replace(tmp, path)
+            deadline = time.monotonic() + 5
+            while not diffs and time.monotonic() < deadline:
+                time.sleep(0.02)
+        finally:
+            store.close()
+
+        assert len(diffs) == 1
+        assert diffs[0].summary()["removed"] == ["worker", "cron"]
+        assert store.stats()["reloads_total"] == 1
+
+
+class TestSnapshots:
+    """Test cases for copy-on-write snapshots and publish()"""
+
+    def _store(self, tmp_path):
+        store = ProjectStore(tmp_path / "projects.yaml", flush_delay_seconds=60)
+        for pid in ("api", "worker"):
+            store.upsert_project(ProjectConfig(id=pid, name=pid.title(), working_dir="/srv", command="python"))
+        return store
+
+    def test_writes_publish_new_versions(self, tmp_path):
+        """Test that a write swaps in a new tuple and leaves the old one intact"""
+        store = self._store(tmp_path)
+        before = store.list_projects()
+        assert store.list_projects() is before
+        assert isinstance(before, tuple)
+
+        store.upsert_project(ProjectConfig(id="api", name="Renamed", working_dir="/srv", command="python"))
+        store.delete_project("worker")
+        assert [p.config.name for p in before] == ["Api", "Worker"]
+        assert [p.config.name for p in store.list_projects()] == ["Renamed"]
+
+    def test_readers_do_not_lock(self, tmp_path):
+        """Test that reads complete while a writer holds the lock"""
+        store = self._store(tmp_path)
+        held, release = threading.Event(), threading.Event()
+
+        def writer():
+            with store._lock:
+                held.set()
+                release.wait(5)
+
+        thread = threading.Thread(target=writer)
+        thread.start()
+        try:
+            assert held.wait(5)
+            assert len(store.list_projects()) == 2
+            assert store.get_project("api") is not None
+        finally:
+            release.set()
+            thread.join()
+
+    def test_publish_rejects_stale_base(self, tmp_path):
+        """Test that publish only applies on top of the version it was forked from"""
+        store = self._store(tmp_path)
+        base = store.get_project("api")
+        work = fork(base)
+        work.runtime.status = "running"
+        work.runtime.metrics.cpu_percent = 12.5
+        assert base.runtime.metrics.cpu_percent == 0.0
+
+        published = store.publish([(base, work)])
+        assert store.get_project("api") is published["api"] is work
+        # A second writer that forked the old version loses
+        late = fork(base)
+        late.runtime.status = "crashed"
+        assert store.publish([(base, late)]) == {}
+        assert store.get_project("api").runtime.status == "running"
+
+    def test_forced_publish_keeps_newer_config(self, tmp_path):
+        """Test that force applies the runtime onto the current config and skips deleted projects"""
+        store = self._store(tmp_path)
+        base = store.get_project("api")
+        work = fork(base)
+        work.runtime.status = "running"
+        store.upsert_project(ProjectConfig(id="api", name="Renamed", working_dir="/srv", command="python"))
+
+        store.publish([(base, work)], force=True)
+        current = store.get_project("api")
+        assert (current.config.name, current.runtime.status) == ("Renamed", "running")
+
+        gone = store.get_project("worker")
+        store.delete_project("worker")
+        assert store.publish([(gone, fork(gone))], force=True) == {}
+        assert store.get_project("worker") is None
+
+    def test_backends_must_implement_writes(self):
+        """Test that a backend without upsert_project and delete_project cannot be created"""
+        with pytest.raises(TypeError, match="abstract"):
+            BaseProjectStore()
+
+
+class TestIndexes:
+    """Test cases for the snapshot's secondary indexes"""
+
+    def _config(self, pid, **kwargs):
+        return ProjectConfig(id=pid, name=pid, working_dir="/srv", command=kwargs.pop("command", "python"), **kwargs)
+
+    def _store(self, tmp_path):
+        store = ProjectStore(tmp_path / "projects.yaml", flush_delay_seconds=60)
+        store.upsert_project(self._config("api", ports=[8000], tags=["web", "eu"]))
+        store.upsert_project(self._config("admin", ports=[8000, 8001], tags=["web"]))
+        store.upsert_project(self._config("cron", command="node", tags=["batch"]))
+        return store
+
+    def test_queries(self, tmp_path):
+        """Test lookups by each index and their combination, in store order"""
+        snap = self._store(tmp_path).snapshot()
+        ids = lambda projects: [p.config.id for p in projects]
+
+        assert ids(snap.query(tag="web")) == ["api", "admin"]
+        assert ids(snap.query(tag={"eu", "batch"})) == ["api", "cron"]
+        assert ids(snap.query(tag="web", port=8001)) == ["admin"]
+        assert ids(snap.query(command="node", status="stopped")) == ["cron"]
+        assert snap.query(status="running") == []
+        assert snap.counts("status") == {"stopped": 3}
+        assert snap.port_conflicts() == {8000: ["admin", "api"]}
+
+    def test_incremental_updates_match_rebuild(self, tmp_path):
+        """Test that indexes updated on writes and status changes equal a full rebuild"""
+        store = self._store(tmp_path)
+        base = store.get_project("api")
+        work = fork(base)
+        work.runtime.status = "running"
+        work.runtime.restarts_total = 2
+        store.publish([(base, work)])
+        store.upsert_project(self._config("admin", ports=[9000], tags=["ops"]))
+        store.delete_project("cron")
+
+        snap = store.snapshot()
+        rebuilt = ProjectSnapshot.build(dict(snap.index))
+        assert snap.postings == rebuilt.postings
+        assert snap.restarts_total == rebuilt.restarts_total == 2
+        assert snap.ids("status", "running") == {"api"}
+        assert snap.port_conflicts() == {}
+        assert "batch" not in snap.postings["tag"]
+
+    def test_unknown_field(self, tmp_path):
+        """Test that querying a field without an index is rejected"""
+        with pytest.raises(ValueError):
+            self._store(tmp_path).snapshot().query(name="api")
@@ -0,0 +1,56 @@
+"""
+Tests for the Prometheus exporter
+"""
+
+from manager.backend.prometheus import MetricsExporter
+
+
+def _samples(text):
+    return [line for line in text.splitlines() if line and not line.startswith("#")]
+
+
+class TestMetricsExporter:
+    def test_running_project_series(self, sample_projects):
+        """Test that running projects export resource and instance series"""
+        running = sample_projects[2]
+        running.runtime.metrics.cpu_percent = 12.5
+        running.runtime.metrics.memory_rss_mb = 2.0
+        running.runtime.health.status = "healthy"
+        running.runtime.health.latency_ms = 15.0
+
+        text = MetricsExporter().render(sample_projects)
+        samples = _samples(text)
+
+        assert 'nextgen_project_up{project="project-3"} 1' in samples
+        assert 'nextgen_project_up{project="project-1"} 0' in samples
+        assert 'nextgen_project_status{project="project-3",status="running"} 1' in samples
+        assert 'nextgen_project_cpu_percent{project="project-3"} 12.5' in samples
+        assert 'nextgen_project_memory_rss_bytes{project="project-3"} 2097152' in samples
+        assert 'nextgen_project_instance_up{project="project-3",instance="0",pid="12345"} 1' in samples
+        assert 'nextgen_project_healthy{project="project-3"} 1' in samples
+        assert 'nextgen_project_health_latency_seconds{project="project-3"} 0.015' in samples
+        assert 'nextgen_hub_projects 3' in samples
+        # Stopped projects have no resource series
+        assert not any(s.startswith('nextgen_project_cpu_percent{project="project-1"}') for s in samples)
+
+    def test_format_headers(self, sample_projects):
+        """Test HELP/TYPE headers and trailing newline"""
+        text = MetricsExporter().render(sample_projects)
+        assert "# TYPE nextgen_project_restarts_total counter" in text
+        assert "# TYPE nextgen_project_up gauge" in text
+        assert text.endswith("\n")
+
+    def test_label_escaping(self, sample_project):
+        """Test that label values are escaped"""
+        sample_project.config.id = 'we"ird\\id'
+        text = MetricsExporter().render([sample_project])
+        assert 'nextgen_project_up{project="we\\"ird\\\\id"} 0' in _samples(text)
+
+    def test_store_write_series(self, temp_project_store, sample_project_config):
+        """Test that write-behind persistence counters are exported"""
+        temp_project_store.upsert_project(sample_project_config)
+        temp_project_store.flush()
+        samples = _samples(MetricsExporter().render([], store=temp_project_store))
+        assert "nextgen_store_write_duration_seconds_count 1" in samples
+        assert "nextgen_store_write_batch_size_sum 1" in samples
+        assert "nextgen_store_pending_changes 0" in samples
@@ -0,0 +1,133 @@
+"""
+Tests for runtime state persistence and process re-adoption across hub restarts
+"""
+
+import sys
+
+import pytest
+
+from manager.backend.models import Project, ProjectConfig, fork
+from manager.backend.orchestrator import BroadcastHub, Orchestrator
+from manager.backend.process_manager import ProcessManager
+from manager.backend.project_store import ProjectStore
+from manager.backend.runtime_journal import RuntimeJournal
+
+
+def _project(project_id="svc", working_dir="/tmp", **kwargs):
+    config = ProjectConfig(id=project_id, name=project_id, working_dir=str(working_dir), command="python", **kwargs)
+    return Project(config=config)
+
+
+class TestRuntimeJournal:
+    def test_last_record_wins_and_forget(self, tmp_path):
+        """Test that reloading returns each project's latest state and drops forgotten ones"""
+        journal = RuntimeJournal(tmp_path / "runtime.journal")
+        a, b = _project("a"), _project("b")
+        journal.record([a, b])
+        a2 = fork(a)
+        a2.runtime.restarts_total = 3
+        a2.runtime.last_exit_code = 1
+        journal.record([a2])
+        journal.forget(["b"])
+        journal.close()
+
+        state = RuntimeJournal(tmp_path / "runtime.journal").load()
+        assert set(state) == {"a"}
+        assert state["a"]["restarts_total"] == 3
+        assert state["a"]["last_exit_code"] == 1
+
+    def test_unchanged_runtime_is_not_rewritten(self, tmp_path):
+        """Test that recording the same durable state twice appends a single line"""
+        journal = RuntimeJournal(tmp_path / "runtime.journal")
+        project = _project()
+        journal.record([project])
+        work = fork(project)
+        work.runtime.metrics.cpu_percent = 50.0
+        journal.record([work])
+        assert journal.records_total == 1
+
+    def test_compaction_keeps_latest_state(self, tmp_path):
+        """Test that the log is rewritten to one line per project once it grows"""
+        path = tmp_path / "runtime.journal"
+        journal = RuntimeJournal(path, compact_factor=2, min_compact_lines=4)
+        project = _project()
+        for n in range(10):
+            project = fork(project)
+            project.runtime.restarts_total = n
+            journal.record([project])
+        journal.close()
+        assert journal.compactions_total >= 1
+        assert len(path.read_bytes().splitlines()) < 10
+        assert RuntimeJournal(path).load()["svc"]["restarts_total"] == 9
+
+    def test_torn_line_is_skipped(self, tmp_path):
+        """Test that a partial last line from a crash does not break loading"""
+        path = tmp_path / "runtime.journal"
+        path.write_bytes(b'{"id": "a", "rt": {"restarts_total": 2}}\n{"id": "a", "rt": {"rest')
+        assert RuntimeJournal(path).load() == {"a": {"restarts_total": 2}}
+
+
+class TestReadoption:
+    @pytest.fixture
+    def sleeper(self, tmp_path):
+        """A project running a long sleep, started by a first hub"""
+        project = _project(working_dir=tmp_path, args=["-c", "import time; time.sleep(60)"])
+        project.config.command = sys.executable
+        first = ProcessManager(tmp_path / "runtime")
+        result = first.start(fork(project))
+        assert result.success
+        yield project, result.project.runtime.pid
+        first.stop(fork(project), timeout_seconds=2)
+
+    def test_adopts_live_process(self, tmp_path, sleeper):
+        """Test that a new process manager takes over a process started by the previous one"""
+        project, pid = sleeper
+        second = ProcessManager(tmp_path / "runtime")
+        assert second.adopt([project]) == {"svc": [pid]}
+        assert second.status(fork(project)).runtime.status == "running"
+        second.stop(fork(project), timeout_seconds=2)
+        assert not second.is_running("svc")
+
+    def test_rejects_recycled_pid(self, tmp_path, sleeper):
+        """Test that a pid whose create time no longer matches is not adopted or signalled"""
+        project, pid = sleeper
+        runtime_dir = tmp_path / "runtime"
+        pid_file = runtime_dir / "svc-0.pid"
+        _, create_time, digest = pid_file.read_text().split()
+        pid_file.write_text(f"{pid} {float(create_time) - 100} {digest}")
+
+        second = ProcessManager(runtime_dir)
+        assert not second.is_running("svc")
+        assert second.adopt([project]) == {}
+        assert not pid_file.exists()
+        second.stop(fork(project), timeout_seconds=2)
+        pid_file.write_text(f"{pid} {create_time} {digest}")
+        assert second.is_running("svc")
+
+    def test_restore_publishes_adopted_state(self, tmp_path, sleeper):
+        """Test that a restarting orchestrator restores counters and adopts running processes"""
+        project, pid = sleeper
+        journal_path = tmp_path / "runtime" / "runtime.journal"
+        saved = fork(project)
+        saved.runtime.restarts_total = 4
+        previous = RuntimeJournal(journal_path)
+        previous.record([saved])
+        previous.close()
+
+        store = ProjectStore(tmp_path / "projects.yaml")
+        store.upsert_project(project.config)
+        journal = RuntimeJournal(journal_path)
+        orchestrator = Orchestrator(store, ProcessManager(tmp_path / "runtime"), BroadcastHub(), journal=journal)
+        assert orchestrator.restore() == 1
+
+        restored = store.get_project("svc")
+        assert restored.runtime.status == "running"
+        assert restored.runtime.pids == [pid]
+        assert restored.runtime.restarts_total == 4
+
+        work = fork(restored)
+        work.runtime.restarts_total = 5
+        store.publish([(restored, work)], force=True)
+        assert journal.load()["svc"]["restarts_total"] == 5
+        store.close()
+        journal.close()
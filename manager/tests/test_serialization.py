@@ -0,0 +1,59 @@
+"""
+Tests for JSON serialization helpers
+"""
+
+import json
+from datetime import datetime
+
+from manager.backend.models import ProjectConfig
+from manager.backend.serialization import FastJSONResponse, ProjectJSONCache, dumps
+
+
+class TestDumps:
+    def test_dumps_models_and_datetimes(self, sample_project):
+        """Test that models and datetimes serialize like model_dump(mode='json')"""
+        sample_project.runtime.started_at = datetime(2024, 1, 1, 12, 0, 0)
+        assert json.loads(dumps(sample_project)) == sample_project.model_dump(mode="json")
+        assert json.loads(dumps({"project": sample_project, "n": 1})) == {
+            "project": sample_project.model_dump(mode="json"),
+            "n": 1,
+        }
+
+    def test_response_passes_bytes_through(self):
+        """Test that pre-encoded payloads are not re-serialized"""
+        response = FastJSONResponse(b'{"a":1}')
+        assert response.body == b'{"a":1}'
+        assert response.media_type == "application/json"
+
+
+class TestProjectJSONCache:
+    def test_encode_matches_model_dump(self, sample_projects):
+        """Test that the cached encoding equals the plain Pydantic output"""
+        cache = ProjectJSONCache()
+        payload = cache.encode_projects(sample_projects)
+        assert json.loads(payload) == [p.model_dump(mode="json") for p in sample_projects]
+
+    def test_unchanged_runtime_is_reused(self, sample_project):
+        """Test that only changed runtimes are re-serialized"""
+        cache = ProjectJSONCache()
+        cache.encode_project(sample_project)
+        cache.encode_project(sample_project)
+        assert (cache.hits, cache.misses) == (1, 1)
+
+        sample_project.runtime.metrics.cpu_percent = 42.0
+        encoded = cache.encode_project(sample_project)
+        assert cache.misses == 2
+        assert json.loads(encoded)["runtime"]["metrics"]["cpu_percent"] == 42.0
+
+    def test_replaced_config_is_re_encoded(self, sample_project):
+        """Test that a new config object invalidates the cached config bytes"""
+        cache = ProjectJSONCache()
+        cache.encode_project(sample_project)
+        sample_project.config = ProjectConfig(**{**sample_project.config.model_dump(), "name": "Renamed"})
+        assert json.loads(cache.encode_project(sample_project))["config"]["name"] == "Renamed"
+
+    def test_same_list_is_memoized(self, sample_projects):
+        """Test that one broadcast list is encoded once for all subscribers"""
+        cache = ProjectJSONCache()
+        first = cache.encode_projects(sample_projects)
+        assert cache.encode_projects(sample_projects) is first
@@ -0,0 +1,139 @@
+"""
+Tests for the SQLite project store backend
+"""
+
+import sqlite3
+
+import pytest
+
+from manager.backend.models import ProjectConfig, fork
+from manager.backend.project_store import ProjectStore, open_store
+from manager.backend.sqlite_store import SqliteProjectStore, migrate
+
+
+def _config(project_id, name=None, tags=()):
+    return ProjectConfig(
+        id=project_id,
+        name=name or project_id.title(),
+        working_dir="/srv",
+        command="python",
+        env={"MODE": "prod"},
+        tags=list(tags),
+    )
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = SqliteProjectStore(tmp_path / "projects.db")
+    yield store
+    store.close()
+
+
+class TestSqliteProjectStore:
+    """Test cases for SqliteProjectStore"""
+
+    def test_crud_round_trip(self, store, tmp_path):
+        """Test that upserts and deletes are persisted immediately"""
+        store.upsert_project(_config("api", tags=["web"]))
+        store.upsert_project(_config("worker"))
+        store.upsert_project(_config("api", name="API v2", tags=["web", "edge"]))
+        assert store.delete_project("worker") is True
+        assert store.delete_project("worker") is False
+
+        reopened = SqliteProjectStore(tmp_path / "projects.db")
+        try:
+            projects = reopened.list_projects()
+            assert [p.config.id for p in projects] == ["api"]
+            assert projects[0].config.name == "API v2"
+            assert projects[0].config.env == {"MODE": "prod"}
+            assert projects[0].config.tags == ["web", "edge"]
+        finally:
+            reopened.close()
+
+    def test_runtime_survives_updates(self, store):
+        """Test that published runtime state survives later lookups and config updates"""
+        base = store.upsert_project(_config("api"))
+        work = fork(base)
+        work.runtime.restarts_total = 3
+        project = store.publish([(base, work)])["api"]
+
+        assert store.list_projects()[0] is project
+        renamed = store.upsert_project(_config("api", name="Renamed"))
+        assert renamed.runtime is project.runtime
+        assert project.config.name == "Api"
+        assert store.get_project("api").runtime.restarts_total == 3
+        assert store.get_project("missing") is None
+
+    def test_find_by_name_and_tag(self, store):
+        """Test indexed queries on name and tags"""
+        store.upsert_project(_config("a", name="shop", tags=["web", "eu"]))
+        store.upsert_project(_config("b", name="shop", tags=["web"]))
+        store.upsert_project(_config("c", name="batch", tags=["eu"]))
+
+        assert [p.config.id for p in store.find_projects(tag="web")] == ["a", "b"]
+        assert [p.config.id for p in store.find_projects(name="shop", tag="eu")] == ["a"]
+        assert [p.config.id for p in store.find_projects(name="batch")] == ["c"]
+        # Tags are replaced, not merged, on update
+        store.upsert_project(_config("a", name="shop", tags=[]))
+        assert [p.config.id for p in store.find_projects(tag="eu")] == ["c"]
+
+    def test_wal_mode_and_stats(self, store, tmp_path):
+        """Test that the database runs in WAL mode and writes are instrumented"""
+        store.upsert_many([_config(f"p{i}") for i in range(5)])
+        conn = sqlite3.connect(str(tmp_path / "projects.db"))
+        try:
+            assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        finally:
+            conn.close()
+        stats = store.stats()
+        assert stats["backend"] == "SqliteProjectStore"
+        assert stats["writes_total"] == 1
+        assert stats["batch_size_max"] == 5
+        assert stats["pending_changes"] == 0
+
+    def test_failed_batch_is_rolled_back(self, store):
+        """Test that a batch either lands completely or not at all"""
+        store.upsert_project(_config("keep"))
+        bad = _config("bad")
+        object.__setattr__(bad, "name", None)  # violates NOT NULL
+        with pytest.raises(sqlite3.IntegrityError):
+            store.upsert_many([_config("new"), bad])
+        assert store.write_errors_total == 1
+        reopened = SqliteProjectStore(store._db_path)
+        try:
+            assert [p.config.id for p in reopened.list_projects()] == ["keep"]
+        finally:
+            reopened.close()
+
+
+class TestMigration:
+    """Test cases for importing YAML stores"""
+
+    def test_migrate_yaml(self, tmp_path):
+        """Test that YAML projects are imported and re-running is idempotent"""
+        yaml_path = tmp_path / "projects.yaml"
+        source = ProjectStore(yaml_path)
+        source.upsert_project(_config("api", tags=["web"]))
+        source.upsert_project(_config("worker"))
+        source.flush()
+
+        target = tmp_path / "projects.db"
+        assert migrate([yaml_path], target) == 2
+        assert migrate([yaml_path], target) == 2
+
+        store = open_store(target)
+        try:
+            assert isinstance(store, SqliteProjectStore)
+            assert sorted(p.config.id for p in store.list_projects()) == ["api", "worker"]
+            assert [p.config.id for p in store.find_projects(tag="web")] == ["api"]
+        finally:
+            store.close()
+
+    def test_open_store_defaults_to_yaml(self, tmp_path):
+        """Test backend selection"""
+        assert isinstance(open_store(tmp_path / "projects.yaml"), ProjectStore)
+        sqlite_store = open_store(tmp_path / "custom.data", backend="sqlite")
+        assert isinstance(sqlite_store, SqliteProjectStore)
+        sqlite_store.close()
+        with pytest.raises(ValueError):
+            open_store(tmp_path / "projects.yaml", backend="mongo")
@@ -0,0 +1,183 @@
+"""
+Tests for multi-worker mode: a supervisor owning state and API workers proxying to it
+"""
+
+import asyncio
+import sys
+import threading
+
+import pytest
+from fastapi.testclient import TestClient
+
+from manager.backend.app import create_app
+from manager.backend.config import HubConfig
+from manager.backend.dependencies import HubState
+from manager.backend.remote import SupervisorClient
+from manager.backend.supervisor import Supervisor, connect, parse_address
+
+pytestmark = pytest.mark.skipif(sys.platform == "win32", reason="uses a Unix socket")
+
+
+@pytest.fixture
+def supervisor(tmp_path):
+    """Run a supervisor on its own event loop thread"""
+    address = str(tmp_path / "s.sock")
+    state = HubState(HubConfig(data_dir=tmp_path / "data"))
+    loop = asyncio.new_event_loop()
+    sup = Supervisor(state, address)
+    started = threading.Event()
+
+    def serve():
+        asyncio.set_event_loop(loop)
+        loop.run_until_complete(sup.start())
+        started.set()
+        loop.run_forever()
+
+    thread = threading.Thread(target=serve, daemon=True)
+    thread.start()
+    assert started.wait(10)
+    yield sup
+    asyncio.run_coroutine_threadsafe(sup.stop(), loop).result(10)
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join(5)
+    loop.close()
+
+
+def _worker(supervisor, tmp_path):
+    return TestClient(create_app(HubConfig(data_dir=tmp_path / "worker", supervisor_address=supervisor.address)))
+
+
+def _project(tmp_path, **extra):
+    config = {
+        "id": "sleeper",
+        "name": "Sleeper",
+        "working_dir": str(tmp_path),
+        "command": sys.executable,
+        "args": ["-c", "import time; time.sleep(30)"],
+    }
+    config.update(extra)
+    return {"config": config}
+
+
+class TestParseAddress:
+    """Test cases for parse_address"""
+
+    def test_tcp_and_unix(self):
+        """Test that host:port is TCP and anything else is a socket path"""
+        assert parse_address("127.0.0.1:8078") == ("127.0.0.1", 8078)
+        assert parse_address("/run/nextgen/hub.sock") == "/run/nextgen/hub.sock"
+        assert parse_address(r"C:\\hub\\hub.sock") == r"C:\\hub\\hub.sock"
+
+
+class TestSupervisor:
+    """Test cases for workers backed by a supervisor"""
+
+    def test_workers_share_state(self, supervisor, tmp_path):
+        """Test that a write through one worker is visible to another and owned by the supervisor"""
+        with _worker(supervisor, tmp_path) as first, _worker(supervisor, tmp_path) as second:
+            assert first.post("/api/projects", json=_project(tmp_path)).status_code == 200
+            # The writing worker sees it at once; the other after the next snapshot
+            assert first.get("/api/projects/sleeper").status_code == 200
+            assert supervisor.state.store.get_project("sleeper") is not None
+            assert not (tmp_path / "worker").exists()
+
+            with second.websocket_connect("/ws?fields=id") as ws:
+                assert ws.receive_json() in ([], [{"config": {"id": "sleeper"}}])
+            assert second.delete("/api/projects/sleeper").json() == {"success": True}
+            assert supervisor.state.store.get_project("sleeper") is None
+
+    def test_start_stop_forwarded(self, supervisor, tmp_path):
+        """Test that process control runs in the supervisor"""
+        with _worker(supervisor, tmp_path) as client:
+            client.post("/api/projects", json=_project(tmp_path))
+            started = client.post("/api/projects/sleeper/start").json()
+            try:
+                assert started["runtime"]["status"] == "running"
+                assert supervisor.state.proc.is_running("sleeper")
+                # The supervisor's status refresh (used for snapshots) handles a running project
+                project = supervisor.state.store.get_project("sleeper")
+                assert supervisor.state.proc.status(project).runtime.status == "running"
+                assert client.post("/api/projects/sleeper/start").status_code == 400
+            finally:
+                stopped = client.post("/api/projects/sleeper/stop").json()
+            assert stopped["runtime"]["status"] == "stopped"
+            assert client.post("/api/projects/missing/stop").status_code == 404
+
+    def test_jobs_run_in_supervisor(self, supervisor, tmp_path):
+        """Test that job ids resolve on any worker"""
+        body = _project(tmp_path, actions={"hello": ["-c", "print('hi')"]})
+        with _worker(supervisor, tmp_path) as first, _worker(supervisor, tmp_path) as second:
+            first.post("/api/projects", json=body)
+            result = first.post("/api/projects/sleeper/actions/hello?wait=true").json()
+            assert result["code"] == 0
+            assert result["stdout"] == "hi"
+            job_id = result["job"]["id"]
+            assert second.get(f"/api/jobs/{job_id}").json()["status"] == "succeeded"
+            assert [j["id"] for j in second.get("/api/jobs").json()] == [job_id]
+            assert second.get("/api/jobs/nope").status_code == 404
+
+    def test_metrics_and_timings_come_from_supervisor(self, supervisor, tmp_path):
+        """Test that hub-wide observability endpoints are proxied"""
+        with _worker(supervisor, tmp_path) as client:
+            client.post("/api/projects", json=_project(tmp_path))
+            assert "nextgen_hub_projects 1" in client.get("/metrics").text
+            assert "errors_total" in client.get("/api/system/orchestrator/timings").json()
+
+    def test_slow_forwarded_call_does_not_block_worker(self, supervisor, tmp_path, monkeypatch):
+        """Test that a worker keeps serving while a proxied call waits on the supervisor"""
+        proc = supervisor.state.proc
+        stop = proc.stop
+        entered, release = threading.Event(), threading.Event()
+
+        def slow_stop(project, *args, **kwargs):
+            entered.set()
+            release.wait(10)
+            return stop(project, *args, **kwargs)
+
+        monkeypatch.setattr(proc, "stop", slow_stop)
+        with _worker(supervisor, tmp_path) as client:
+            client.post("/api/projects", json=_project(tmp_path))
+            client.post("/api/projects/sleeper/start")
+            stopping = threading.Thread(target=client.post, args=("/api/projects/sleeper/stop",))
+            stopping.start()
+            try:
+                assert entered.wait(10)
+                assert client.get("/healthz").json()["ok"] is True
+                # Proxied calls use another pooled connection instead of queueing behind the stop
+                assert "nextgen_hub_projects 1" in client.get("/metrics").text
+                assert stopping.is_alive()
+            finally:
+                release.set()
+                stopping.join(10)
+            assert not proc.is_running("sleeper")
+
+    def test_slow_command_does_not_block_supervisor(self, supervisor, tmp_path, monkeypatch):
+        """Test that other connections and new subscribers are served while a stop is in flight"""
+        proc = supervisor.state.proc
+        stop = proc.stop
+        entered, release = threading.Event(), threading.Event()
+
+        def slow_stop(project, *args, **kwargs):
+            entered.set()
+            release.wait(10)
+            return stop(project, *args, **kwargs)
+
+        monkeypatch.setattr(proc, "stop", slow_stop)
+        first, second = SupervisorClient(supervisor.address), SupervisorClient(supervisor.address, timeout_seconds=5)
+        first.call("upsert_project", config=_project(tmp_path)["config"])
+        stopping = threading.Thread(target=first.call, args=("stop",), kwargs={"project_id": "sleeper"})
+        stopping.start()
+        try:
+            assert entered.wait(10)
+            assert [p["config"]["id"] for p in second.call("list_projects")] == ["sleeper"]
+            sock = connect(supervisor.address, timeout=5)
+            with sock, sock.makefile("rwb") as f:
+                f.write(b'{"op":"subscribe"}\n')
+                f.flush()
+                assert b'"sleeper"' in f.readline()
+            assert stopping.is_alive()
+        finally:
+            release.set()
+            stopping.join(10)
+            first.close()
+            second.close()
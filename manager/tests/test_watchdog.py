@@ -0,0 +1,47 @@
+"""
+Tests for the event-loop lag watchdog
+"""
+
+import asyncio
+import time
+
+from manager.backend.watchdog import LoopLagWatchdog
+
+
+def blocking_call():
+    time.sleep(0.3)
+
+
+class TestLoopLagWatchdog:
+    def test_captures_blocking_stack(self):
+        """Test that a blocked loop is detected with the offending stack"""
+        watchdog = LoopLagWatchdog(interval_seconds=0.02, threshold_seconds=0.1)
+
+        async def scenario():
+            watchdog.start()
+            await asyncio.sleep(0.1)
+            blocking_call()
+            await asyncio.sleep(0.1)
+            watchdog.stop()
+
+        asyncio.run(scenario())
+        snap = watchdog.snapshot()
+        assert snap["enabled"] is False
+        assert snap["stalls_total"] >= 1
+        stall = snap["recent_stalls"][0]
+        assert "blocking_call" in stall["stack"]
+        assert stall["lag_ms"] >= 100
+        assert snap["lag"]["count"] >= 2
+
+    def test_healthy_loop_has_no_stalls(self):
+        """Test that an idle loop records lag samples but no stalls"""
+        watchdog = LoopLagWatchdog(interval_seconds=0.01, threshold_seconds=0.2)
+
+        async def scenario():
+            watchdog.start()
+            await asyncio.sleep(0.15)
+            watchdog.stop()
+
+        asyncio.run(scenario())
+        assert watchdog.stalls_total == 0
+        assert watchdog.lag.count > 0